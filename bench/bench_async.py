@@ -0,0 +1,85 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of the asyncio API: calendars served over local sockets are loaded and enumerated in one event loop,
+blocking (stream_load and get_event_instances called from the loop) against load_streams and the
+get_event_instances coroutine, with the longest stall of the event loop (measured by a ticker task).
+
+Usage::
+
+    python bench_async.py [-f 50] [-n 500] [-l 8]
+'''
+import argparse
+import asyncio
+import importlib
+import time
+
+from bench_utils import load_package
+from synthetic_ics import synthetic_calendar
+
+TICK = 0.001
+""" period (s) of the ticker task measuring the stalls of the event loop """
+
+async def ticker(stalls):
+    """ sleeps TICK in a loop and keeps the longest time between two wake ups in stalls[0] """
+    last = time.perf_counter()
+    while True:
+        await asyncio.sleep(TICK)
+        now = time.perf_counter()
+        stalls[0] = max(stalls[0], now-last-TICK)
+        last = now
+
+async def serve(sICalendar):
+    """ starts a local server sending sICalendar to each connection, returns the server and its port """
+    octets = sICalendar.encode("utf-8")
+    async def send(reader, writer):
+        writer.write(octets)
+        await writer.drain()
+        writer.close()
+    server = await asyncio.start_server(send, "127.0.0.1", 0)
+    return [server, server.sockets[0].getsockname()[1]]
+
+async def run(pyiCalendar, async_calendar, port, n_files, limit, blocking):
+    """ loads n_files calendars from port and enumerates a year of each, returns the wall time, the longest
+    stall of the loop and the number of instances """
+    stalls = [0.0]
+    tick = asyncio.ensure_future(ticker(stalls))
+    await asyncio.sleep(TICK*2)
+    start = time.perf_counter()
+    readers = []
+    for _ in range(n_files):
+        [reader, writer] = await asyncio.open_connection("127.0.0.1", port)
+        readers.append(reader)
+    if blocking:
+        calendars = []
+        for reader in readers:
+            mycal = pyiCalendar.iCalendar()
+            mycal.stream_load((await reader.read()).decode("utf-8").splitlines(True))
+            calendars.append(mycal)
+        instances = [mycal.get_event_instances("20240101", "20241231") for mycal in calendars]
+    else:
+        calendars = await async_calendar.load_streams(readers, limit=limit)
+        limiter = async_calendar.ConcurrencyLimiter(limit)
+        instances = await limiter.gather([async_calendar.get_event_instances(mycal, "20240101", "20241231")
+                                          for mycal in calendars])
+    elapsed = time.perf_counter()-start
+    tick.cancel()
+    return [elapsed, stalls[0], sum(len(instance) for instance in instances)]
+
+async def main(args):
+    pyiCalendar = load_package()
+    async_calendar = importlib.import_module("pyICSParser.async_calendar")
+    [server, port] = await serve(synthetic_calendar(n_events=args.n_events))
+    print("%d calendars of %d events, limit %d" % (args.files, args.n_events, args.limit))
+    print("%-24s %10s %14s %12s" % ("", "time (s)", "max stall (ms)", "instances"))
+    for [name, blocking] in [["blocking", True], ["async", False]]:
+        [elapsed, stall, instances] = await run(pyiCalendar, async_calendar, port, args.files, args.limit, blocking)
+        print("%-24s %10.3f %14.1f %12d" % (name, elapsed, stall*1000, instances))
+    server.close()
+    await server.wait_closed()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="asyncio loading and enumeration")
+    parser.add_argument("-f", dest="files", type=int, default=50, help="number of calendars")
+    parser.add_argument("-n", dest="n_events", type=int, default=500, help="VEVENT per calendar")
+    parser.add_argument("-l", dest="limit", type=int, default=8, help="calendars loaded or enumerated at once")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,42 @@
+# -*- coding:utf-8 -*-
+'''
+Throughput of the batch validator (files per second) for an increasing number of worker processes.
+
+The workers import pyICSParser: on platforms which spawn processes (Windows, macOS) the package needs to be
+installed, with fork (Linux) the sources of this tree are used.
+
+Usage::
+
+    python bench_batch.py [-f 400] [-n 50] [-c 8]
+'''
+import argparse
+import importlib
+import os
+import tempfile
+import time
+from os.path import join
+
+from bench_utils import load_package
+from synthetic_ics import write_calendar
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="batch validator throughput")
+    parser.add_argument("-f", dest="files", type=int, default=400, help="number of files")
+    parser.add_argument("-n", dest="n_events", type=int, default=50, help="VEVENT per file")
+    parser.add_argument("-c", dest="chunksize", type=int, default=8, help="files sent at once to a worker")
+    args = parser.parse_args()
+    load_package()
+    batch_validator = importlib.import_module("pyICSParser.batch_validator")
+    cores = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        for index in range(args.files):
+            write_calendar(join(tmp, "feed%05d.ics" % index), n_events=args.n_events)
+        print("%d files of %d events, %d cores" % (args.files, args.n_events, cores))
+        print("%8s %12s %12s" % ("workers", "time (s)", "files/s"))
+        workers = 1
+        while workers <= 2*cores:
+            start = time.perf_counter()
+            records = list(batch_validator.validate_files(tmp, workers=workers, chunksize=args.chunksize))
+            elapsed = time.perf_counter()-start
+            print("%8d %12.3f %12.1f" % (workers, elapsed, len(records)/elapsed))
+            workers *= 2
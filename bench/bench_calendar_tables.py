@@ -0,0 +1,57 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of the calendar arithmetic of the recurrence engine (week numbers, weekdays, month lengths) on
+multi-decade WEEKLY and BYWEEKNO rules, and of the week number computation alone, optionally compared
+with another build (--ref).
+
+Usage::
+
+    python bench_calendar_tables.py [-y 40] [-r 5] [--ref path/to/other/src]
+'''
+import argparse
+from datetime import datetime
+
+from bench_utils import load_package, best_of
+from synthetic_ics import synthetic_calendar
+
+RRULES = ["FREQ=WEEKLY;BYDAY=MO,WE,FR",
+          "FREQ=WEEKLY;INTERVAL=2;WKST=SU;BYDAY=TU,SU",
+          "FREQ=YEARLY;BYWEEKNO=1,20,52;BYDAY=MO",
+          "FREQ=YEARLY;BYWEEKNO=10;WKST=TH"]
+""" rules enumerated week by week over several decades """
+
+def bench_instances(pyiCalendar, sICalendar, window, repeat):
+    """ best time of get_event_instances over the window (calendar parsed once) """
+    mycal = pyiCalendar.iCalendar()
+    mycal.string_load(sICalendar)
+    mycal.parse_loaded()
+    return best_of(lambda: mycal.get_event_instances(*window), repeat)
+
+def bench_weeks(pyiCalendar, years, repeat):
+    """ best time of _isoCW for every day of years (with two WKST) """
+    mycal = pyiCalendar.iCalendar()
+    def weeks():
+        for year in years:
+            for month in range(1,13):
+                for day in range(1,29):
+                    mycal._isoCW(year,month,day,"MO")
+                    mycal._isoCW(year,month,day,"SU")
+    return best_of(weeks, repeat)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="calendar arithmetic of the recurrence engine")
+    parser.add_argument("-y", dest="years", type=int, default=40, help="years enumerated")
+    parser.add_argument("-r", dest="repeat", type=int, default=5, help="repeats (best time is kept)")
+    parser.add_argument("--ref", dest="ref", type=str, default="", help="folder with the sources of another build")
+    args = parser.parse_args()
+    sICalendar = synthetic_calendar(n_events=len(RRULES), rrules=RRULES, dtstart=datetime(1990,1,1,9))
+    window = ["19900101", "%04d1231" % (1990+args.years-1)]
+    years = range(1990, 1990+args.years)
+    builds = [["this build", load_package()]]
+    if args.ref:
+        builds.append(["reference build", load_package("pyICSParser_ref", args.ref)])
+    print("%d rules over %d years, best of %d" % (len(RRULES), args.years, args.repeat))
+    print("%-18s %18s %18s" % ("build", "instances (s)", "_isoCW (s)"))
+    for [name, pyiCalendar] in builds:
+        print("%-18s %18.4f %18.4f" % (name, bench_instances(pyiCalendar, sICalendar, window, args.repeat),
+                                       bench_weeks(pyiCalendar, years, args.repeat)))
@@ -0,0 +1,48 @@
+# -*- coding:utf-8 -*-
+'''
+Memory taken by the parsed events (self.events and self.compiled_events) and by the instances returned by
+get_event_instances, measured with tracemalloc; --src measures another build the same way.
+
+Usage::
+
+    python bench_compact.py [-n 5000] [--src ../old/src]
+'''
+import argparse
+import tracemalloc
+
+from bench_utils import load_package
+from synthetic_ics import synthetic_calendar
+
+def footprint(pyiCalendar, sICalendar, window):
+    """ returns [KiB held by the parsed calendar, KiB held by the instances, number of instances] """
+    #warm up (lazy imports and caches) so that only the calendar is measured
+    mycal = pyiCalendar.iCalendar()
+    mycal.string_load(synthetic_calendar(n_events=5))
+    mycal.get_event_instances(*window)
+    mycal = pyiCalendar.iCalendar()
+    mycal.string_load(sICalendar)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    mycal.parse_loaded()
+    mycal.sVCALENDAR = []
+    parsed = tracemalloc.get_traced_memory()[0]-before
+    instances = mycal.get_event_instances(*window)
+    mycal.events_instances = []
+    held = tracemalloc.get_traced_memory()[0]-before-parsed
+    tracemalloc.stop()
+    return [parsed/1024.0, held/1024.0, len(instances)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="memory of the parsed events and instances")
+    parser.add_argument("-n", dest="n_events", type=int, default=5000, help="number of VEVENT")
+    parser.add_argument("--src", dest="src", type=str, default="", help="folder with the sources of another build")
+    args = parser.parse_args()
+    sICalendar = synthetic_calendar(n_events=args.n_events, n_attendees=3, n_exdates=3)
+    builds = [["current", load_package()]]
+    if args.src:
+        builds.append([args.src, load_package("pyICSParser_src", args.src)])
+    print("%d events" % args.n_events)
+    print("%-30s %14s %16s %12s" % ("build", "events (KiB)", "instances (KiB)", "instances"))
+    for [name, pyiCalendar] in builds:
+        [parsed, held, count] = footprint(pyiCalendar, sICalendar, ["20240101", "20241231"])
+        print("%-30s %14.0f %16.0f %12d" % (name, parsed, held, count))
@@ -0,0 +1,67 @@
+# -*- coding:utf-8 -*-
+'''
+Micro-benchmark of the DATE / DATE-TIME decoding of vevent.date_load on EXDATE heavy feeds:
+the fixed width decoder with its cache, the decoder alone (cache disabled), datetime.strptime alone
+(core of the former decoder) and optionally another build (--ref).
+
+Usage::
+
+    python bench_dates.py [-n 50] [-x 300] [-r 5] [--ref path/to/other/src]
+'''
+import argparse
+from datetime import datetime
+
+from bench_utils import load_package, best_of
+from synthetic_ics import synthetic_calendar
+
+def exdate_values(sICalendar):
+    """ returns the EXDATE values of the calendar, one string per EXDATE line """
+    pyiCalendar = load_package()
+    mycal = pyiCalendar.iCalendar()
+    mycal.string_load(sICalendar)
+    return [line[len("EXDATE:"):] for line in mycal.sVCALENDAR if line.startswith("EXDATE:")]
+
+def bench_datelist(pyiCalendar, values, repeat):
+    """ best time to load all the EXDATE lists with a new vevent object """
+    def load():
+        loader = pyiCalendar.vevent()
+        for value in values:
+            loader.datelist_load(value, [])
+    return best_of(load, repeat)
+
+def bench_parse(pyiCalendar, sICalendar, repeat):
+    """ best time to load and parse the calendar """
+    def parse():
+        mycal = pyiCalendar.iCalendar()
+        mycal.string_load(sICalendar)
+        mycal.parse_loaded()
+    return best_of(parse, repeat)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DATE / DATE-TIME decoding")
+    parser.add_argument("-n", dest="n_events", type=int, default=50, help="number of VEVENT")
+    parser.add_argument("-x", dest="n_exdates", type=int, default=300, help="EXDATE values per VEVENT")
+    parser.add_argument("-r", dest="repeat", type=int, default=5, help="repeats (best time is kept)")
+    parser.add_argument("--ref", dest="ref", type=str, default="", help="folder with the sources of another build")
+    args = parser.parse_args()
+    sICalendar = synthetic_calendar(n_events=args.n_events, n_exdates=args.n_exdates)
+    values = exdate_values(sICalendar)
+    nb_values = sum(len(value.split(",")) for value in values)
+    pyiCalendar = load_package()
+    results = [["fixed width + cache", bench_datelist(pyiCalendar, values, args.repeat)]]
+    cache_size = pyiCalendar.DATE_CACHE_SIZE
+    pyiCalendar.DATE_CACHE_SIZE = 0
+    results.append(["fixed width, no cache", bench_datelist(pyiCalendar, values, args.repeat)])
+    pyiCalendar.DATE_CACHE_SIZE = cache_size
+    def strptime_only():
+        for value in values:
+            for one_date in value.split(","):
+                datetime.strptime(one_date[:15], "%Y%m%dT%H%M%S")
+    results.append(["strptime alone", best_of(strptime_only, args.repeat)])
+    if args.ref:
+        results.append(["reference build", bench_datelist(load_package("pyICSParser_ref", args.ref), values, args.repeat)])
+    print("%d EXDATE values in %d lists, best of %d" % (nb_values, len(values), args.repeat))
+    print("%-24s %12s %14s" % ("decoder", "time (s)", "values/s"))
+    for [name, elapsed] in results:
+        print("%-24s %12.4f %14.0f" % (name, elapsed, nb_values/elapsed))
+    print("load + parse_loaded of the calendar: %.4f s" % bench_parse(pyiCalendar, sICalendar, args.repeat))
@@ -0,0 +1,59 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of the expansion cache: the same calendar enumerated for overlapping windows (the year, then each
+month, week and 30 days window of it) without cache and with an ExpansionCache, for both RRULE backends,
+with the hit rates of the cache.
+
+Usage::
+
+    python bench_expansion_cache.py [-n 500] [-m 100000] [-r 3]
+'''
+import argparse
+import importlib
+from datetime import date, timedelta
+
+from bench_utils import load_package, best_of
+from synthetic_ics import synthetic_calendar
+
+def windows(year=2024):
+    """ returns the [start, end] windows (yyyymmdd) enumerated: the year, its months, weeks and 30 days windows """
+    ret_val = [["%04d0101" % year, "%04d1231" % year]]
+    for month in range(1, 13):
+        first = date(year, month, 1)
+        ret_val.append([first.strftime("%Y%m%d"), (date(year+month//12, month % 12+1, 1)-timedelta(days=1)).strftime("%Y%m%d")])
+    for week in range(0, 52):
+        first = date(year, 1, 1)+timedelta(days=7*week)
+        ret_val.append([first.strftime("%Y%m%d"), (first+timedelta(days=6)).strftime("%Y%m%d")])
+    for start in range(0, 330, 15):
+        first = date(year, 1, 1)+timedelta(days=start)
+        ret_val.append([first.strftime("%Y%m%d"), (first+timedelta(days=29)).strftime("%Y%m%d")])
+    return ret_val
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="expansion cache over overlapping windows")
+    parser.add_argument("-n", dest="n_events", type=int, default=500, help="number of VEVENT")
+    parser.add_argument("-m", dest="max_occurrences", type=int, default=100000, help="memory cap of the cache (occurrences)")
+    parser.add_argument("-r", dest="repeat", type=int, default=3, help="repeats (best time is kept)")
+    args = parser.parse_args()
+    pyiCalendar = load_package()
+    expansion_cache = importlib.import_module("pyICSParser.expansion_cache")
+    mycal = pyiCalendar.iCalendar()
+    mycal.string_load(synthetic_calendar(n_events=args.n_events))
+    mycal.parse_loaded()
+    queries = windows()
+    def run():
+        for [start, end] in queries:
+            mycal.get_event_instances(start, end)
+    print("%d events, %d windows, best of %d" % (args.n_events, len(queries), args.repeat))
+    print("%-10s %-12s %10s %10s %14s" % ("backend", "cache", "time (s)", "hit rate", "superset hits"))
+    for backend in ["objects", "ordinals"]:
+        mycal.rrule_backend = backend
+        mycal.set_expansion_cache(None)
+        print("%-10s %-12s %10.4f" % (backend, "none", best_of(run, args.repeat)))
+        cache = mycal.set_expansion_cache(expansion_cache.ExpansionCache(args.max_occurrences))
+        def cached_run():
+            cache.clear()
+            run()
+        elapsed = best_of(cached_run, args.repeat)
+        stats = cache.stats()
+        print("%-10s %-12s %10.4f %10.2f %14d" % (backend, "LRU", elapsed, stats["hit_rate"], stats["superset_hits"]))
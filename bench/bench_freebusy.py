@@ -0,0 +1,54 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of the free/busy aggregation of several calendars over a month: get_event_instances of each calendar
+then merge of the (per day slot) instances in Python, against one get_freebusy sweep-line over all the calendars.
+
+Usage::
+
+    python bench_freebusy.py [-n 500] [-c 10] [-r 3]
+'''
+import argparse
+from datetime import datetime, timedelta
+
+from bench_utils import load_package, best_of
+from synthetic_ics import synthetic_calendar
+
+def merged_instances(calendars, start, end):
+    """ returns the busy [start, end] of the calendars merged from get_event_instances (one hour per instance,
+    as a caller without the occurrence durations would do) """
+    intervals = []
+    for mycal in calendars:
+        for [t_date, summary, uid] in mycal.get_event_instances(start, end):
+            if not isinstance(t_date, datetime):
+                t_date = datetime.combine(t_date, datetime.min.time())
+            t_date = t_date.replace(tzinfo=None)
+            intervals.append([t_date, t_date+timedelta(hours=1)])
+    intervals.sort()
+    merged = []
+    for [t_start, t_end] in intervals:
+        if len(merged)>0 and t_start<=merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], t_end)
+        else:
+            merged.append([t_start, t_end])
+    return merged
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="free/busy of several calendars")
+    parser.add_argument("-n", dest="n_events", type=int, default=500, help="number of VEVENT per calendar")
+    parser.add_argument("-c", dest="n_calendars", type=int, default=10, help="number of calendars")
+    parser.add_argument("-r", dest="repeat", type=int, default=3, help="repeats (best time is kept)")
+    args = parser.parse_args()
+    pyiCalendar = load_package()
+    calendars = []
+    for index in range(args.n_calendars):
+        mycal = pyiCalendar.iCalendar()
+        mycal.string_load(synthetic_calendar(n_events=args.n_events, dtstart=datetime(2024, 1, 1, 8+index % 6)))
+        mycal.parse_loaded()
+        calendars.append(mycal)
+    window = ["20240301", "20240331"]
+    periods = calendars[0].get_freebusy(window[0], window[1], calendars[1:])
+    print("%d calendars of %d events, %d busy periods, best of %d" % (args.n_calendars, args.n_events, len(periods), args.repeat))
+    results = [["instances + merge", best_of(lambda: merged_instances(calendars, *window), args.repeat)],
+               ["get_freebusy", best_of(lambda: calendars[0].get_freebusy(window[0], window[1], calendars[1:]), args.repeat)]]
+    for [name, elapsed] in results:
+        print("%-28s %10.4f s" % (name, elapsed))
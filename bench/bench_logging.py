@@ -0,0 +1,85 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of the cost of disabled logging: parse and expansion with debug off compared to a build of the
+same sources where every _log call (and its debug_mode guard) is removed.
+
+Usage::
+
+    python bench_logging.py [-n 2000] [-r 5]
+'''
+import argparse
+import ast
+import shutil
+import tempfile
+from os.path import join
+
+from bench_utils import SRC_PATH, load_package, best_of
+from synthetic_ics import synthetic_calendar
+
+class _StripLog(ast.NodeTransformer):
+    """ removes the self._log(...) statements and the 'if self.debug_mode:' blocks left empty """
+    def visit_Expr(self, node):
+        call = node.value
+        if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) and call.func.attr == "_log":
+            return None
+        return node
+    def visit_If(self, node):
+        node = self.generic_visit(node)
+        if ast.unparse(node.test) == "self.debug_mode" and len(node.orelse) == 0 \
+                and all(isinstance(statement, ast.Pass) for statement in node.body):
+            return None
+        return node
+    def generic_visit(self, node):
+        node = super().generic_visit(node)
+        if isinstance(getattr(node, "body", None), list) and len(node.body) == 0:
+            node.body = [ast.Pass()]
+        return node
+
+def build_without_logging(folder):
+    """ copies the sources to folder with the _log calls removed from pyiCalendar.py and returns folder """
+    shutil.copytree(SRC_PATH, folder, ignore=shutil.ignore_patterns("__pycache__"))
+    path = join(folder, "pyiCalendar.py")
+    with open(path, encoding="utf-8") as fsrc:
+        tree = ast.parse(fsrc.read())
+    tree = ast.fix_missing_locations(_StripLog().visit(tree))
+    with open(path, "w", encoding="utf-8") as fsrc:
+        fsrc.write(ast.unparse(tree))
+    return folder
+
+def bench(pyiCalendar, sICalendar, repeat):
+    """ returns [parse time, expansion time] in seconds for one build """
+    def parse():
+        mycal = pyiCalendar.iCalendar()
+        mycal.string_load(sICalendar)
+        mycal.parse_loaded()
+        return mycal
+    mycal = parse()
+    def expand():
+        mycal.get_event_instances("20240101", "20241231")
+    return [best_of(parse, repeat), best_of(expand, repeat)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cost of disabled logging")
+    parser.add_argument("-n", dest="n_events", type=int, default=2000, help="number of VEVENT")
+    parser.add_argument("-r", dest="repeat", type=int, default=5, help="repeats (best time is kept)")
+    args = parser.parse_args()
+    sICalendar = synthetic_calendar(n_events=args.n_events)
+    with tempfile.TemporaryDirectory() as tmp:
+        nolog = load_package("pyICSParser_nolog", build_without_logging(join(tmp, "pyICSParser_nolog")))
+        current = load_package()
+        results = {"debug off": None, "no logging": None}
+        #builds are run in turns and the best times kept so that warm up and GC do not favour one of them
+        for _ in range(2):
+            for [build, pyiCalendar] in [["debug off", current], ["no logging", nolog]]:
+                times = bench(pyiCalendar, sICalendar, args.repeat)
+                if results[build] is not None:
+                    times = [min(old, new) for (old, new) in zip(results[build], times)]
+                results[build] = times
+    print("%d events, best of %d" % (args.n_events, args.repeat))
+    print("%-12s %12s %12s" % ("build", "parse (s)", "expand (s)"))
+    for build, [parse_time, expand_time] in results.items():
+        print("%-12s %12.4f %12.4f" % (build, parse_time, expand_time))
+    [parse_off, expand_off] = results["debug off"]
+    [parse_nolog, expand_nolog] = results["no logging"]
+    print("overhead of disabled logging: parse %+.1f%%, expand %+.1f%%"
+          % (100*(parse_off/parse_nolog-1), 100*(expand_off/expand_nolog-1)))
@@ -0,0 +1,45 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of the RRULE expansion backends over a multi-decade window: get_event_instances with date objects
+("objects") and day ordinals ("ordinals"), and get_event_ordinals which returns compact arrays.
+
+Usage::
+
+    python bench_ordinals.py [-n 40] [-y 30] [-r 3]
+'''
+import argparse
+from datetime import datetime
+
+from bench_utils import load_package, best_of
+from synthetic_ics import synthetic_calendar
+
+RRULES = ["FREQ=DAILY",
+          "FREQ=DAILY;INTERVAL=3",
+          "FREQ=WEEKLY;BYDAY=MO,WE,FR",
+          "FREQ=WEEKLY;INTERVAL=2;WKST=SU;BYDAY=TU,TH",
+          "FREQ=MONTHLY;BYMONTHDAY=1,15,-1",
+          "FREQ=MONTHLY;BYDAY=MO,TU,WE,TH,FR;BYSETPOS=-1"]
+""" rules of the DAILY, WEEKLY and MONTHLY cases handled by the ordinals backend """
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RRULE expansion backends")
+    parser.add_argument("-n", dest="n_events", type=int, default=40, help="number of VEVENT")
+    parser.add_argument("-y", dest="years", type=int, default=30, help="years of the window")
+    parser.add_argument("-r", dest="repeat", type=int, default=3, help="repeats (best time is kept)")
+    args = parser.parse_args()
+    pyiCalendar = load_package()
+    mycal = pyiCalendar.iCalendar()
+    mycal.string_load(synthetic_calendar(n_events=args.n_events, rrules=RRULES, dtstart=datetime(2000,1,1,9)))
+    mycal.parse_loaded()
+    window = ["20000101", "%04d1231" % (2000+args.years-1)]
+    occurrences = sum(len(event.ordinals) for event in mycal.get_event_ordinals(*window))
+    results = []
+    for backend in ["objects", "ordinals"]:
+        mycal.rrule_backend = backend
+        results.append(["get_event_instances (%s)" % backend,
+                        best_of(lambda: mycal.get_event_instances(*window), args.repeat)])
+    results.append(["get_event_ordinals", best_of(lambda: mycal.get_event_ordinals(*window), args.repeat)])
+    print("%d events, %d occurrences over %d years, best of %d" % (args.n_events, occurrences, args.years, args.repeat))
+    print("%-34s %12s %16s" % ("enumeration", "time (s)", "occurrences/s"))
+    for [name, elapsed] in results:
+        print("%-34s %12.4f %16.0f" % (name, elapsed, occurrences/elapsed))
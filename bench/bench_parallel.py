@@ -0,0 +1,56 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of the parallel parsing of one large iCalendar file: local_load + parse_loaded against
+local_load_parallel for an increasing number of worker processes (wall time, the work being done by the
+workers), with a check that the events and non-conformances are the same.
+
+The workers import pyICSParser: on platforms which spawn processes (Windows, macOS) the package needs to be
+installed, with fork (Linux) the sources of this tree are used.
+
+Usage::
+
+    python bench_parallel.py [-n 50000] [-c 1048576]
+'''
+import argparse
+import os
+import tempfile
+import time
+from os.path import join
+
+from bench_utils import load_package
+from synthetic_ics import write_calendar
+
+def wall_time(func):
+    """ returns the wall time in seconds of one call to func and its result """
+    start = time.perf_counter()
+    result = func()
+    return [time.perf_counter()-start, result]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="parallel parsing of one file")
+    parser.add_argument("-n", dest="n_events", type=int, default=50000, help="number of VEVENT")
+    parser.add_argument("-c", dest="chunk_size", type=int, default=None, help="minimum chunk size in octets")
+    args = parser.parse_args()
+    pyiCalendar = load_package()
+    cores = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        ics_path = join(tmp, "large.ics")
+        write_calendar(ics_path, n_events=args.n_events, n_attendees=3, description_octets=200)
+        def serial():
+            mycal = pyiCalendar.iCalendar()
+            mycal.local_load(ics_path)
+            mycal.parse_loaded()
+            return mycal
+        print("%d events (%.1f MiB), %d cores" % (args.n_events, os.path.getsize(ics_path)/1024.0/1024.0, cores))
+        print("%-28s %10s %8s" % ("", "time (s)", "same"))
+        [elapsed, reference] = wall_time(serial)
+        print("%-28s %10.3f %8s" % ("local_load + parse_loaded", elapsed, ""))
+        workers = 1
+        while workers <= 2*cores:
+            mycal = pyiCalendar.iCalendar()
+            [elapsed, parallel] = wall_time(lambda: mycal.local_load_parallel(ics_path, workers=workers,
+                                                                              chunk_size=args.chunk_size))
+            same = parallel and len(mycal.events)==len(reference.events) and mycal.lSCM==reference.lSCM \
+                and mycal.dSCM==reference.dSCM and mycal.event_fingerprints==reference.event_fingerprints
+            print("%-28s %10.3f %8s" % ("local_load_parallel (%d)" % workers, elapsed, same))
+            workers *= 2
@@ -0,0 +1,46 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of parse_loaded on calendars with very wide VEVENT (many ATTENDEE lines and a long folded
+DESCRIPTION): the time per content line should stay flat when the VEVENT width grows.
+
+Usage::
+
+    python bench_parse.py [-n 5] [-r 3] [--ref path/to/other/src]
+'''
+import argparse
+
+from bench_utils import load_package, best_of
+from synthetic_ics import synthetic_calendar
+
+WIDTHS = [100, 400, 1600, 6400]
+""" ATTENDEE lines per VEVENT """
+
+def bench(pyiCalendar, sICalendar, repeat):
+    """ returns [best parse_loaded time in seconds, number of content lines] """
+    def load():
+        mycal = pyiCalendar.iCalendar()
+        mycal.string_load(sICalendar)
+        return mycal
+    def parse():
+        load().parse_loaded()
+    nb_lines = len(load().sVCALENDAR)
+    #string_load is timed separately so that only parse_loaded is reported
+    return [best_of(parse, repeat)-best_of(load, repeat), nb_lines]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="parse_loaded on wide VEVENT")
+    parser.add_argument("-n", dest="n_events", type=int, default=5, help="number of VEVENT")
+    parser.add_argument("-r", dest="repeat", type=int, default=3, help="repeats (best time is kept)")
+    parser.add_argument("--ref", dest="ref", type=str, default="",
+                        help="folder with the sources of another build to compare with (e.g. a checkout of a previous release)")
+    args = parser.parse_args()
+    builds = [["current", load_package()]]
+    if args.ref:
+        builds.append(["reference", load_package("pyICSParser_ref", args.ref)])
+    print("%d events per calendar, best of %d" % (args.n_events, args.repeat))
+    print("%-10s %10s %10s %12s %14s" % ("build", "attendees", "lines", "parse (s)", "us per line"))
+    for width in WIDTHS:
+        sICalendar = synthetic_calendar(n_events=args.n_events, n_attendees=width, description_octets=20*width)
+        for [build, pyiCalendar] in builds:
+            [parse_time, nb_lines] = bench(pyiCalendar, sICalendar, args.repeat)
+            print("%-10s %10d %10d %12.4f %14.2f" % (build, width, nb_lines, parse_time, 1e6*parse_time/nb_lines))
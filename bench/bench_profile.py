@@ -0,0 +1,39 @@
+# -*- coding:utf-8 -*-
+'''
+Overhead of the profiling hooks: load + parse + enumeration of a synthetic calendar without hook (the
+default), with a ProfileHook doing nothing and with a ParserStats, and the ParserStats report.
+
+Usage::
+
+    python bench_profile.py [-n 500] [-r 5]
+'''
+import argparse
+import importlib
+
+from bench_utils import load_package, best_of
+from synthetic_ics import synthetic_calendar
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="profiling hooks overhead")
+    parser.add_argument("-n", dest="n_events", type=int, default=500, help="number of VEVENT")
+    parser.add_argument("-r", dest="repeat", type=int, default=5, help="repeats (best time is kept)")
+    args = parser.parse_args()
+    pyiCalendar = load_package()
+    profiling = importlib.import_module("pyICSParser.profiling")
+    sICalendar = synthetic_calendar(n_events=args.n_events)
+    def run(hook):
+        mycal = pyiCalendar.iCalendar()
+        mycal.set_profile(hook)
+        mycal.string_load(sICalendar)
+        mycal.parse_loaded()
+        mycal.get_event_instances("20240101", "20241231")
+    stats = profiling.ParserStats()
+    results = [["no hook", best_of(lambda: run(None), args.repeat)],
+               ["ProfileHook", best_of(lambda: run(profiling.ProfileHook()), args.repeat)],
+               ["ParserStats", best_of(lambda: run(stats), args.repeat)]]
+    print("%d events, best of %d" % (args.n_events, args.repeat))
+    for [name, elapsed] in results:
+        print("%-14s %10.4f s %+8.1f %%" % (name, elapsed, 100.0*(elapsed/results[0][1]-1)))
+    stats.reset()
+    run(stats)
+    print(stats.report())
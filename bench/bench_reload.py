@@ -0,0 +1,45 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of the incremental reload of a feed of which a few VEVENT changed: string_load + parse_loaded of
+the new feed against strings_reload reusing the unchanged events of the previous load.
+
+Usage::
+
+    python bench_reload.py [-n 5000] [-c 10] [-r 3]
+'''
+import argparse
+import time
+
+from bench_utils import load_package, best_of
+from synthetic_ics import synthetic_calendar
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="incremental reload of a feed")
+    parser.add_argument("-n", dest="n_events", type=int, default=5000, help="number of VEVENT")
+    parser.add_argument("-c", dest="changed", type=int, default=10, help="number of VEVENT changed in the new feed")
+    parser.add_argument("-r", dest="repeat", type=int, default=3, help="repeats (best time is kept)")
+    args = parser.parse_args()
+    pyiCalendar = load_package()
+    feed = synthetic_calendar(n_events=args.n_events, n_attendees=5, description_octets=300)
+    new_feed = feed
+    for index in range(args.changed):
+        new_feed = new_feed.replace("SUMMARY:synthetic event %d\n" % index, "SUMMARY:changed event %d\n" % index)
+    new_lines = new_feed.split("\n")
+    def full():
+        mycal = pyiCalendar.iCalendar()
+        mycal.string_load(new_feed)
+        mycal.parse_loaded()
+    def reload():
+        """ returns the CPU time of strings_reload (the previous feed being loaded first) and the CalendarDiff """
+        mycal = pyiCalendar.iCalendar()
+        mycal.string_load(feed)
+        mycal.parse_loaded()
+        start = time.process_time()
+        diff = mycal.strings_reload(new_lines)
+        return [time.process_time()-start, diff]
+    diff = reload()[1]
+    results = [["full load", best_of(full, args.repeat)],
+               ["strings_reload", min(reload()[0] for _ in range(args.repeat))]]
+    print("%d events, %d modified, best of %d" % (args.n_events, len(diff.modified), args.repeat))
+    for [name, elapsed] in results:
+        print("%-28s %10.4f s" % (name, elapsed))
@@ -0,0 +1,44 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of the snapshots: local_load + parse_loaded of an iCalendar file against load_snapshot of the
+snapshot written from it, with the sizes of both files.
+
+Usage::
+
+    python bench_snapshot.py [-n 5000] [-r 3]
+'''
+import argparse
+import os
+import tempfile
+
+from bench_utils import load_package, best_of
+from synthetic_ics import synthetic_calendar
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="snapshot against parsing")
+    parser.add_argument("-n", dest="n_events", type=int, default=5000, help="number of VEVENT")
+    parser.add_argument("-r", dest="repeat", type=int, default=3, help="repeats (best time is kept)")
+    args = parser.parse_args()
+    pyiCalendar = load_package()
+    folder = tempfile.mkdtemp()
+    ics_path = os.path.join(folder, "bench.ics")
+    snapshot_path = os.path.join(folder, "bench.snapshot")
+    with open(ics_path, "w", encoding="utf-8") as fics:
+        fics.write(synthetic_calendar(n_events=args.n_events, n_attendees=3, description_octets=200))
+    def parse():
+        mycal = pyiCalendar.iCalendar()
+        mycal.local_load(ics_path)
+        mycal.parse_loaded()
+        return mycal
+    def load():
+        mycal = pyiCalendar.iCalendar()
+        if not mycal.load_snapshot(snapshot_path, ics_path):
+            raise Exception("snapshot ignored")
+    parse().save_snapshot(snapshot_path, ics_path)
+    print("%d events, best of %d" % (args.n_events, args.repeat))
+    print("%-28s %10s %12s" % ("", "time (s)", "size (KiB)"))
+    print("%-28s %10.4f %12.0f" % ("local_load + parse_loaded", best_of(parse, args.repeat), os.path.getsize(ics_path)/1024.0))
+    print("%-28s %10.4f %12.0f" % ("load_snapshot", best_of(load, args.repeat), os.path.getsize(snapshot_path)/1024.0))
+    os.remove(ics_path)
+    os.remove(snapshot_path)
+    os.rmdir(folder)
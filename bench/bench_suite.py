@@ -0,0 +1,150 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark suite of the parser, validator, enumerator and generator on synthetic calendars
+
+Each scenario (many events, wide events, heavy EXDATE lists, long-lived RRULEs, big DESCRIPTIONs) is written
+to a file and local_load, parse_loaded, get_event_instances and Gen_iCalendar are timed separately (best CPU
+time of the repeats, reported as ops/s) and their peak memory measured with tracemalloc (in a separate run,
+as tracing slows the code down a lot, --no-memory skips it).
+
+The results can be saved as a baseline (--save) and compared with a stored baseline (--baseline, by default
+baseline.json next to this script when it exists): phases slower than the baseline by more than the tolerance
+are reported as regressions and the exit status is 1. Timings depend on the machine, save a baseline on the
+machine used for the comparisons.
+
+Usage::
+
+    python bench_suite.py [-s 1.0] [-r 5] [--save baseline.json] [--baseline baseline.json] [-t 1.5] [--no-memory]
+'''
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from os.path import abspath, exists, join, pardir
+
+from bench_utils import load_package
+from synthetic_ics import synthetic_events, write_calendar
+
+BASELINE_PATH = abspath(join(__file__, pardir, "baseline.json"))
+
+PHASES = ["local_load", "parse_loaded", "get_event_instances", "Gen_iCalendar"]
+
+LONG_RRULES = ["FREQ=DAILY",
+               "FREQ=WEEKLY;BYDAY=MO,WE,FR",
+               "FREQ=YEARLY;BYMONTH=3,9;BYDAY=2TU"]
+""" open-ended rules enumerated over several decades """
+
+def scenarios(scale=1.0):
+    """ returns the benchmark scenarios: name -> [synthetic_calendar arguments, occurrences window] """
+    def size(value):
+        return max(1, int(value*scale))
+    return {"events": [dict(n_events=size(500)), ["20240101", "20241231"]],
+            "wide": [dict(n_events=size(50), n_attendees=200), ["20240101", "20241231"]],
+            "exdates": [dict(n_events=size(50), n_exdates=300), ["20240101", "20241231"]],
+            "long_rrules": [dict(n_events=size(12), rrules=LONG_RRULES, dtstart=datetime(1990,1,1,9)),
+                            ["19900101", "20301231"]],
+            "descriptions": [dict(n_events=size(100), description_octets=8000), ["20240101", "20241231"]]}
+
+def run_phases(pyiCalendar, ics_fp, calendar_args, window, measure):
+    """ runs the phases once on the calendar file, measure(phase, func) runs func and returns its measure
+    Returns:
+    --------
+    measures: dict
+        phase -> measure
+    """
+    events = synthetic_events(**calendar_args)
+    mycal = pyiCalendar.iCalendar()
+    generator = pyiCalendar.iCalendar()
+    generator.events = events
+    phases = {"local_load": lambda: mycal.local_load(ics_fp),
+              "parse_loaded": mycal.parse_loaded,
+              "get_event_instances": lambda: mycal.get_event_instances(*window),
+              "Gen_iCalendar": generator.Gen_iCalendar}
+    return dict((phase, measure(phase, phases[phase])) for phase in PHASES)
+
+def cpu_time(phase, func):
+    """ returns the CPU time of func() in seconds """
+    start = time.process_time()
+    func()
+    return time.process_time()-start
+
+def peak_memory(phase, func):
+    """ returns the peak of memory allocated while running func() in KiB (tracemalloc must be started) """
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    func()
+    return (tracemalloc.get_traced_memory()[1]-before)/1024.0
+
+def bench(pyiCalendar, scale, repeat, memory=True):
+    """ returns {scenario: {phase: {"seconds", "ops_per_sec", "peak_kib"}}}, peak_kib is None when memory is False """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for [name, [calendar_args, window]] in scenarios(scale).items():
+            ics_fp = join(tmp, name+".ics")
+            write_calendar(ics_fp, **calendar_args)
+            best = {}
+            for _ in range(repeat):
+                for [phase, seconds] in run_phases(pyiCalendar, ics_fp, calendar_args, window, cpu_time).items():
+                    best[phase] = min(seconds, best.get(phase, seconds))
+            peaks = dict((phase, None) for phase in PHASES)
+            if memory:
+                tracemalloc.start()
+                peaks = run_phases(pyiCalendar, ics_fp, calendar_args, window, peak_memory)
+                tracemalloc.stop()
+            results[name] = dict((phase, {"seconds": best[phase],
+                                          "ops_per_sec": 1.0/best[phase] if best[phase]>0 else float("inf"),
+                                          "peak_kib": peaks[phase]}) for phase in PHASES)
+    return results
+
+def compare(results, baseline, tolerance):
+    """ prints the results next to the baseline and returns the list of [scenario, phase] slower than
+    tolerance times the baseline """
+    regressions = []
+    print("%-14s %-20s %10s %12s %12s %9s" % ("scenario", "phase", "ops/s", "peak (KiB)", "baseline", "ratio"))
+    for [name, phases] in results.items():
+        for [phase, result] in phases.items():
+            reference = baseline.get(name, {}).get(phase) if baseline else None
+            peak = "%12.0f" % result["peak_kib"] if result["peak_kib"] is not None else "%12s" % "-"
+            line = "%-14s %-20s %10.2f %s" % (name, phase, result["ops_per_sec"], peak)
+            if reference:
+                ratio = result["seconds"]/reference["seconds"] if reference["seconds"]>0 else 1.0
+                line += " %12.2f %8.2fx" % (reference["ops_per_sec"], ratio)
+                if ratio > tolerance:
+                    line += " REGRESSION"
+                    regressions.append([name, phase])
+            print(line)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="parse, validate, expand and generate benchmark suite")
+    parser.add_argument("-s", dest="scale", type=float, default=1.0, help="scale of the number of events")
+    parser.add_argument("-r", dest="repeat", type=int, default=5, help="repeats (best time is kept)")
+    parser.add_argument("--save", dest="save", type=str, default="", help="file where the results are saved as baseline")
+    parser.add_argument("--baseline", dest="baseline", type=str, default=BASELINE_PATH if exists(BASELINE_PATH) else "",
+                        help="baseline file the results are compared with")
+    parser.add_argument("-t", dest="tolerance", type=float, default=1.5, help="time ratio reported as a regression")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="do not measure the peak memory")
+    parser.add_argument("--src", dest="src", type=str, default="", help="folder with the sources of another build")
+    args = parser.parse_args()
+    pyiCalendar = load_package("pyICSParser_src", args.src) if args.src else load_package()
+    results = bench(pyiCalendar, args.scale, args.repeat, args.memory)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fbaseline:
+            stored = json.load(fbaseline)
+        if stored["scale"] != args.scale:
+            print("baseline %s was made with scale %s, not compared" % (args.baseline, stored["scale"]))
+        else:
+            baseline = stored["results"]
+            print("baseline: %s (%s, Python %s)" % (args.baseline, stored["machine"], stored["python"]))
+    regressions = compare(results, baseline, args.tolerance)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fsave:
+            json.dump({"scale": args.scale, "repeat": args.repeat, "machine": platform.platform(),
+                       "python": platform.python_version(), "results": results}, fsave, indent=1, sort_keys=True)
+        print("results saved as baseline in %s" % args.save)
+    sys.exit(1 if len(regressions)>0 else 0)
@@ -0,0 +1,43 @@
+# -*- coding:utf-8 -*-
+'''
+Helpers shared by the benchmarks: import of pyICSParser from the source tree (no install needed)
+and timing of a callable.
+'''
+import importlib
+import importlib.util
+import sys
+import time
+from os.path import abspath, join, pardir
+
+SRC_PATH = abspath(join(__file__, pardir, pardir, "src"))
+
+def load_package(name="pyICSParser", src_path=SRC_PATH):
+    """ imports the package found in src_path under the name name and returns its pyiCalendar module
+    Parameters:
+    -----------
+    name: str
+        name under which the package is imported (use another name to load a second build side by side)
+    src_path: str
+        folder holding the package sources (__init__.py, pyiCalendar.py, ...)
+    Returns:
+    --------
+    pyiCalendar: module
+    """
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, join(src_path, "__init__.py"),
+                                                      submodule_search_locations=[src_path])
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[name] = package
+        spec.loader.exec_module(package)
+    return importlib.import_module(name+".pyiCalendar")
+
+def best_of(func, repeat=5):
+    """ returns the best CPU time in seconds of repeat calls to func """
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        elapsed = time.process_time()-start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
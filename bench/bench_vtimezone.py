@@ -0,0 +1,78 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of the VTIMEZONE support: a calendar whose events all have DTSTART;TZID=America/New_York, loaded and
+enumerated with its VTIMEZONE (one transition table built, RRULE expanded in local time) and without it (UTC
+offset 0), and the cost of one utcoffset lookup in the transition table.
+
+Usage::
+
+    python bench_vtimezone.py [-n 2000] [-r 3]
+'''
+import argparse
+import importlib
+import re
+import time
+from datetime import datetime, timedelta
+
+from bench_utils import load_package, best_of
+from synthetic_ics import synthetic_calendar
+
+VTIMEZONE = """BEGIN:VTIMEZONE
+TZID:America/New_York
+BEGIN:DAYLIGHT
+TZOFFSETFROM:-0500
+TZOFFSETTO:-0400
+DTSTART:20070311T020000
+RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=2SU
+TZNAME:EDT
+END:DAYLIGHT
+BEGIN:STANDARD
+TZOFFSETFROM:-0400
+TZOFFSETTO:-0500
+DTSTART:20071104T020000
+RRULE:FREQ=YEARLY;BYMONTH=11;BYDAY=1SU
+TZNAME:EST
+END:STANDARD
+END:VTIMEZONE
+"""
+""" VTIMEZONE of America/New_York since 2007 """
+
+def zoned_calendar(n_events, vtimezone=True):
+    """ returns the synthetic calendar with the DTSTART and DTEND in America/New_York, with or without VTIMEZONE """
+    sICalendar = synthetic_calendar(n_events=n_events)
+    sICalendar = re.sub(r"^(DTSTART|DTEND):(\d{8}T\d{6})Z$", r"\1;TZID=America/New_York:\2", sICalendar, flags=re.M)
+    if vtimezone:
+        sICalendar = sICalendar.replace("BEGIN:VEVENT\n", VTIMEZONE+"BEGIN:VEVENT\n", 1)
+    return sICalendar
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="VTIMEZONE transition tables")
+    parser.add_argument("-n", dest="n_events", type=int, default=2000, help="number of VEVENT")
+    parser.add_argument("-r", dest="repeat", type=int, default=3, help="repeats (best time is kept)")
+    args = parser.parse_args()
+    pyiCalendar = load_package()
+    profiling = importlib.import_module("pyICSParser.profiling")
+    print("%d events, best of %d" % (args.n_events, args.repeat))
+    print("%-20s %10s %10s %12s %10s" % ("calendar", "load (s)", "enum (s)", "instances", "tables"))
+    for [name, vtimezone] in [["without VTIMEZONE", False], ["with VTIMEZONE", True]]:
+        sICalendar = zoned_calendar(args.n_events, vtimezone)
+        stats = profiling.ParserStats()
+        mycal = pyiCalendar.iCalendar()
+        mycal.set_profile(stats)
+        def load():
+            mycal.string_load(sICalendar)
+            mycal.parse_loaded()
+        load_time = best_of(load, args.repeat)
+        instances = []
+        def enumerate_year():
+            instances[:] = mycal.get_event_instances("20240101", "20241231")
+        enum_time = best_of(enumerate_year, args.repeat)
+        print("%-20s %10.4f %10.4f %12d %10d" % (name, load_time, enum_time, len(instances),
+                                                stats.counters.get("timezones", 0)//args.repeat))
+    table = mycal.vevent._tzinfos["America/New_York"].table
+    local_dates = [datetime(2024, 1, 1, 9)+timedelta(hours=7*index) for index in range(100000)]
+    start = time.process_time()
+    for local_date in local_dates:
+        table.utcoffset(local_date)
+    print("utcoffset lookup: %.2f us (%d transitions)" % ((time.process_time()-start)*1e6/len(local_dates),
+                                                         len(table.transitions)-1))
@@ -0,0 +1,54 @@
+# -*- coding:utf-8 -*-
+'''
+Benchmark of the calendar generation: Gen_iCalendar (whole calendar returned as a string) against
+write_iCalendar streaming the folded lines in chunks to a file, time and peak memory (tracemalloc).
+--src compares with Gen_iCalendar of another build.
+
+Usage::
+
+    python bench_writer.py [-n 20000] [-d 300] [-r 3] [--src ../old/src]
+'''
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+from bench_utils import load_package, best_of
+from synthetic_ics import synthetic_events
+
+def peak(func):
+    """ returns the peak of memory allocated while running func() in KiB """
+    tracemalloc.start()
+    func()
+    ret_val = tracemalloc.get_traced_memory()[1]/1024.0
+    tracemalloc.stop()
+    return ret_val
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="calendar generation: string against streaming writer")
+    parser.add_argument("-n", dest="n_events", type=int, default=20000, help="number of VEVENT")
+    parser.add_argument("-d", dest="description_octets", type=int, default=300, help="DESCRIPTION size per VEVENT")
+    parser.add_argument("-r", dest="repeat", type=int, default=3, help="repeats (best time is kept)")
+    parser.add_argument("--src", dest="src", type=str, default="", help="folder with the sources of another build")
+    args = parser.parse_args()
+    pyiCalendar = load_package()
+    events = synthetic_events(n_events=args.n_events, description_octets=args.description_octets)
+    mycal = pyiCalendar.iCalendar()
+    mycal.events = events
+    builds = [["Gen_iCalendar", mycal]]
+    if args.src:
+        other = load_package("pyICSParser_src", args.src).iCalendar()
+        other.events = events
+        builds.append(["Gen_iCalendar (%s)" % args.src, other])
+    with tempfile.TemporaryDirectory() as tmp:
+        ics_fp = os.path.join(tmp, "feed.ics")
+        def stream():
+            with open(ics_fp, "w", encoding="utf-8", newline="") as fout:
+                mycal.write_iCalendar(fout)
+        results = [[name, best_of(cal.Gen_iCalendar, args.repeat), peak(cal.Gen_iCalendar)] for [name, cal] in builds]
+        results.append(["write_iCalendar (file)", best_of(stream, args.repeat), peak(stream)])
+        size = os.path.getsize(ics_fp)
+    print("%d events, %.1f MiB, best of %d" % (args.n_events, size/1048576.0, args.repeat))
+    print("%-40s %10s %14s" % ("generation", "time (s)", "peak (KiB)"))
+    for [name, elapsed, peak_kib] in results:
+        print("%-40s %10.4f %14.0f" % (name, elapsed, peak_kib))
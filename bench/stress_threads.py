@@ -0,0 +1,58 @@
+# -*- coding:utf-8 -*-
+'''
+Stress check of the thread safety of separate iCalendar objects: the calendars of test/examples/inputs are
+validated and enumerated serially, then many times across a ThreadPoolExecutor, and every report must match
+the serial one.
+
+Usage::
+
+    python stress_threads.py [-w 8] [-n 20]
+'''
+import argparse
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+from os.path import abspath, join, pardir
+
+from bench_utils import load_package
+
+ICS_PATH = abspath(join(__file__, pardir, pardir, "test", "examples", "inputs"))
+
+def report(pyiCalendar, ics_fp):
+    """ returns the non-conformance report and the instances of an iCalendar file as a string """
+    mycal = pyiCalendar.iCalendar()
+    try:
+        mycal.local_load(ics_fp)
+        mycal.parse_loaded()
+        ret_val = [sorted(mycal.lSCM), sorted(mycal.vevent.lSCM),
+                   sorted((str(line), sorted(codes)) for (line, codes) in mycal.dSCM.items()),
+                   len(mycal.events)]
+        try:
+            ret_val.append(mycal.get_event_instances("20000101", "20301231"))
+        except Exception as ex:
+            ret_val.append(repr(ex))
+    except Exception as ex:
+        ret_val = [repr(ex)]
+    #UID added by the parser and tzinfo object ids differ from one run to another
+    ret_val = re.sub(r"[0-9a-f-]{36}@pyICSPARSER", "UUID", str(ret_val))
+    return re.sub(r" at 0x[0-9a-f]+", "", ret_val)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="iCalendar objects used from a thread pool")
+    parser.add_argument("-w", dest="workers", type=int, default=8, help="threads of the pool")
+    parser.add_argument("-n", dest="rounds", type=int, default=20, help="times each file is validated by the pool")
+    args = parser.parse_args()
+    pyiCalendar = load_package()
+    files = sorted(glob(join(ICS_PATH, "**", "*.ics"), recursive=True))
+    serial = dict((ics_fp, report(pyiCalendar, ics_fp)) for ics_fp in files)
+    #switch threads as often as possible to interleave the parsers
+    sys.setswitchinterval(1e-6)
+    jobs = files*args.rounds
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda ics_fp: report(pyiCalendar, ics_fp), jobs))
+    mismatches = [ics_fp for (ics_fp, result) in zip(jobs, results) if result != serial[ics_fp]]
+    print("%d files, %d reports on %d threads, %d mismatches" % (len(files), len(jobs), args.workers, len(mismatches)))
+    for ics_fp in sorted(set(mismatches)):
+        print("report differs from serial run: %s" % ics_fp)
+    sys.exit(1 if len(mismatches)>0 else 0)
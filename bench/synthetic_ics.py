@@ -0,0 +1,115 @@
+# -*- coding:utf-8 -*-
+'''
+Generator of synthetic iCalendar files for the benchmarks
+
+Usage::
+
+    python synthetic_ics.py -n 10000 -a 200 -o wide.ics
+'''
+import argparse
+from datetime import datetime, timedelta
+
+RRULES = ["FREQ=DAILY;COUNT=30",
+          "FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=60",
+          "FREQ=MONTHLY;BYMONTHDAY=1,15",
+          "FREQ=YEARLY;BYMONTH=3,9;BYDAY=2TU",
+          ""]
+""" recurrence rules given in turn to the events, empty string for a single occurrence event """
+
+def fold(line):
+    """ folds a content line (RFC5545 §3.1) in lines of at most 75 octets, returned with their line break """
+    ret_val = ""
+    first = True
+    while True:
+        size = 75 if first else 74
+        chunk = line[:size]
+        line = line[size:]
+        ret_val += ("" if first else " ")+chunk+"\n"
+        first = False
+        if len(line)==0:
+            return ret_val
+
+def synthetic_calendar(n_events=1000, n_attendees=0, description_octets=0, rrules=RRULES,
+                       dtstart=datetime(2024,1,1,9), n_exdates=0):
+    """ returns an iCalendar as a string
+    Parameters:
+    -----------
+    n_events: int
+        number of VEVENT
+    n_attendees: int
+        number of ATTENDEE lines per VEVENT (wide VEVENT)
+    description_octets: int
+        size of the DESCRIPTION of each VEVENT (folded), 0 for no DESCRIPTION
+    rrules: list
+        RRULE values given in turn to the events (empty string for no RRULE)
+    dtstart: datetime
+        DTSTART of the first event, the following start one hour and one day later each
+    n_exdates: int
+        number of EXDATE values, every other day, (one folded EXDATE line) per VEVENT
+    Returns:
+    --------
+    sICalendar: str
+    """
+    lines = ["BEGIN:VCALENDAR\n", "VERSION:2.0\n", "PRODID:-//pyICSParser//bench//EN\n"]
+    for index in range(n_events):
+        start = dtstart+timedelta(days=index % 365, hours=index % 8)
+        lines.append("BEGIN:VEVENT\n")
+        lines.append("UID:%d@bench.pyicsparser\n" % index)
+        lines.append("DTSTAMP:20240101T000000Z\n")
+        lines.append("DTSTART:%s\n" % start.strftime("%Y%m%dT%H%M%SZ"))
+        lines.append("DTEND:%s\n" % (start+timedelta(hours=1)).strftime("%Y%m%dT%H%M%SZ"))
+        lines.append("SUMMARY:synthetic event %d\n" % index)
+        if len(rrules)>0 and rrules[index % len(rrules)]:
+            lines.append("RRULE:%s\n" % rrules[index % len(rrules)])
+        for attendee in range(n_attendees):
+            lines.append(fold("ATTENDEE;CN=Attendee %d;ROLE=REQ-PARTICIPANT:mailto:attendee%d@bench.pyicsparser"
+                              % (attendee, attendee)))
+        if n_exdates>0:
+            exdates = [(start+timedelta(days=2*day)).strftime("%Y%m%dT%H%M%SZ") for day in range(n_exdates)]
+            lines.append(fold("EXDATE:"+",".join(exdates)))
+        if description_octets>0:
+            lines.append(fold("DESCRIPTION:"+("lorem ipsum "*(description_octets//12+1))[:description_octets]))
+        lines.append("END:VEVENT\n")
+    lines.append("END:VCALENDAR\n")
+    return "".join(lines)
+
+def synthetic_events(n_events=1000, n_attendees=0, description_octets=0, rrules=RRULES,
+                     dtstart=datetime(2024,1,1,9), n_exdates=0):
+    """ returns the events of synthetic_calendar as the list of dictionaries {property: {"param": "", "val": value}}
+    taken by iCalendar.Gen_iCalendar, ATTENDEE being a list of n_attendees of them (written without parameters) """
+    events = []
+    for index in range(n_events):
+        start = dtstart+timedelta(days=index % 365, hours=index % 8)
+        event = {"UID": "%d@bench.pyicsparser" % index,
+                 "DTSTAMP": datetime(2024,1,1),
+                 "DTSTART": start,
+                 "DTEND": start+timedelta(hours=1),
+                 "SUMMARY": "synthetic event %d" % index}
+        if len(rrules)>0 and rrules[index % len(rrules)]:
+            event["RRULE"] = rrules[index % len(rrules)]
+        if n_exdates>0:
+            event["EXDATE"] = [start+timedelta(days=2*day) for day in range(n_exdates)]
+        if description_octets>0:
+            event["DESCRIPTION"] = ("lorem ipsum "*(description_octets//12+1))[:description_octets]
+        event = dict((prop, {"param": "", "val": value}) for (prop, value) in event.items())
+        if n_attendees>0:
+            event["ATTENDEE"] = [{"param": "", "val": "attendee%d@bench.pyicsparser" % attendee}
+                                 for attendee in range(n_attendees)]
+        events.append(event)
+    return events
+
+def write_calendar(path, **kwargs):
+    """ writes synthetic_calendar(**kwargs) to path """
+    with open(path, "w", encoding="utf-8") as fical:
+        fical.write(synthetic_calendar(**kwargs))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generates a synthetic iCalendar file")
+    parser.add_argument("-n", dest="n_events", type=int, default=1000, help="number of VEVENT")
+    parser.add_argument("-a", dest="n_attendees", type=int, default=0, help="ATTENDEE lines per VEVENT")
+    parser.add_argument("-d", dest="description_octets", type=int, default=0, help="DESCRIPTION size per VEVENT")
+    parser.add_argument("-x", dest="n_exdates", type=int, default=0, help="EXDATE values per VEVENT")
+    parser.add_argument("-o", dest="output", type=str, default="synthetic.ics", help="output file")
+    args = parser.parse_args()
+    write_calendar(args.output, n_events=args.n_events, n_attendees=args.n_attendees,
+                   description_octets=args.description_octets, n_exdates=args.n_exdates)
@@ -0,0 +1,163 @@
+# -*- coding:utf-8 -*-
+'''
+asyncio counterparts of the loading and enumeration of iCalendar, for services holding many calendars in one
+event loop
+
+load_stream reads the octets of a calendar from an asyncio stream (socket, pipe, ...) and unfolds and parses
+its lines as they arrive (see iCalendar.stream_load), get_event_instances enumerates the instances of a window
+event by event: both hand control back to the event loop at least every SLICE_SECONDS of work.
+get_event_instances can instead run the blocking enumeration in an executor (one enumeration of a calendar at
+a time, iCalendar objects are not shared between threads). ConcurrencyLimiter bounds the number of calendars
+loaded or enumerated at once in a batch: the coroutines running take turns, so the event loop can wait up to
+about limit x SLICE_SECONDS (plus the parsing or enumeration of one event each) between two of its callbacks.
+
+Usage::
+
+    from pyICSParser.async_calendar import load_stream, get_event_instances, load_streams
+    reader, writer = await asyncio.open_connection("localhost", 8080)
+    mycal = iCalendar()
+    await load_stream(mycal, reader)
+    instances = await get_event_instances(mycal, "20240101", "20241231")
+    calendars = await load_streams(readers, limit=16)
+
+or::
+
+    await mycal.load_stream(reader)
+    instances = await mycal.get_event_instances_async("20240101", "20241231")
+'''
+import asyncio
+import io
+from datetime import datetime, timedelta
+from functools import partial
+from time import perf_counter
+
+from .occurrence_index import Occurrence, OccurrenceIndex
+from .pyiCalendar import iCalendar
+
+SLICE_SECONDS = 0.005
+""" longest work (s) done before handing control back to the event loop """
+READ_SIZE = 64*1024
+""" octets read at once from a stream """
+DEFAULT_LIMIT = 8
+""" calendars loaded or enumerated at once by ConcurrencyLimiter """
+
+async def load_stream(mycal,reader,conformance=False,slice_seconds=SLICE_SECONDS):
+    """ loads and parses an iCalendar read from an asyncio stream, as local_load(stream=True)
+
+    The non-conformances (lSCM, dSCM) are reported in the order of stream_load: 3.4_1 and 3.4_2 first, where
+    strings_load reports them, although 3.4_2 is only checked once the stream is closed.
+    Parameters:
+    -----------
+    mycal: iCalendar
+    reader: asyncio.StreamReader
+        or any object whose coroutine read(n) returns octets (b"" at the end of the stream)
+    conformance: bool
+    slice_seconds: float
+        longest parsing done before handing control back to the event loop
+    Returns:
+    --------
+    mycal: the iCalendar loaded
+    """
+    if mycal.profile is not None:
+        start_time = perf_counter()
+    mycal.dSCM = {}
+    mycal.vevent.dSCM = {}
+    mycal.conformance = conformance
+    mycal.vevent.conformance = conformance
+    mycal._stream_start(conformance)
+    pending = b""
+    deadline = perf_counter()+slice_seconds
+    while True:
+        data = await reader.read(READ_SIZE)
+        if len(data)==0:
+            break
+        data = pending+data
+        end = data.rfind(b"\n")+1
+        pending = data[end:]
+        #whole lines only: a CRLF is never split and utf-8 sequences never span a line break
+        for line in io.StringIO(data[:end].decode("utf-8"),newline=None).readlines():
+            mycal._stream_feed(line)
+            if perf_counter()>=deadline:
+                await asyncio.sleep(0)
+                deadline = perf_counter()+slice_seconds
+    if len(pending)>0:
+        for line in io.StringIO(pending.decode("utf-8"),newline=None).readlines():
+            mycal._stream_feed(line)
+    mycal._stream_close()
+    if mycal.profile is not None:
+        mycal.profile.count("lines",mycal._physical_line_count)
+        mycal.profile.count("content_lines",mycal._content_line_count)
+        mycal.profile.phase("load_stream",perf_counter()-start_time)
+    return mycal
+
+async def get_event_instances(mycal,start,end,count=-1,index=False,executor=None,slice_seconds=SLICE_SECONDS):
+    """ returns the instances (date, summary, uid) of the window as iCalendar.get_event_instances
+    Parameters:
+    -----------
+    start: str
+        first day of the window (yyyymmdd)
+    end: str
+        last day of the window (yyyymmdd), included
+    index: bool
+        when True mycal.occurrence_index is (re)built with the occurrences of the window
+    executor: concurrent.futures.Executor or None
+        executor running get_event_instances, None to enumerate in the event loop, event by event
+    slice_seconds: float
+        longest enumeration done before handing control back to the event loop (without executor)
+    Returns:
+    --------
+    instances: list
+        mycal.events_instances
+    """
+    if executor is not None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor,partial(mycal.get_event_instances,start,end,count,index))
+    WindowStart = datetime.strptime(start,"%Y%m%d")
+    WindowEnd = datetime.strptime(end,"%Y%m%d")+timedelta(days =1)
+    mycal.OccurencesWindowStartDate = WindowStart
+    mycal.OccurencesWindowEndDate = WindowEnd
+    if mycal.ical_parsed == 0:
+        mycal.parse_loaded()
+    slot_dur = timedelta(days=1)
+    instances = []
+    occurrences = []
+    deadline = perf_counter()+slice_seconds
+    for cevent in list(mycal.compiled_events):
+        if perf_counter()>=deadline:
+            await asyncio.sleep(0)
+            deadline = perf_counter()+slice_seconds
+            #another enumeration of mycal may have run meanwhile
+            mycal.OccurencesWindowStartDate = WindowStart
+            mycal.OccurencesWindowEndDate = WindowEnd
+        event_occurrences = mycal._event_occurrences(cevent)
+        instances += mycal._slot_instances(cevent,event_occurrences,slot_dur)
+        if index:
+            occurrences += [Occurrence(t_start,t_end,cevent.summary,cevent.uid) for [t_start,t_end] in event_occurrences]
+    if index:
+        mycal.occurrence_index = OccurrenceIndex(occurrences)
+    mycal.events_instances = instances
+    mycal._sort_instances()
+    return mycal.events_instances
+
+class ConcurrencyLimiter:
+    """ bounds the number of coroutines (loads, enumerations, ...) running at once with an asyncio.Semaphore
+    Parameters:
+    -----------
+    limit: int
+        coroutines running at once, the others wait for one to finish
+    """
+    def __init__(self,limit=DEFAULT_LIMIT):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+    async def run(self,coroutine):
+        """ awaits coroutine once fewer than limit coroutines run and returns its result """
+        async with self._semaphore:
+            return await coroutine
+    async def gather(self,coroutines):
+        """ returns the results of the coroutines (in their order), at most limit running at once """
+        return await asyncio.gather(*[self.run(coroutine) for coroutine in coroutines])
+
+async def load_streams(readers,limit=DEFAULT_LIMIT,conformance=False):
+    """ returns one iCalendar loaded by load_stream per reader (in their order), at most limit at once """
+    limiter = ConcurrencyLimiter(limit)
+    return await limiter.gather([load_stream(iCalendar(),reader,conformance) for reader in readers])
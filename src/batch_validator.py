@@ -0,0 +1,87 @@
+# -*- coding:utf-8 -*-
+'''
+Batch validation of many iCalendar files over a pool of processes
+
+Usage::
+
+    from pyICSParser.batch_validator import validate_files
+    for record in validate_files(["feeds/"], workers=8, chunksize=32):
+        if not record.compliant:
+            print(record.path, record.lSCM)
+
+or from the command line::
+
+    python -m pyICSParser.pyiCalendar --batch feeds/ other.ics --workers 8 --chunksize 32
+'''
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from os import walk
+from os.path import isdir, join
+
+from .pyiCalendar import iCalendar
+
+ValidationRecord = namedtuple("ValidationRecord",["path","compliant","lSCM","dSCM","events","error"])
+""" picklable result of the validation of one file:
+path, compliant (True when no non-conformance was found), lSCM (tuple of SCM codes), dSCM (dict line: tuple
+of SCM codes), events (number of VEVENT loaded) and error (None, or the exception which stopped the parsing) """
+
+def ics_paths(paths):
+    """ returns the list of iCalendar files from a list of files and folders (searched recursively for .ics)
+    Parameters:
+    -----------
+    paths: str or list
+        file or folder path, or list of them
+    Returns:
+    --------
+    ics_fps: list
+        file paths, folders expanded in sorted order
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    ics_fps = []
+    for path in paths:
+        if isdir(path):
+            for (folder, folders, files) in sorted(walk(path)):
+                folders.sort()
+                ics_fps += [join(folder, name) for name in sorted(files) if name.lower().endswith(".ics")]
+        else:
+            ics_fps.append(path)
+    return ics_fps
+
+def validate_file(ics_fp):
+    """ loads and parses one iCalendar file (without console output) and returns its ValidationRecord """
+    mycal = iCalendar()
+    error = None
+    try:
+        mycal.local_load(ics_fp)
+        mycal.parse_loaded()
+    except Exception as ex:
+        error = repr(ex)
+    lSCM = tuple(mycal.lSCM)
+    dSCM = dict((line, tuple(codes)) for (line, codes) in mycal.dSCM.items())
+    compliant = error is None and len(mycal.lSCM)==0 and len(mycal.vevent.lSCM)==0
+    return ValidationRecord(ics_fp, compliant, lSCM, dSCM, len(mycal.events), error)
+
+def validate_files(paths, workers=None, chunksize=16):
+    """ validates iCalendar files over a ProcessPoolExecutor
+    Parameters:
+    -----------
+    paths: str or list
+        files and folders (see ics_paths)
+    workers: int, default None
+        number of worker processes, None for one per core, 1 to validate in the current process
+    chunksize: int, default 16
+        number of files sent to a worker at once
+    Returns:
+    --------
+    records: iterator
+        ValidationRecord of each file, in the order of ics_paths(paths)
+    """
+    ics_fps = ics_paths(paths)
+    if workers == 1:
+        for ics_fp in ics_fps:
+            yield validate_file(ics_fp)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for record in pool.map(validate_file, ics_fps, chunksize=chunksize):
+            yield record
@@ -0,0 +1,73 @@
+# -*- coding:utf-8 -*-
+'''
+Calendar arithmetic with precomputed per year tables (proleptic Gregorian calendar, years 1 to 9999):
+month lengths, day of year, weekday and week numbers in O(1) without building datetime objects and
+without depending on the locale (unlike strftime("%a")).
+'''
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+
+WEEKDAYS = ("MO","TU","WE","TH","FR","SA","SU")
+""" iCalendar weekdays, indexed by date.weekday() """
+
+_WKST_ORDER = ["TU","WE","TH","FR","SA","SU","MO"]
+WKST_SHIFT = dict((wkst, tuple((_WKST_ORDER.index(dow)>=_WKST_ORDER.index(wkst)) and (_WKST_ORDER.index(wkst)<_WKST_ORDER.index("MO"))
+                               and (_WKST_ORDER.index(dow)<_WKST_ORDER.index("MO")) for dow in WEEKDAYS))
+                  for wkst in WEEKDAYS)
+""" for each WKST, per weekday: True when the day is between WKST and monday and belongs to the previous week """
+
+YearTable = namedtuple("YearTable",["jan1_weekday","month_lengths","month_starts","iso_weeks"])
+""" jan1_weekday: weekday of January 1st (0 for monday), month_lengths: days per month (index 1 to 12),
+month_starts: days of the year before the 1st of each month (index 1 to 12, index 13 is the year length),
+iso_weeks: number of ISO8601 weeks (52 or 53) """
+
+@lru_cache(maxsize=None)
+def year_table(year):
+    """ returns the YearTable of year, computed once """
+    leap = (year % 4 == 0 and year % 100 != 0) or year % 400 == 0
+    month_lengths = (0,31,29 if leap else 28,31,30,31,30,31,31,30,31,30,31)
+    month_starts = [0,0]
+    for month in range(1,13):
+        month_starts.append(month_starts[-1]+month_lengths[month])
+    jan1_weekday = date(year,1,1).weekday()
+    #years starting on a thursday (or a wednesday for leap years) have 53 ISO weeks
+    iso_weeks = 53 if jan1_weekday == 3 or (leap and jan1_weekday == 2) else 52
+    return YearTable(jan1_weekday,month_lengths,tuple(month_starts),iso_weeks)
+
+def month_length(year,month):
+    """ returns the number of days of month, raises ValueError for an invalid year or month """
+    if not (1<=year<=9999 and 1<=month<=12):
+        raise ValueError("invalid year or month: %s %s"%(year,month))
+    return year_table(year).month_lengths[month]
+
+def day_of_year(year,month,day):
+    """ returns the day of the year (1 for January 1st) of a valid date """
+    return year_table(year).month_starts[month]+day
+
+def weekday(year,month,day):
+    """ returns the weekday (0 for monday) of a valid date """
+    return (year_table(year).jan1_weekday+year_table(year).month_starts[month]+day-1) % 7
+
+def ical_weekday(a_date):
+    """ returns the iCalendar weekday (MO, TU, ...) of a date or datetime """
+    return WEEKDAYS[a_date.weekday()]
+
+def week_number(year,month,day,wkst="MO"):
+    """ returns the ISO8601 week number of the date, minus one for the days between wkst and monday when
+    the week starts on wkst, 0 if the date or wkst is not valid """
+    if wkst not in WKST_SHIFT or not (1<=year<=9999 and 1<=month<=12):
+        return 0
+    table = year_table(year)
+    if not (1<=day<=table.month_lengths[month]):
+        return 0
+    doy = table.month_starts[month]+day
+    dow = (table.jan1_weekday+doy-1) % 7
+    week = (doy-dow+9)//7
+    if week < 1:
+        week = year_table(year-1).iso_weeks
+    elif week > table.iso_weeks:
+        week = 1
+    if WKST_SHIFT[wkst][dow]:
+        week -= 1
+    return week
@@ -0,0 +1,100 @@
+# -*- coding:utf-8 -*-
+'''
+Serialization of content lines: octet correct folding (RFC5545 §3.1) and a buffered writer that either
+accumulates the folded lines or streams them in chunks to a file or a socket, so that a generated calendar
+does not have to exist as one string.
+
+Usage::
+
+    from pyICSParser.calendar_writer import ContentLineWriter
+    with open("feed.ics", "w", encoding="utf-8", newline="") as fout:
+        mycal.write_iCalendar(fout)
+    with sock.makefile("wb") as fout:
+        mycal.write_iCalendar(fout)
+'''
+import io
+
+from .icalendar_SCM import CRLF
+
+LINE_OCTETS = 75
+""" maximum length of a line, excluding the line break (RFC5545 §3.1) """
+
+CHUNK_SIZE = 64*1024
+""" size from which the buffered lines are written to the stream """
+
+def fold_line(content_line,limit=LINE_OCTETS):
+    """ folds a content line in lines of at most limit octets once encoded in utf-8, the continuation lines
+    starting with a space, without splitting a multi-octet character
+    Parameters:
+    -----------
+    content_line: str
+        unfolded content line, without line break
+    limit: int
+        maximum number of octets per line, excluding the line break
+    Returns:
+    --------
+    folded: str
+        folded lines, each ending with CRLF
+    """
+    if content_line.isascii():
+        #one octet per character: slice the string itself
+        if len(content_line)<=limit:
+            return content_line+CRLF
+        chunks = [content_line[:limit]]+[content_line[start:start+limit-1] for start in range(limit,len(content_line),limit-1)]
+    else:
+        encoded = content_line.encode("utf-8")
+        chunks = []
+        start = 0
+        end = limit
+        while end<len(encoded):
+            #utf-8 continuation octets are 10xxxxxx: go back to the first octet of the character
+            while encoded[end] & 0xC0 == 0x80:
+                end -= 1
+            chunks.append(encoded[start:end].decode("utf-8"))
+            start = end
+            end = start+limit-1
+        chunks.append(encoded[start:].decode("utf-8"))
+    return (CRLF+" ").join(chunks)+CRLF
+
+class ContentLineWriter:
+    """ folds the content lines written and buffers them in an io.StringIO, the buffer is written to stream (when
+    given) each time it reaches chunk_size characters and when flush is called
+    Parameters:
+    -----------
+    stream: file-like object or None
+        object with a write method, text streams are given str and other streams (open(path,"wb"),
+        socket.makefile("wb"), ...) utf-8 encoded bytes; None to keep all the lines (see getvalue)
+        text files should be opened with newline="" so that the CRLF line breaks are not translated
+    chunk_size: int
+        number of characters buffered before a write to stream
+    binary: bool or None
+        forces the type given to stream.write (None: bytes unless stream is an io.TextIOBase)
+    """
+    def __init__(self,stream=None,chunk_size=CHUNK_SIZE,binary=None):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        if binary is None:
+            binary = stream is not None and not isinstance(stream,io.TextIOBase)
+        self.binary = binary
+        self._buffer = io.StringIO()
+        self._buffered = 0
+        self.written = 0
+        """ number of characters written to stream so far """
+    def write_line(self,content_line):
+        """ folds and buffers an unfolded content line (without line break) """
+        self._buffered += self._buffer.write(fold_line(content_line))
+        if self.stream is not None and self._buffered>=self.chunk_size:
+            self.flush()
+    def flush(self):
+        """ writes the buffered lines to stream """
+        if self.stream is None or self._buffered==0:
+            return
+        chunk = self._buffer.getvalue()
+        self.stream.write(chunk.encode("utf-8") if self.binary else chunk)
+        self.written += len(chunk)
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._buffered = 0
+    def getvalue(self):
+        """ returns the lines buffered (all the lines written when there is no stream) as one string """
+        return self._buffer.getvalue()
@@ -0,0 +1,99 @@
+# -*- coding:utf-8 -*-
+'''
+Memo of the occurrences of the events enumerated by iCalendar, keyed on the recurrence of the event (DTSTART,
+DTEND, RRULE, RDATE, EXDATE and RRULE backend) and the window, so that the popular events are not expanded
+again for each of the overlapping windows asked for (this week, this month, next 30 days, ...).
+
+The memory taken is capped by a number of occurrences kept, the least recently used windows being evicted
+first. The occurrences of a window are served from a cached window including it when the expansion does not
+depend on the window (told by the caller when the occurrences are stored).
+
+Usage::
+
+    from pyICSParser.expansion_cache import ExpansionCache
+    mycal.set_expansion_cache(ExpansionCache(max_occurrences=200000))
+    mycal.get_event_instances("20240101","20241231")
+    mycal.get_event_instances("20240301","20240331")  #served from the 2024 window
+    print(mycal.expansion_cache.stats())
+'''
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import datetime
+
+MAX_OCCURRENCES = 100000
+""" default number of occurrences kept by an ExpansionCache """
+
+class ExpansionCache:
+    """ LRU memo of the occurrences [start, end] (sorted by start) of events within windows
+    Parameters:
+    -----------
+    max_occurrences: int
+        maximum number of occurrences kept (memory cap), windows with more occurrences are not cached
+    """
+    def __init__(self,max_occurrences=MAX_OCCURRENCES):
+        self.max_occurrences = max_occurrences
+        self.clear()
+    def clear(self):
+        """ drops all the cached occurrences and resets the statistics """
+        self._entries = OrderedDict()
+        """ (key, WindowStart, WindowEnd) -> [occurrences, starts or None], least recently used first,
+        starts (floatting start of each occurrence) is None when the window cannot serve its sub-windows """
+        self._windows = {}
+        """ key -> list of the cached [WindowStart, WindowEnd] serving their sub-windows """
+        self.size = 0
+        """ number of occurrences kept """
+        self.hits = 0
+        self.superset_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    def get(self,key,WindowStart,WindowEnd):
+        """ returns the occurrences of the event key within the window, None if neither the window nor a window
+        including it is cached """
+        entry = self._entries.get((key,WindowStart,WindowEnd))
+        if entry is not None:
+            self._entries.move_to_end((key,WindowStart,WindowEnd))
+            self.hits += 1
+            return list(entry[0])
+        for [start, end] in self._windows.get(key,[]):
+            if start<=WindowStart and WindowEnd<=end:
+                self._entries.move_to_end((key,start,end))
+                [occurrences, starts] = self._entries[(key,start,end)]
+                self.superset_hits += 1
+                return occurrences[bisect_left(starts,WindowStart):bisect_left(starts,WindowEnd)]
+        self.misses += 1
+        return None
+    def put(self,key,WindowStart,WindowEnd,occurrences,serves_subwindows=False):
+        """ caches the occurrences (sorted by start) of the event key within the window
+        Parameters:
+        -----------
+        serves_subwindows: bool
+            True when the occurrences of any window within this one are the occurrences starting in it (the
+            expansion does not depend on the window)
+        """
+        if len(occurrences)>self.max_occurrences or (key,WindowStart,WindowEnd) in self._entries:
+            return
+        starts = None
+        if serves_subwindows:
+            #aware starts (converted for EXDATE) are compared with the window as floatting time
+            starts = [start.replace(tzinfo=None) if isinstance(start, datetime) else start for [start,end] in occurrences]
+            self._windows.setdefault(key,[]).append([WindowStart,WindowEnd])
+        self._entries[(key,WindowStart,WindowEnd)] = [list(occurrences),starts]
+        self.size += len(occurrences)
+        while self.size>self.max_occurrences:
+            [[old_key, start, end], [old_occurrences, old_starts]] = self._entries.popitem(last=False)
+            self.size -= len(old_occurrences)
+            self.evictions += 1
+            if old_starts is not None:
+                self._windows[old_key].remove([start,end])
+                if len(self._windows[old_key])==0:
+                    del self._windows[old_key]
+    def hit_rate(self):
+        """ returns the share of the lookups served from the cache (0.0 when there was none) """
+        lookups = self.hits+self.superset_hits+self.misses
+        return (self.hits+self.superset_hits)/float(lookups) if lookups>0 else 0.0
+    def stats(self):
+        """ returns the statistics: hits (same window), superset_hits (served from a window including it),
+        misses, evictions, hit_rate, entries (windows cached) and size (occurrences cached) """
+        return {"hits": self.hits, "superset_hits": self.superset_hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hit_rate(), "entries": len(self._entries),
+                "size": self.size}
@@ -0,0 +1,141 @@
+# -*- coding:utf-8 -*-
+'''
+Free/busy time of one or many calendars: the occurrences of the events blocking time are merged with a
+sweep-line into disjoint busy periods (RFC5545 §3.2.9 FBTYPE), which can be written as a VFREEBUSY component.
+
+Events with TRANSP:TRANSPARENT or STATUS:CANCELLED do not block time, events with STATUS:TENTATIVE are
+BUSY-TENTATIVE and the other ones BUSY. Where periods of different types overlap the most blocking type
+is kept (BUSY-UNAVAILABLE, then BUSY, then BUSY-TENTATIVE).
+
+Usage::
+
+    periods = mycal.get_freebusy("20240101","20240131",calendars=[othercal])
+    for period in periods:
+        print(period.start, period.end, period.fbtype)
+    sFreeBusy = mycal.Gen_FreeBusy("20240101","20240131",calendars=[othercal])
+'''
+from collections import namedtuple
+from datetime import datetime, timezone
+
+FBTYPES = ("BUSY-TENTATIVE","BUSY","BUSY-UNAVAILABLE")
+""" FBTYPE of the busy periods, from the least to the most blocking """
+
+BusyPeriod = namedtuple("BusyPeriod",["start","end","fbtype"])
+""" busy time: start inclusive, end exclusive (naive date-times), FBTYPE """
+
+def busy_type(transp,status):
+    """ returns the FBTYPE of the occurrences of an event from its TRANSP and STATUS values (None when not set),
+    None when the event does not block time """
+    if transp == "TRANSPARENT" or status == "CANCELLED":
+        return None
+    if status == "TENTATIVE":
+        return "BUSY-TENTATIVE"
+    return "BUSY"
+
+def _naive(dt):
+    """ returns dt as a naive datetime, dates being taken at midnight (aware date-times keep their wall clock) """
+    if not isinstance(dt, datetime):
+        dt = datetime.combine(dt, datetime.min.time())
+    return dt.replace(tzinfo=None)
+
+class FreeBusy:
+    """ busy intervals of any number of events clipped to a window, merged by sweep-line into BusyPeriod
+    Parameters:
+    -----------
+    WindowStart: datetime
+        start of the window (inclusive)
+    WindowEnd: datetime
+        end of the window (exclusive)
+    """
+    def __init__(self,WindowStart,WindowEnd):
+        self.WindowStart = WindowStart
+        self.WindowEnd = WindowEnd
+        self._edges = []
+        """ (time, +1 or -1, rank of the FBTYPE) opening and closing each interval """
+    def __len__(self):
+        """ number of intervals added """
+        return len(self._edges)//2
+    def add(self,start,end,fbtype="BUSY"):
+        """ adds the busy interval [start, end[ (date, naive or aware date-time), instants block no time """
+        start = max(_naive(start),self.WindowStart)
+        end = min(_naive(end),self.WindowEnd)
+        if end<=start:
+            return
+        rank = FBTYPES.index(fbtype)
+        self._edges.append((start,1,rank))
+        self._edges.append((end,-1,rank))
+    def busy_periods(self):
+        """ returns the disjoint BusyPeriod sorted by start, adjacent or overlapping intervals of the same
+        FBTYPE being merged """
+        edges = sorted(self._edges)
+        counts = [0]*len(FBTYPES)
+        periods = []
+        current = None
+        since = None
+        position = 0
+        while position<len(edges):
+            time = edges[position][0]
+            while position<len(edges) and edges[position][0]==time:
+                counts[edges[position][2]] += edges[position][1]
+                position += 1
+            top = None
+            for rank in range(len(FBTYPES)-1,-1,-1):
+                if counts[rank]>0:
+                    top = rank
+                    break
+            if top != current:
+                if current is not None:
+                    periods.append(BusyPeriod(since,time,FBTYPES[current]))
+                current = top
+                since = time
+        return periods
+    def free_periods(self):
+        """ returns the [start, end] of the window not covered by any busy period """
+        free = []
+        start = self.WindowStart
+        for period in self.busy_periods():
+            if period.start>start:
+                free.append([start,period.start])
+            start = period.end
+        if start<self.WindowEnd:
+            free.append([start,self.WindowEnd])
+        return free
+
+def _utc(dt,tzinfo=None):
+    """ returns a naive date-time as an iCalendar UTC DATE-TIME value, dt being converted from tzinfo to UTC when
+    tzinfo is not None """
+    if tzinfo is not None:
+        dt = dt.replace(tzinfo=tzinfo).astimezone(timezone.utc)
+    return dt.strftime("%Y%m%dT%H%M%SZ")
+
+def write_vfreebusy(writer,periods,WindowStart,WindowEnd,uid,dtstamp,organizer="",tzinfo=None):
+    """ writes a VFREEBUSY component (RFC5545 §3.6.4) with one FREEBUSY property per FBTYPE
+    Parameters:
+    -----------
+    writer: ContentLineWriter
+    periods: list
+        BusyPeriod sorted by start (naive date-times, see tzinfo)
+    WindowStart, WindowEnd: datetime
+        DTSTART and DTEND of the VFREEBUSY (naive date-times, see tzinfo)
+    uid: str
+    dtstamp: datetime
+        UTC time at which the VFREEBUSY is generated
+    organizer: str
+        CAL-ADDRESS of the ORGANIZER, no ORGANIZER when empty
+    tzinfo: tzinfo
+        time zone of the naive date-times of periods and of the window, converted to UTC, when None they are
+        written as they are with the UTC suffix "Z"
+    """
+    writer.write_line("BEGIN:VFREEBUSY")
+    writer.write_line("UID:"+uid)
+    writer.write_line("DTSTAMP:"+_utc(dtstamp))
+    if organizer:
+        writer.write_line("ORGANIZER:"+organizer)
+    writer.write_line("DTSTART:"+_utc(WindowStart,tzinfo))
+    writer.write_line("DTEND:"+_utc(WindowEnd,tzinfo))
+    for fbtype in reversed(FBTYPES):
+        values = [_utc(period.start,tzinfo)+"/"+_utc(period.end,tzinfo) for period in periods
+                  if period.fbtype == fbtype]
+        if len(values)>0:
+            writer.write_line("FREEBUSY;FBTYPE=%s:%s"%(fbtype,",".join(values)))
+    writer.write_line("END:VFREEBUSY")
@@ -23,6 +23,7 @@ RFC5545_SCM = {
                "3.3.5_2":"§3.3.5 that DATE-TIME is DATE (8 numbers as yyyymmdd), then 'T', then TIME (6 numbers HHMMSS), possibly followed by character 'Z'",
                "3.3.5_3":"§3.3.5 The \"TZID\" property parameter MUST NOT be applied to DATE-TIME properties whose time values are specified in UTC.",
                "3.3.6_1": "§3.3.6 that DURATION field doesn't support the \"Y\" and \"M\" designators from ISO8601",
+               "3.3.6_2": "§3.3.6 DURATION is [+/-]P followed by nW or by nD and/or T with nH, nM and nS (e.g. P15DT5H0M20S), the malformed parts are ignored",
                "3.3.8_1":"§3.3.8 The valid range for \"integer\" is -2147483648 to 2147483647.",
                "3.3.9_1":"§3.3.9 There are two forms of a period of time. First, a period of time is identified by its start and its end. Second, a period of time can also be defined by a start and a positiveduration of time.", 
                "3.3.10_1":"§3.3.10 Individual rule parts MUST only be specified once. ",
@@ -46,6 +47,7 @@ RFC5545_SCM = {
                "3.3.10_17":"§3.3.10 The BYSETPOS rule part specifies a COMMA-separated list positive (+n) or negative (-n) integer.",
                "3.3.10_18":"§3.3.10 Recurrence rules may generate recurrence instances with an invalid date (e.g., February 30) or nonexistent local time (e.g., 1:30 AM on a day where the local time is moved forward by an hour at 1:00 AM).  Such recurrence instances MUST be ignored and MUST NOT be counted as part of the recurrence set.",
                "3.3.12_1":"§3.3.12 The form of time with UTC offset MUST NOT be used: 230000-0800        ;Invalid time format",
+               "3.3.14_1":"§3.3.14 UTC-OFFSET is a sign (\"+\" or \"-\") followed by hours and minutes (HHMM) and optionally seconds (HHMMSS)",
                
                "3.4_1":"§3.4 : The first line of the iCalendar object MUST contain the first of the pair of iCalendar object delimiter strings: BEGIN:VCALENDAR+CRLF",
                "3.4_2":"§3.4 : The last line of the iCalendar object MUST contain the last of the pair of iCalendar object delimiter strings: END:VCALENDAR+CRLF",
@@ -59,6 +61,8 @@ RFC5545_SCM = {
                "3.6.1_3":"§3.6.1 UID is REQUIRED but cannot occur more than once",
                "3.6.1_4":"§3.6.1 Either 'dtend' or 'duration' MAY appear in a 'eventprop', but 'dtend' and 'duration' MUST NOT occur in the same 'eventprop'.",
                "3.6.1_5":"§3.6.1 if VEVENT has a DATE value type for the \"DTSTART\" and if such a \"VEVENT\" has a \"DTEND\" property, it MUST be specified as a DATE value also.",
+               "3.6.5_1":"§3.6.5 TZID is REQUIRED in VTIMEZONE, and at least one of \"STANDARD\" or \"DAYLIGHT\" MUST be included",
+               "3.6.5_2":"§3.6.5 DTSTART, TZOFFSETTO and TZOFFSETFROM are REQUIRED in \"STANDARD\" and \"DAYLIGHT\", but MUST NOT occur more than once",
                "3.8.2.2_1":"§3.8.2.2 on DTEND says 'its value MUST be later in time than the value of the \"DTSTART\" property.'",
                "3.8.2.4_1":"§3.8.2.4 mandates DTSTART when RRULE is set",
                '3.8.2.4_2':"§3.8.2.4 mandates DTSTART when METHOD is not set",
@@ -0,0 +1,131 @@
+# -*- coding:utf-8 -*-
+'''
+Index of the occurrences of iCalendar events, answers "what is happening between A and B",
+"is it busy at T" and "when does UID occur" without scanning or re-enumerating the instances.
+
+Usage::
+
+    mycal.get_event_instances("20240101","20241231",index=True)
+    for occurrence in mycal.occurrence_index.overlapping(datetime(2024,3,1,9),datetime(2024,3,1,17)):
+        print(occurrence.start, occurrence.end, occurrence.summary, occurrence.uid)
+'''
+
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime
+
+Occurrence = namedtuple("Occurrence",["start","end","summary","uid"])
+""" one occurrence of an event (all its slots): start inclusive, end exclusive, as enumerated by iCalendar """
+
+def _key(dt):
+    """ returns the naive datetime used to order occurrences: dates are taken at midnight and aware
+    date-time are compared on their wall clock (same convention as iCalendar._instance_key) """
+    if not isinstance(dt, datetime):
+        dt = datetime.combine(dt, datetime.min.time())
+    return dt.replace(tzinfo=None)
+
+class OccurrenceIndex:
+    """ Sorted start/end arrays of occurrences queried as an interval tree
+
+    Occurrences are intervals [start, end[, an occurrence with end == start (e.g. DTSTART without DTEND
+    nor DURATION) is the instant start. A multi-day event is stored once with its full span rather than
+    one entry per slot as in iCalendar.events_instances.
+
+    The arrays sorted by start are a balanced binary tree (the root of the positions [lo, hi[ is
+    (lo+hi)//2) whose nodes keep the latest end of their subtree in max_ends. Overlap and point-in-time
+    queries skip the subtrees starting after the window or ending before it: O(log n + k) for k occurrences
+    found (times log n in the worst case), whatever the durations of the occurrences.
+    """
+    def __init__(self,occurrences=[]):
+        """
+        Parameters:
+        -----------
+        occurrences: iterable
+            Occurrence (or [start, end, summary, uid]) of the events, in any order
+        """
+        occurrences = [Occurrence(*occurrence) for occurrence in occurrences]
+        occurrences.sort(key=lambda occurrence: _key(occurrence.start))
+        self.occurrences = occurrences
+        self.starts = [_key(occurrence.start) for occurrence in occurrences]
+        self.ends = [max(_key(occurrence.end),start) for (occurrence,start) in zip(occurrences,self.starts)]
+        self.max_ends = list(self.ends)
+        self._build_max_ends(0,len(self.ends))
+        self.uids = {}
+        for position, occurrence in enumerate(occurrences):
+            self.uids.setdefault(occurrence.uid,[]).append(position)
+    def __len__(self):
+        return len(self.occurrences)
+    def __iter__(self):
+        return iter(self.occurrences)
+    def _build_max_ends(self,lo,hi):
+        """ sets max_ends of the subtree of the positions [lo, hi[ and returns it (None when empty) """
+        if lo>=hi:
+            return None
+        mid = (lo+hi)//2
+        for sub_max in [self._build_max_ends(lo,mid), self._build_max_ends(mid+1,hi)]:
+            if sub_max is not None and sub_max > self.max_ends[mid]:
+                self.max_ends[mid] = sub_max
+        return self.max_ends[mid]
+    def _candidates(self,start,end):
+        """ returns the positions, in increasing order, of the occurrences starting at or before end and
+        ending at or after start (the ones which can overlap [start, end]) """
+        positions = []
+        self._collect(0,min(len(self.starts),bisect_right(self.starts,end)),len(self.starts),start,positions)
+        return positions
+    def _collect(self,lo,last,hi,start,positions):
+        """ appends to positions the positions below last of the subtree [lo, hi[ ending at or after start """
+        if lo>=hi or lo>=last:
+            return
+        mid = (lo+hi)//2
+        if self.max_ends[mid] < start:
+            return
+        self._collect(lo,last,mid,start,positions)
+        if mid < last and self.ends[mid] >= start:
+            positions.append(mid)
+        self._collect(mid+1,last,hi,start,positions)
+    def overlapping(self,start,end):
+        """ returns the occurrences overlapping the window [start, end[
+
+        Parameters:
+        -----------
+        start, end: date or datetime
+            window of the query, end exclusive
+        Returns:
+        --------
+        occurrences: list
+            Occurrence sorted by start
+        """
+        start = _key(start)
+        end = _key(end)
+        ret_val = []
+        for position in self._candidates(start,end):
+            ostart = self.starts[position]
+            oend = self.ends[position]
+            if ostart < end and (oend > start or (oend == ostart and ostart >= start)):
+                ret_val.append(self.occurrences[position])
+        return ret_val
+    def at(self,when):
+        """ returns the occurrences ongoing at when (busy now?)
+
+        Parameters:
+        -----------
+        when: date or datetime
+        Returns:
+        --------
+        occurrences: list
+            Occurrence sorted by start, empty when nothing is scheduled at when
+        """
+        when = _key(when)
+        ret_val = []
+        for position in self._candidates(when,when):
+            ostart = self.starts[position]
+            oend = self.ends[position]
+            if ostart <= when and (when < oend or ostart == when):
+                ret_val.append(self.occurrences[position])
+        return ret_val
+    def is_busy(self,when):
+        """ returns True when at least one occurrence is ongoing at when """
+        return len(self.at(when))>0
+    def by_uid(self,uid):
+        """ returns the occurrences of the event with UID uid, sorted by start """
+        return [self.occurrences[position] for position in self.uids.get(uid,[])]
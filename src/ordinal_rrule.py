@@ -0,0 +1,230 @@
+# -*- coding:utf-8 -*-
+'''
+Array backed expansion of the DAILY, WEEKLY and MONTHLY recurrence rules
+
+The candidates of the rule are the day ordinals (date.toordinal) of the enumeration range, the rule parts
+(INTERVAL, BYMONTH, BYMONTHDAY, BYDAY, BYSETPOS) are applied as masks of 0/1 bytes (combined with integer
+AND and applied with itertools.compress, all in C) and the occurrences are returned as a compact
+array('l') of day ordinals, the time of day being the one of DTSTART.
+
+Usage::
+
+    ordinals = expand(dtstart, rules, WindowStart, WindowEnd)
+    if ordinals is None:
+        #rule not handled by this backend, use iCalendar._flatten_rrule
+    dates = to_dates(ordinals, dtstart)
+
+The occurrences follow RFC5545 §3.3.10 (the calendars of test/examples give the same instances with both
+backends). expand returns None for the rules it does not handle (see supported: other FREQ or rule parts, time zone
+aware dates, ...), which are left to iCalendar._flatten_rrule.
+'''
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from itertools import compress
+
+from .calendar_tables import WEEKDAYS, year_table
+
+OrdinalOccurrences = namedtuple("OrdinalOccurrences",["uid","summary","ordinals","seconds"])
+""" occurrences of an event: ordinals is an array('l') of the day ordinals of their starts, seconds an array('l')
+of the seconds since midnight of their starts (None for DATE events) """
+
+SUPPORTED_PARTS = {"DAILY": set(["FREQ","INTERVAL","COUNT","UNTIL","WKST","BYMONTH","BYDAY"]),
+                   "WEEKLY": set(["FREQ","INTERVAL","COUNT","UNTIL","WKST","BYMONTH","BYDAY"]),
+                   "MONTHLY": set(["FREQ","INTERVAL","COUNT","UNTIL","WKST","BYMONTH","BYMONTHDAY","BYDAY","BYSETPOS"])}
+""" rule parts expanded by this backend for each FREQ """
+
+def supported(dtstart, rules, WindowStart, WindowEnd):
+    """ returns True when expand handles the rule and the types of its dates """
+    if len(rules)==0 or rules.get("FREQ") not in SUPPORTED_PARTS or not set(rules) <= SUPPORTED_PARTS[rules["FREQ"]]:
+        return False
+    if rules.get("INTERVAL",1) < 1 or rules.get("COUNT",1) < 1:
+        return False
+    is_datetime = isinstance(dtstart, datetime)
+    for bound in [dtstart, WindowStart, WindowEnd, rules.get("UNTIL",dtstart)]:
+        if isinstance(bound, datetime) != is_datetime or (is_datetime and bound.tzinfo is not None):
+            return False
+    dow = rules.get("BYDAY",{})
+    for indexes in dow.values():
+        if len(indexes)!=1 or (indexes[0]!=0 and (rules["FREQ"]!="MONTHLY" or not -4<=indexes[0]<=4)):
+            return False
+    if rules["FREQ"] == "MONTHLY":
+        if "BYMONTHDAY" not in rules and "BYDAY" not in rules and dtstart.day > 28:
+            #months without the day of DTSTART are reported (3.3.10_18) by _flatten_rrule
+            return False
+        for monthday in rules.get("BYMONTHDAY",[]):
+            if monthday==0 or not -28<=monthday<=31:
+                return False
+        for setpos in rules.get("BYSETPOS",[]):
+            if setpos<=0:
+                return False
+    if any(month not in range(1,13) for month in rules.get("BYMONTH",[])):
+        return False
+    return True
+
+def _periodic(pattern, offset, size):
+    """ returns the mask of size bytes repeating pattern, starting at pattern[offset] """
+    return (pattern*((offset+size)//len(pattern)+1))[offset:offset+size]
+
+def _and(mask, other):
+    """ returns the bytes AND of two 0/1 masks of the same size """
+    size = len(mask)
+    return (int.from_bytes(mask,"little") & int.from_bytes(other,"little")).to_bytes(size,"little")
+
+def _weekday_mask(first, size, weekdays):
+    """ mask of the days from ordinal first which are one of weekdays (MO, TU, ...) """
+    pattern = bytes(1 if dow in weekdays else 0 for dow in WEEKDAYS)
+    return _periodic(pattern, (first-1) % 7, size)
+
+def _months(first, last):
+    """ yields [year, month, ordinal of the 1st, length] of the months from ordinal first to last """
+    first_date = datetime.fromordinal(first)
+    [year, month] = [first_date.year, first_date.month]
+    month_first = first-first_date.day+1
+    while month_first <= last:
+        length = year_table(year).month_lengths[month]
+        yield [year, month, month_first, length]
+        month_first += length
+        [year, month] = [year+1, 1] if month == 12 else [year, month+1]
+
+def _month_mask(first, last, days_of_month):
+    """ mask of the days from ordinal first to last selected by days_of_month(year, month, ordinal of the 1st,
+    length), which returns None for the whole month or the list of days (1 to length) selected """
+    mask = bytearray(last-first+1)
+    for [year, month, month_first, length] in _months(first, last):
+        days = days_of_month(year, month, month_first, length)
+        if days is None:
+            start = max(month_first, first)
+            end = min(month_first+length-1, last)
+            mask[start-first:end-first+1] = b"\x01"*(end-start+1)
+        else:
+            for day in days:
+                ordinal = month_first+day-1
+                if first <= ordinal <= last:
+                    mask[ordinal-first] = 1
+    return bytes(mask)
+
+def _nth_weekdays(month_first, length, dow):
+    """ returns the days of the month (1 to length) matching BYDAY (plain and indexed weekdays) """
+    days = []
+    first_weekday = (month_first-1) % 7
+    for [weekday_name, indexes] in dow.items():
+        first_day = 1+(WEEKDAYS.index(weekday_name)-first_weekday) % 7
+        matches = list(range(first_day, length+1, 7))
+        if indexes[0] == 0:
+            days += matches
+        elif abs(indexes[0]) <= len(matches):
+            days.append(matches[indexes[0]-1 if indexes[0]>0 else indexes[0]])
+    return days
+
+def _bounds(dtstart, rules, WindowStart, WindowEnd):
+    """ returns [first, last]: first and last ordinals whose occurrence (at the time of DTSTART) is
+    within DTSTART, WindowStart (unless COUNT is set: occurrences are counted from DTSTART), WindowEnd
+    (excluded) and UNTIL """
+    time_of_day = dtstart.time() if isinstance(dtstart, datetime) else None
+    first = dtstart.toordinal()
+    if "COUNT" not in rules:
+        first = max(first, _first_after(WindowStart, time_of_day))
+    last = _first_after(WindowEnd, time_of_day)-1
+    if "UNTIL" in rules:
+        until = rules["UNTIL"]
+        last_until = until.toordinal()
+        if time_of_day is not None and time_of_day > until.time():
+            last_until -= 1
+        last = min(last, last_until)
+    return [first, last]
+
+def _first_after(bound, time_of_day):
+    """ returns the first ordinal whose occurrence (at time_of_day) is not before bound """
+    ordinal = bound.toordinal()
+    if time_of_day is not None and time_of_day < bound.time():
+        ordinal += 1
+    return ordinal
+
+def expand(dtstart, rules, WindowStart, WindowEnd):
+    """ expands a RRULE over the occurrences window
+    Parameters:
+    -----------
+    dtstart: date or datetime (floatting time)
+        DTSTART of the event, always an occurrence
+    rules: dict
+        RRULE as loaded by vevent.rrule_load (UNTIL in floatting time)
+    WindowStart, WindowEnd: date or datetime (same type as dtstart)
+        occurrences window, WindowEnd excluded
+    Returns:
+    --------
+    ordinals: array('l') or None
+        sorted day ordinals of the occurrences within the window, None when the rule is not supported
+    """
+    if not supported(dtstart, rules, WindowStart, WindowEnd):
+        return None
+    [window_first, window_last] = _bounds(dtstart, rules, WindowStart, WindowEnd)
+    start = dtstart.toordinal()
+    if window_last < window_first:
+        return array("l")
+    [first, last] = [window_first, window_last]
+    if rules["FREQ"] == "MONTHLY":
+        #BYSETPOS is applied to the occurrences of whole months
+        first -= datetime.fromordinal(first).day-1
+        last_date = datetime.fromordinal(last)
+        last += year_table(last_date.year).month_lengths[last_date.month]-last_date.day
+    size = last-first+1
+    freq = rules["FREQ"]
+    interval = rules.get("INTERVAL",1)
+    dow = rules.get("BYDAY",{})
+    if freq == "DAILY":
+        mask = _periodic(b"\x01"+b"\x00"*(interval-1), (first-start) % interval, size)
+        if len(dow)>0:
+            mask = _and(mask, _weekday_mask(first, size, dow))
+    elif freq == "WEEKLY":
+        #weeks start on WKST, the first one is the week of DTSTART
+        week_start = start-((start-1)-WEEKDAYS.index(rules.get("WKST","MO"))) % 7
+        mask = _periodic(b"\x01"*7+b"\x00"*(7*(interval-1)), (first-week_start) % (7*interval), size)
+        mask = _and(mask, _weekday_mask(first, size, dow if len(dow)>0 else [WEEKDAYS[(start-1) % 7]]))
+    else:
+        start_month = dtstart.year*12+dtstart.month
+        mask = _month_mask(first, last, lambda year, month, month_first, length:
+                           None if (year*12+month-start_month) % interval == 0 else [])
+        if "BYMONTHDAY" in rules:
+            monthdays = rules["BYMONTHDAY"]
+            mask = _and(mask, _month_mask(first, last, lambda year, month, month_first, length:
+                                          [day if day>0 else length+1+day for day in monthdays if day<=length]))
+        if len(dow)>0:
+            mask = _and(mask, _month_mask(first, last, lambda year, month, month_first, length:
+                                          _nth_weekdays(month_first, length, dow)))
+        if "BYMONTHDAY" not in rules and len(dow)==0:
+            mask = _and(mask, _month_mask(first, last, lambda year, month, month_first, length: [dtstart.day]))
+    if "BYMONTH" in rules:
+        months = rules["BYMONTH"]
+        mask = _and(mask, _month_mask(first, last, lambda year, month, month_first, length:
+                                      None if month in months else []))
+    ordinals = array("l", compress(range(first, last+1), mask))
+    if "BYSETPOS" in rules:
+        ordinals = _setpos(ordinals, first, last, rules["BYSETPOS"])
+    ordinals = ordinals[bisect_left(ordinals, window_first):bisect_left(ordinals, window_last+1)]
+    if window_first <= start <= window_last and (len(ordinals)==0 or ordinals[0] != start):
+        #DTSTART is always the first occurrence
+        ordinals.insert(0, start)
+    if "COUNT" in rules:
+        ordinals = ordinals[:rules["COUNT"]]
+        first_window = _first_after(WindowStart, dtstart.time() if isinstance(dtstart, datetime) else None)
+        ordinals = ordinals[bisect_left(ordinals, first_window):]
+    return ordinals
+
+def _setpos(ordinals, first, last, setposlist):
+    """ keeps the BYSETPOS positions of the occurrences of each month """
+    kept = array("l")
+    for [year, month, month_first, length] in _months(first, last):
+        lower = bisect_left(ordinals, month_first)
+        in_month = ordinals[lower:bisect_left(ordinals, month_first+length, lower)]
+        kept.extend(sorted(in_month[setpos-1] for setpos in setposlist if setpos <= len(in_month)))
+    return kept
+
+def to_dates(ordinals, dtstart):
+    """ returns the list of date (or datetime at the time of DTSTART) of ordinals """
+    if isinstance(dtstart, datetime):
+        origin = datetime(1,1,1,dtstart.hour,dtstart.minute,dtstart.second)
+    else:
+        origin = date(1,1,1)
+    return [origin+timedelta(days = ordinal-1) for ordinal in ordinals]
@@ -0,0 +1,337 @@
+# -*- coding:utf-8 -*-
+'''
+Parallel parsing of one large iCalendar file over a pool of processes
+
+The file is memory-mapped and cut into chunks at BEGIN:VEVENT lines found at the octet level: a folded line
+never spans two chunks (continuation lines start with a space) and each chunk only holds whole components.
+The calendar properties and components before the first VEVENT (VTIMEZONE, ...) are parsed first in the
+current process, then each chunk is unfolded and parsed (_addEvent) by a worker with the line numbers of its
+first line and the parser state at its start. The typed events and the non-conformances (lSCM, dSCM) are
+merged back in file order, so the result is the one of local_load + parse_loaded.
+
+The line numbers and states given to the workers are predictions (physical and content lines are counted on
+the octets, the state is the one after the previous chunks when they only hold VEVENT): a chunk whose
+prediction turns out wrong is parsed again with the actual ones. Files with lone CR line breaks, or with a
+component left open at a chunk boundary, are parsed serially.
+
+Usage::
+
+    from pyICSParser.parallel_parser import parallel_load
+    mycal = iCalendar()
+    parallel_load(mycal, "export.ics", workers=8)
+    mycal.get_event_instances("20240101","20241231")
+
+or::
+
+    mycal.local_load_parallel("export.ics", workers=8)
+'''
+import copyreg
+import gc
+import io
+import mmap
+import os
+import pickle
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from .pyiCalendar import iCalendar, newTZinfo
+from .vtimezone import transition_table
+
+MIN_CHUNK_SIZE = 1024*1024
+""" smallest chunk (octets) sent to a worker """
+CHUNKS_PER_WORKER = 4
+""" chunks per worker when the chunk size is not given (smaller chunks balance the workers better) """
+VEVENT_LINE = b"\nBEGIN:VEVENT"
+""" line break and BEGIN:VEVENT line (followed by a line break) starting a chunk """
+
+ChunkState = namedtuple("ChunkState",["parse_state","component_name","component_stack","dVCALENDAR","timezones"])
+""" parser state at the start or end of a chunk: state, component name and stack (tuple) of _parse_line,
+calendar properties (dVCALENDAR) and Observance of the VTIMEZONE parsed (dict TZID: tuple of Observance) """
+
+ChunkTask = namedtuple("ChunkTask",["path","start","end","physical_base","content_base","state","conformance"])
+""" octets [start, end[ of the file at path parsed by parse_chunk: number of physical and content lines
+before start, ChunkState at start and conformance """
+
+ChunkResult = namedtuple("ChunkResult",["task","events","fingerprints","content_lines","unfold_SCM","parse_SCM",
+                                        "vevent_SCM","calendar_properties","end_state"])
+""" picklable result of parse_chunk: the ChunkTask, events (pickle, see load_events), EventFingerprint,
+number of content lines, [lSCM, dSCM] found while unfolding, while parsing and by the vevent loaders,
+calendar properties set by the lines of the chunk and ChunkState at the end of the chunk """
+
+INITIAL_STATE = ChunkState("VCALENDAR","",(),{},{})
+""" parser state at the start of a file """
+
+def _calendar_tzinfo(TZID):
+    """ returns a newTZinfo of TZID, load_events shares instead the newTZinfo of the calendar """
+    nTZinfo = newTZinfo()
+    nTZinfo.setID(TZID)
+    return nTZinfo
+
+def _reduce_tzinfo(nTZinfo):
+    return (_calendar_tzinfo,(nTZinfo.getID(),))
+
+_DISPATCH_TABLE = copyreg.dispatch_table.copy()
+_DISPATCH_TABLE[newTZinfo] = _reduce_tzinfo
+
+def dump_events(events):
+    """ returns the pickle of a list of typed events, their newTZinfo being pickled by TZID only """
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer,protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = _DISPATCH_TABLE
+    pickler.dump(events)
+    return buffer.getvalue()
+
+class _EventUnpickler(pickle.Unpickler):
+    """ unpickler of dump_events binding the TZID to the newTZinfo shared by a calendar """
+    def __init__(self,blob,mycal):
+        pickle.Unpickler.__init__(self,io.BytesIO(blob))
+        self.mycal = mycal
+    def find_class(self,module,name):
+        if module == __name__ and name == "_calendar_tzinfo":
+            return self.mycal.vevent._tzinfo
+        return pickle.Unpickler.find_class(self,module,name)
+
+def load_events(blob,mycal):
+    """ returns the events pickled by dump_events, their date-times using the newTZinfo of mycal """
+    return _EventUnpickler(blob,mycal).load()
+
+def parse_chunk(task):
+    """ unfolds and parses the lines of one chunk of a file in a new iCalendar (without console output)
+    Parameters:
+    -----------
+    task: ChunkTask
+    Returns:
+    --------
+    result: ChunkResult
+    """
+    with open(task.path,"rb") as fics:
+        with mmap.mmap(fics.fileno(),0,access=mmap.ACCESS_READ) as mapping:
+            data = mapping[task.start:task.end]
+    lines = io.StringIO(data.decode("utf-8"),newline=None).readlines()
+    mycal = iCalendar()
+    mycal.conformance = task.conformance
+    mycal.vevent.conformance = task.conformance
+    for [TZID, observances] in task.state.timezones.items():
+        mycal.vevent._tzinfo(TZID).table = transition_table(observances)
+    mycal._unfold_start()
+    mycal._physical_line_count = task.physical_base
+    content_lines = []
+    for line in lines:
+        content_line = mycal._unfold_feed(line)
+        if content_line is not None:
+            content_lines.append(content_line)
+    content_line = mycal._unfold_close()
+    if content_line is not None:
+        content_lines.append(content_line)
+    unfold_SCM = [mycal.lSCM,mycal.dSCM]
+    mycal.lSCM = []
+    mycal.dSCM = {}
+    mycal._parse_start()
+    mycal._content_line_count = task.content_base
+    mycal._parse_state = task.state.parse_state
+    mycal._component_name = task.state.component_name
+    mycal._component_stack = list(task.state.component_stack)
+    mycal.dVCALENDAR = dict(task.state.dVCALENDAR)
+    for content_line in content_lines:
+        mycal._parse_line(content_line)
+    calendar_properties = dict((prop, value) for (prop, value) in mycal.dVCALENDAR.items()
+                               if task.state.dVCALENDAR.get(prop) is not value)
+    timezones = dict(task.state.timezones)
+    for TZID in mycal._timezones:
+        timezones[TZID] = mycal.vevent._tzinfo(TZID).table.observances
+    end_state = ChunkState(mycal._parse_state,mycal._component_name,tuple(mycal._component_stack),
+                           mycal.dVCALENDAR,timezones)
+    return ChunkResult(task,dump_events(mycal.events),mycal.event_fingerprints,len(content_lines),unfold_SCM,
+                       [mycal.lSCM,mycal.dSCM],[mycal.vevent.lSCM,mycal.vevent.dSCM],calendar_properties,end_state)
+
+def _next_vevent(mapping,position):
+    """ returns the offset of the first BEGIN:VEVENT line starting after position, len(mapping) if none """
+    while True:
+        offset = mapping.find(VEVENT_LINE,position)
+        if offset<0:
+            return len(mapping)
+        if mapping[offset+len(VEVENT_LINE):offset+len(VEVENT_LINE)+1]==b"\n" \
+                or mapping[offset+len(VEVENT_LINE):offset+len(VEVENT_LINE)+2]==b"\r\n":
+            return offset+1
+        position = offset+1
+
+def _decode_line(octets):
+    """ returns a physical line as read by local_load (utf-8, CRLF read as LF) """
+    return octets.decode("utf-8").replace("\r\n","\n")
+
+def _content_estimate(data):
+    """ returns the number of content lines started in data (whole lines starting with BEGIN:VEVENT or at the
+    start of the file), lines without colon being counted: parse_chunk tells the exact number """
+    return data.count(b"\n")+(0 if data.endswith(b"\n") else 1)-data.count(b"\n ")-data.count(b"\n\n")\
+        -data.count(b"\n\r")-data.count(b"\n:")
+
+def plan_chunks(mapping,path,chunk_size,conformance=False):
+    """ cuts a memory-mapped file into ChunkTask (the parser states are left to INITIAL_STATE)
+    Parameters:
+    -----------
+    mapping: mmap
+    path: str
+    chunk_size: int
+        minimum size of a chunk in octets (a chunk ends before the next BEGIN:VEVENT line)
+    Returns:
+    --------
+    plan: list or None
+        [first line, last line, number of physical lines, tasks], the first task being the lines before the
+        first VEVENT, None when the file cannot be cut (lone CR line breaks)
+    """
+    size = len(mapping)
+    boundaries = [0,_next_vevent(mapping,0)]
+    while boundaries[-1]<size:
+        boundaries.append(_next_vevent(mapping,boundaries[-1]+chunk_size))
+    tasks = []
+    physical_base = 0
+    content_base = 0
+    for [start, end] in zip(boundaries[:-1],boundaries[1:]):
+        data = mapping[start:end]
+        if data.count(b"\r")!=data.count(b"\r\n"):
+            return None
+        tasks.append(ChunkTask(path,start,end,physical_base,content_base,INITIAL_STATE,conformance))
+        physical_base += data.count(b"\n")
+        content_base += _content_estimate(data)
+    if not mapping[-1:]==b"\n":
+        physical_base += 1
+    first_line = _decode_line(mapping[0:mapping.find(b"\n")+1 or size])
+    last_line = _decode_line(mapping[mapping.rfind(b"\n",0,size-1)+1:])
+    return [first_line,last_line,physical_base,tasks]
+
+def _expected_task(task,previous):
+    """ returns task with the line number and parser state following the ChunkResult previous """
+    return task._replace(content_base=previous.task.content_base+previous.content_lines,state=previous.end_state)
+
+def _same_start(task,expected):
+    """ True when a chunk parsed as task is parsed as if it had the start of expected """
+    return task.content_base==expected.content_base and task.state[:3]==expected.state[:3]\
+        and ("METHOD" in task.state.dVCALENDAR)==("METHOD" in expected.state.dVCALENDAR)\
+        and task.state.timezones==expected.state.timezones
+
+def _merge_SCM(target,SCM):
+    """ appends the [lSCM, dSCM] SCM to the lSCM and dSCM of target (iCalendar or vevent) """
+    target.lSCM += SCM[0]
+    for [line, codes] in SCM[1].items():
+        if line in target.dSCM:
+            target.dSCM[line] += codes
+        else:
+            target.dSCM[line] = codes
+
+def _parse_chunks(tasks,pool):
+    """ returns the ChunkResult of the tasks: the first one in the current process, the others over pool
+    (None: in the current process), None when a component is open at a chunk boundary
+
+    chunks started with a wrong prediction are parsed again until all starts follow their previous chunk
+    (each round fixes at least the first wrong one, all its previous chunks being right) """
+    results = [parse_chunk(tasks[0])]
+    state = results[0].end_state
+    tasks = [task._replace(state=state) for task in tasks[1:]]
+    pending = list(range(len(tasks)))
+    results += [None]*len(tasks)
+    while len(pending)>0:
+        if pool is None:
+            parsed = [parse_chunk(tasks[index]) for index in pending]
+        else:
+            parsed = list(pool.map(parse_chunk,[tasks[index] for index in pending]))
+        for [index, result] in zip(pending,parsed):
+            results[index+1] = result
+        pending = []
+        for index in range(len(tasks)):
+            expected = _expected_task(tasks[index],results[index])
+            if expected.state.parse_state != "VCALENDAR":
+                #component left open at the boundary
+                return None
+            if not _same_start(results[index+1].task,expected):
+                tasks[index] = expected
+                pending.append(index)
+    if results[-1].end_state.parse_state != "VCALENDAR":
+        return None
+    return results
+
+def parallel_load(mycal,sLocalFilePath,workers=None,chunk_size=None,conformance=False):
+    """ loads and parses an iCalendar file as local_load + parse_loaded, the VEVENT being parsed over a
+    ProcessPoolExecutor
+    Parameters:
+    -----------
+    mycal: iCalendar
+    sLocalFilePath: str
+    workers: int, default None
+        number of worker processes, None for one per core, 1 to parse the chunks in the current process
+    chunk_size: int, default None
+        minimum size of a chunk in octets, None for CHUNKS_PER_WORKER chunks per worker (at least MIN_CHUNK_SIZE)
+    conformance: bool
+    Returns:
+    --------
+    parallel: bool
+        False when the file was parsed serially (lone CR line breaks, component open at a chunk boundary,
+        exception raised by a chunk)
+    """
+    if mycal.profile is not None:
+        start_time = perf_counter()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    results = None
+    with open(sLocalFilePath,"rb") as fics:
+        size = os.fstat(fics.fileno()).st_size
+        mapping = mmap.mmap(fics.fileno(),0,access=mmap.ACCESS_READ) if size>0 else None
+    if mapping is not None:
+        if chunk_size is None:
+            chunk_size = max(MIN_CHUNK_SIZE,size//(workers*CHUNKS_PER_WORKER))
+        with mapping:
+            try:
+                plan = plan_chunks(mapping,sLocalFilePath,chunk_size,conformance)
+            except UnicodeDecodeError:
+                plan = None
+        if plan is not None:
+            [first_line, last_line, line_count, tasks] = plan
+            try:
+                if workers == 1 or len(tasks)<=2:
+                    results = _parse_chunks(tasks,None)
+                else:
+                    with ProcessPoolExecutor(max_workers=workers) as pool:
+                        results = _parse_chunks(tasks,pool)
+            except Exception:
+                #parsed again serially, which raises the exception where local_load + parse_loaded do
+                results = None
+    if results is None:
+        mycal.local_load(sLocalFilePath,conformance)
+        mycal.parse_loaded()
+        return False
+    mycal._stream_start(conformance)
+    mycal.dSCM = {}
+    mycal.vevent.dSCM = {}
+    mycal.conformance = conformance
+    mycal.vevent.conformance = conformance
+    mycal._check_delimiters(first_line,last_line,line_count)
+    #the unpickled objects are all kept: collecting while they are created only costs time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for result in results:
+            _merge_SCM(mycal,result.unfold_SCM)
+        for result in results:
+            _merge_SCM(mycal,result.parse_SCM)
+            _merge_SCM(mycal.vevent,result.vevent_SCM)
+            mycal.events += load_events(result.events,mycal)
+            mycal.event_fingerprints += result.fingerprints
+            mycal.dVCALENDAR.update(result.calendar_properties)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    end_state = results[-1].end_state
+    for [TZID, observances] in end_state.timezones.items():
+        mycal.vevent._tzinfo(TZID).table = transition_table(observances)
+        mycal._timezones.add(TZID)
+    mycal._physical_line_count = line_count
+    mycal._content_line_count = results[-1].task.content_base+results[-1].content_lines
+    mycal.ical_loaded = 1
+    mycal._parse_close()
+    if mycal.profile is not None:
+        mycal.profile.count("lines",line_count)
+        mycal.profile.count("content_lines",mycal._content_line_count)
+        mycal.profile.count("events",len(mycal.events))
+        mycal.profile.count("chunks",len(results))
+        mycal.profile.phase("parallel_load",perf_counter()-start_time)
+    return True
@@ -0,0 +1,89 @@
+# -*- coding:utf-8 -*-
+'''
+Profiling hooks of iCalendar: per phase wall time, counters and Validator hits per SCM code
+
+Usage::
+
+    from pyICSParser.profiling import ParserStats
+    stats = ParserStats()
+    mycal.set_profile(stats)
+    mycal.local_load("feed.ics")
+    mycal.get_event_instances("20240101","20241231")
+    print(stats.report())
+    exporter.push(stats.as_dict())
+
+Phases (they nest: parse_loaded includes _addEvent, get_event_instances includes _flatten_rrule and sort):
+    local_load, strings_load, stream_load, parse_loaded, _addEvent, get_event_instances, _flatten_rrule,
+    ordinal_rrule (RRULE expanded by the ordinals backend), sort (final sort of get_event_instances),
+    get_freebusy, load_snapshot, parallel_load and load_stream (async_calendar)
+Counters:
+    lines (physical lines loaded), content_lines (unfolded lines parsed), events (VEVENT parsed), events_reused
+    (unchanged VEVENT kept by a reload), timezones (VTIMEZONE compiled into a transition table),
+    busy_intervals (occurrences merged by get_freebusy), chunks (parts of the file parsed by parallel_load),
+    rrule_candidates (dates tried by _flatten_rrule), rrule_emitted (dates returned by the RRULE expansion)
+
+iCalendar only calls the hook when one is set (iCalendar.profile is None by default).
+'''
+
+class ProfileHook:
+    """ base class of the hooks set with iCalendar.set_profile, its methods do nothing: override the ones
+    needed (e.g. to forward the measures to a metrics exporter as they come) """
+    def phase(self,name,seconds):
+        """ called at the end of each phase with its wall time in seconds """
+        pass
+    def count(self,name,value=1):
+        """ called to add value to the counter name """
+        pass
+    def scm(self,code):
+        """ called for each non-conformance (SCM code) reported by the Validator """
+        pass
+
+class CallbackProfile(ProfileHook):
+    """ hook forwarding every measure to callback(kind, name, value), kind being "phase", "count" or "scm"
+    (value is 1 for scm) """
+    def __init__(self,callback):
+        self.callback = callback
+    def phase(self,name,seconds):
+        self.callback("phase",name,seconds)
+    def count(self,name,value=1):
+        self.callback("count",name,value)
+    def scm(self,code):
+        self.callback("scm",code,1)
+
+class ParserStats(ProfileHook):
+    """ hook accumulating the measures, to be read (as_dict, report) by the caller or a metrics exporter """
+    def __init__(self):
+        self.reset()
+    def reset(self):
+        """ clears all the measures """
+        self.phases = {}
+        """ phase name -> [calls, total seconds] """
+        self.counters = {}
+        """ counter name -> total """
+        self.scm_hits = {}
+        """ SCM code -> number of reports """
+    def phase(self,name,seconds):
+        if name in self.phases:
+            self.phases[name][0] += 1
+            self.phases[name][1] += seconds
+        else:
+            self.phases[name] = [1,seconds]
+    def count(self,name,value=1):
+        self.counters[name] = self.counters.get(name,0)+value
+    def scm(self,code):
+        self.scm_hits[code] = self.scm_hits.get(code,0)+1
+    def as_dict(self):
+        """ returns a copy of the measures: {"phases": {name: {"calls", "seconds"}}, "counters": {...}, "scm": {...}} """
+        return {"phases": dict((name, {"calls": calls, "seconds": seconds}) for [name, [calls, seconds]] in self.phases.items()),
+                "counters": dict(self.counters),
+                "scm": dict(self.scm_hits)}
+    def report(self):
+        """ returns the measures as a text table """
+        lines = ["%-22s %8s %12s" % ("phase", "calls", "seconds")]
+        for [name, [calls, seconds]] in sorted(self.phases.items()):
+            lines.append("%-22s %8d %12.6f" % (name, calls, seconds))
+        for [name, value] in sorted(self.counters.items()):
+            lines.append("%-22s %8d" % (name, value))
+        for [code, hits] in sorted(self.scm_hits.items()):
+            lines.append("SCM %-18s %8d" % (code, hits))
+        return "\n".join(lines)
@@ -89,13 +89,30 @@ Created on Aug 4, 2011
 @version: 0.6.1y
 """
 
-from datetime import tzinfo, timedelta, datetime, date
+from datetime import tzinfo, timedelta, datetime, date, timezone
 import uuid
 import logging
+import heapq
+import hashlib
+from sys import intern
+from collections import namedtuple, OrderedDict, Counter
+from collections.abc import Mapping
+from types import MappingProxyType
+from functools import lru_cache
+from array import array
+from time import perf_counter
 
 from .icalendar_SCM import RFC5545_SCM, ESCAPEDCHAR,COMMA,RFC5545_Properties,RFC5545_FREQ,\
     weekday_map,MaxInteger, CRLF,RFC5545_eventprop_count, VCALENDAR_Components, VCALENDAR_Properties
 from .RFC5546_SCM import RFC5546_METHODS
+from .occurrence_index import Occurrence, OccurrenceIndex
+from .calendar_tables import month_length, day_of_year, ical_weekday, week_number
+from .ordinal_rrule import OrdinalOccurrences, expand as expand_ordinals, to_dates as ordinal_dates, supported as ordinal_supported
+from .profiling import ParserStats
+from .calendar_writer import ContentLineWriter, CHUNK_SIZE, fold_line
+from .vtimezone import Observance, transition_table, parse_utc_offset, frozen_rule
+from .freebusy import FreeBusy, busy_type, write_vfreebusy
+from .snapshot import read_snapshot, write_snapshot
 
 __VERSION__ = "0.7.1a3"
 
@@ -104,24 +121,183 @@ class newTZinfo(tzinfo):
     """ Overrides abstract class tzinfo from datetime to provide mean for TZID support from ical
     """
     name = ""
+    table = None
+    """ TransitionTable of the VTIMEZONE of TZID (see vtimezone), None when the calendar has none (UTC offset 0) """
     def setID(self,ID):
         self.name = ID
     def getID(self):
         return self.name
 
     def utcoffset(self, dt):
-        return timedelta(hours=0) + self.dst(dt)
+        if self.table is None or dt is None:
+            return timedelta(hours=0) + self.dst(dt)
+        return self.table.utcoffset(dt.replace(tzinfo=None))
     def dst(self, dt):
-        return timedelta(hours=0)
+        if self.table is None or dt is None:
+            return timedelta(hours=0)
+        return self.table.dst(dt.replace(tzinfo=None))
+    def tzname(self, dt):
+        if self.table is None or dt is None:
+            return tzinfo.tzname(self, dt)
+        return self.table.tzname(dt.replace(tzinfo=None))
+    def fromutc(self, dt):
+        if self.table is None:
+            return tzinfo.fromutc(self, dt)
+        return self.table.utc_to_local(dt.replace(tzinfo=None)).replace(tzinfo=self)
+
+CompiledEvent = namedtuple("CompiledEvent",["dtstart","dtend","rrule","rdates","exdates","summary","uid","tz_table"],
+                           defaults=[None])
+""" read-only representation of an event used by the enumerator: DTSTART and DTEND as floatting time or date,
+the RRULE (read-only mapping, empty if none), RDATE and EXDATE values, SUMMARY, UID and the TransitionTable
+of the TZID of DTSTART (None if DTSTART has no VTIMEZONE), the RRULE being then expanded in local time """
+
+PROPERTY_KEYS = ("param","val")
+""" keys of a Property read as a dictionary """
+
+INTERNED_PROPERTIES = ("UID","SUMMARY","STATUS","TRANSP","CLASS")
+""" properties whose TEXT values are interned (shared by the events, their CompiledEvent and instances) """
+
+ITER_SUBWINDOW = timedelta(days=7)
+""" first sub-window in which iter_event_instances expands a recurring event, each next one being twice longer """
+
+class Property:
+    """ typed value of a property of a parsed event: its parameters (tuple of "NAME=value" strings) and its value
+    
+    a Property is also read and written as the dictionary {"param": ..., "val": ...} events used to hold
+    (event["DTSTART"]["val"], "val" in event["DTSTART"], event["SEQUENCE"]["val"] = 2, ...), as_dict returns it
+    """
+    __slots__ = PROPERTY_KEYS
+    def __init__(self,param,val):
+        self.param = param
+        self.val = val
+    def __getitem__(self,key):
+        if key == "val":
+            return self.val
+        if key == "param":
+            return self.param
+        raise KeyError(key)
+    def __setitem__(self,key,value):
+        if key not in PROPERTY_KEYS:
+            raise KeyError(key)
+        setattr(self,key,value)
+    def __contains__(self,key):
+        return key in PROPERTY_KEYS
+    def __iter__(self):
+        return iter(PROPERTY_KEYS)
+    def __len__(self):
+        return len(PROPERTY_KEYS)
+    def get(self,key,default=None):
+        return self[key] if key in PROPERTY_KEYS else default
+    def keys(self):
+        return PROPERTY_KEYS
+    def values(self):
+        return (self.param,self.val)
+    def items(self):
+        return (("param",self.param),("val",self.val))
+    def as_dict(self):
+        """ returns the property as a dictionary {"param": param, "val": val} """
+        return {"param": self.param, "val": self.val}
+    def __eq__(self,other):
+        if isinstance(other,(Property,dict)):
+            return "param" in other and "val" in other and self.param==other["param"] and self.val==other["val"]
+        return NotImplemented
+    __hash__ = None
+    def __repr__(self):
+        return "Property(param=%r, val=%r)"%(self.param,self.val)
+    def __reduce__(self):
+        #pickled (see snapshot) as the call Property(param, val)
+        return (Property,(self.param,self.val))
+Mapping.register(Property)
+
+EventFingerprint = namedtuple("EventFingerprint",["uid","sequence","digest"])
+""" identity of the raw VEVENT block an event was parsed from: UID and SEQUENCE values (None when missing) and
+hash of its unfolded content lines (None once the event was changed by updateEvent) """
+
+CalendarDiff = namedtuple("CalendarDiff",["added","removed","modified"])
+""" lists of the UIDs of the VEVENT added, removed and modified by a reload (see iCalendar.local_reload) """
+
+DURATION_CACHE_SIZE = 256
+""" number of distinct DURATION values kept parsed by _parse_duration """
+
+@lru_cache(maxsize=DURATION_CACHE_SIZE)
+def _parse_duration(duration):
+    """ parses in a single pass a DURATION value ([+/-]P[nW][nY][nM][nD][T[nH][nM][nS]], sign also accepted 
+    after the P) shared by all the vevent objects through an LRU cache keyed on the value
+    Returns:
+    --------
+    duration: tuple
+        (years, months, timedelta, SCM codes to report), years and months are not RFC5545 compliant (3.3.6_1),
+        the malformed parts of the value are ignored (3.3.6_2) so that a partial (or zero) duration is returned
+    """
+    sign = 1
+    years = 0
+    months = 0
+    weeks = days = hours = minutes = seconds = 0
+    SCMs = []
+    intime = False
+    number = ""
+    for char in duration:
+        if char.isdigit():
+            number += char
+            continue
+        if char in "+-" and number == "" and sign == 1:
+            sign = -1 if char == "-" else 1
+        elif char == "P" and number == "":
+            pass
+        elif char == "T" and number == "" and not intime:
+            intime = True
+        elif number == "":
+            #designator without value, ignored as done by the former find based parser
+            if char not in "WYMDHS" and "3.3.6_2" not in SCMs:
+                SCMs.append("3.3.6_2")
+        elif intime and char == "H":
+            hours = int(number)
+        elif intime and char == "M":
+            minutes = int(number)
+        elif intime and char == "S":
+            seconds = int(number)
+        elif not intime and char == "W":
+            weeks = int(number)
+        elif not intime and char == "Y":
+            years = sign*int(number)
+            SCMs.append("3.3.6_1")
+        elif not intime and char == "M":
+            months = sign*int(number)
+            SCMs.append("3.3.6_1")
+        elif not intime and char == "D":
+            days = int(number)
+        elif "3.3.6_2" not in SCMs:
+            SCMs.append("3.3.6_2")
+        number = ""
+    if number != "" and "3.3.6_2" not in SCMs:
+        #value without designator
+        SCMs.append("3.3.6_2")
+    tdelta = timedelta(weeks=sign*weeks, days=sign*days, hours=sign*hours, minutes=sign*minutes, seconds=sign*seconds)
+    return (years, months, tdelta, tuple(SCMs))
+
+def duration_cache_info():
+    """ returns the hits, misses, maxsize and currsize of the DURATION cache """
+    return _parse_duration.cache_info()
+
+DATE_CACHE_SIZE = 1024
+""" number of (value, parameters) DATE / DATE-TIME kept decoded by each vevent object """
 
 class vevent:
     
     """ Parses a vevent (object from vcalendar as defined by the iCalendar standard (RFC5545)
     """
-    lSCM = []
-    dSCM = {}
-    
     conformance = False
+    profile = None
+    """ ProfileHook told about each non-conformance, set by iCalendar.set_profile """
+    def __init__(self):
+        self.lSCM = []
+        """ SCM codes of the non-conformances found by this object """
+        self.dSCM = {}
+        """ SCM codes of the non-conformances found by this object, per line """
+        self._date_cache = OrderedDict()
+        """ date_load results, most recently used last """
+        self._tzinfos = {}
+        """ newTZinfo shared per TZID by the values loaded """
 #    vevent_load = { "uid": self.string_load}
     def Validator(self,RFC_SCM,line_count=0,line="",level=0, alttxt = "", show = False):
         """ Displays the error message either from RFC_SCM or alttxt for error found at line
@@ -148,6 +324,8 @@ class vevent:
                 self.dSCM[line_count].append(RFC_SCM)
             else:
                 self.dSCM[line_count]=[RFC_SCM]
+            if self.profile is not None:
+                self.profile.scm(RFC_SCM)
 
 
         if show or self.conformance:
@@ -175,16 +353,10 @@ class vevent:
             ret_val.append(index)
         return ret_val
     def line_wrap(self,newline):
-        if len(newline)<75:
-            ret_val = newline
-        else:
-            #FIXME: about the utf-8 and mid-octet splitting
-            NnewLine = int(len(newline)/73.0)
-            ret_val = newline[0:74]+CRLF
-            for i in range(1,NnewLine):
-                ret_val+=" "+newline[i*73+1:(i+1)*73+1]+CRLF
-            ret_val+=" "+newline[(NnewLine)*73+1:]      
-        return ret_val
+        """ folds newline (RFC5545 §3.1), keeping its trailing CRLF if any """
+        if newline.endswith(CRLF):
+            return fold_line(newline[:-len(CRLF)])
+        return fold_line(newline)[:-len(CRLF)]
     def string_write(self,string):
         for esc in ESCAPEDCHAR:
             string = string.replace(ESCAPEDCHAR[esc],esc)
@@ -225,33 +397,57 @@ class vevent:
     def date_load(self,propval,params=[],LineNumber = 0):
         """ loads the date-time or date value + optional TZID into UTC date-time or date
             used for : DTSTART, DTEND, DTSTAMP, UNTIL,...
+            
+            decoded values are kept in a bounded cache keyed on (propval, params), the non-conformances
+            found when decoding are reported again on each call
         Parameters:
         -----------
         Returns:
         --------    
         """
+        key = (propval,tuple(params))
+        if key in self._date_cache:
+            self._date_cache.move_to_end(key)
+            [newdate,SCMs] = self._date_cache[key]
+        else:
+            [newdate,SCMs] = self._date_decode(propval,params)
+            self._date_cache[key] = [newdate,SCMs]
+            if len(self._date_cache)>DATE_CACHE_SIZE:
+                self._date_cache.popitem(last=False)
+        for [RFC_SCM,line_count,line,alttxt] in SCMs:
+            if line_count is None:
+                line_count = LineNumber
+            self.Validator(RFC_SCM,line_count = line_count,line = line,alttxt = alttxt)
+        return newdate
+    def _date_decode(self,propval,params):
+        """ decodes a date-time or date value for date_load
+        Returns:
+        --------
+        [newdate, SCMs]: list
+            newdate is the date, date-time or None if not valid, SCMs the list of [RFC_SCM, line_count,
+            line, alttxt] to report (line_count None for the line of the value)
+        """
         TZID="TZID not set - floatting"
         newdate = None
+        SCMs = []
         
         for param in params:
             if param.find("TZID=")==0:
                 TZID=param.split("=")[1]
 
-        nTZinfo = newTZinfo()
-
 #        retdate=datetime(1970,1,1) 
         yeardate = int(propval[0:4])
         
         if propval.find("-")>=0:
-            self.Validator("3.3.12_1",line_count = LineNumber,line = propval)
+            SCMs.append(["3.3.12_1",None,propval,""])
         
         if yeardate<1582: #retdate<datetime(year=1582,month=10,day=15):
-            self.Validator("3.3.5_1", line_count = LineNumber,line = propval,alttxt = "dates prior to 1582/oct/15 might be in julian calendar, prior validation should be undertaken - date moved to 1900 for enumerator")
+            SCMs.append(["3.3.5_1",None,propval,"dates prior to 1582/oct/15 might be in julian calendar, prior validation should be undertaken - date moved to 1900 for enumerator"])
             propval = "1900"+propval[5:]
         elif yeardate<1875:
-            self.Validator("3.3.5_1", line_count = LineNumber,line = propval)
+            SCMs.append(["3.3.5_1",None,propval,""])
         elif yeardate<1970:
-            self.Validator("3.3.5_1", line_count = LineNumber,line = propval,alttxt="1970 however is often a computer epoch limit prior validation should be undertaken before keeping such a past date")
+            SCMs.append(["3.3.5_1",None,propval,"1970 however is often a computer epoch limit prior validation should be undertaken before keeping such a past date"])
         
         #BEFORE 0.6.1z
 #            if len(propval)>8:
@@ -261,30 +457,53 @@ class vevent:
         #AFTER 0.6.1.z (included):
         if 'VALUE=DATE' in params:
             if len(propval)>8:
-                self.Validator("3.3.4_1","expected date, found: %s"%(propval))
+                SCMs.append(["3.3.4_1","expected date, found: %s"%(propval),"",""])
             else:
-                newdate = datetime.strptime(propval,"%Y%m%d").date()
+                newdate = self._date_fixed_width(propval)
         else:
             if propval[len(propval)-1]=="Z":
                 propval = propval[:-1]
                 if not TZID=="TZID not set - floatting":
-                    self.Validator("3.3.5_3", LineNumber, propval)
+                    SCMs.append(["3.3.5_3",None,propval,""])
                 TZID = "UTC"
             if len(propval)==15:
-                retdate = datetime.strptime(propval[0:15],"%Y%m%dT%H%M%S")
+                retdate = self._datetime_fixed_width(propval)
                 if not TZID=="TZID not set - floatting":
-                    newdate = datetime(retdate.year,retdate.month,retdate.day,retdate.hour,retdate.minute,retdate.second,tzinfo=nTZinfo)
-                    newdate.tzinfo.setID(TZID)
+                    newdate = retdate.replace(tzinfo=self._tzinfo(TZID))
                 else:
                     newdate = retdate
             elif len(propval)==8:
                 # here is the case where we load UNTIL and 
                 # it is a 'DATE' but we cannot check yet against the DTSTART value type
-                newdate = datetime.strptime(propval[0:8],"%Y%m%d").date()
+                newdate = self._date_fixed_width(propval)
             else:
-                self.Validator("3.3.5_2", LineNumber, line = propval)
+                SCMs.append(["3.3.5_2",None,propval,""])
         
-        return newdate
+        return [newdate,SCMs]
+    def _date_fixed_width(self,propval):
+        """ decodes YYYYMMDD into a date by slicing, other values are left to strptime """
+        if len(propval)==8 and propval.isdigit() and propval.isascii():
+            try:
+                return date(int(propval[0:4]),int(propval[4:6]),int(propval[6:8]))
+            except ValueError:
+                pass
+        return datetime.strptime(propval,"%Y%m%d").date()
+    def _datetime_fixed_width(self,propval):
+        """ decodes YYYYMMDDTHHMMSS into a naive datetime by slicing, other values are left to strptime """
+        if propval[8:9]=="T" and propval[0:8].isdigit() and propval[9:15].isdigit() and propval.isascii():
+            try:
+                return datetime(int(propval[0:4]),int(propval[4:6]),int(propval[6:8]),
+                                int(propval[9:11]),int(propval[11:13]),int(propval[13:15]))
+            except ValueError:
+                pass
+        return datetime.strptime(propval[0:15],"%Y%m%dT%H%M%S")
+    def _tzinfo(self,TZID):
+        """ returns the newTZinfo of TZID, shared by all the values loaded by this object """
+        if TZID not in self._tzinfos:
+            nTZinfo = newTZinfo()
+            nTZinfo.setID(TZID)
+            self._tzinfos[TZID] = nTZinfo
+        return self._tzinfos[TZID]
     
     def period_load(self,propval,params=[],LineNumber=0):
         """ Loads period or list of period (via recursion)"""
@@ -317,7 +536,9 @@ class vevent:
     def duration_write(self,duration):
         return duration
     def duration_load(self,duration,param="",conformance=False,LineNumber = 0):
-        self.mycal4log = iCalendar()
+        """ Loads a DURATION value (RFC5545 §3.3.6) into [years, months, timedelta]
+        
+        values are parsed once by _parse_duration and cached (see duration_cache_info)"""
         #FIXME: check that datetime.timdelta supports timeoffsets
         """
         FIXME: get below addressed and fixed when adding datetime
@@ -332,69 +553,22 @@ class vevent:
       be added first, followed by the number of hours, number of
       minutes, and number of seconds.
         """
-        duration_received = duration
-        if duration[0]=="P":
-            duration = duration[1:]
-        tdelta = timedelta()
-        years =0
-        months =0
-        sign =1
-        if duration[0:1]=="-":
-            duration = duration[1:]
-            sign = -1
-        if duration.find("T")>=0:
-            [date,time]=duration.split("T")
-#            date = date[1:]
-        else:
-            [date , time] = [duration,""]
-        pos = date.find("W")
-        if pos>0:
-            tdelta += timedelta(weeks= sign*int(date[:pos]))
-        pos = date.find("Y")
-        if (pos)>0:
-            years = sign*int(date[:pos])
-            date = date[pos+1:]
+        [years,months,tdelta,SCMs] = _parse_duration(duration)
+        for RFC_SCM in SCMs:
             if conformance: 
-                self.Validator("3.3.6_1",level=1,line_count = LineNumber,line = duration_received) #raise Exception("VEVENT VALIDATOR","encountered a Y parameter in a DURATION field which is prohibited by RFC5545")
+                self.Validator(RFC_SCM,level=1,line_count = LineNumber,line = duration) #raise Exception("VEVENT VALIDATOR","encountered a Y parameter in a DURATION field which is prohibited by RFC5545")
             else:
-                self.Validator("3.3.6_1",level=0,line_count = LineNumber,line = duration_received)
-        pos = date.find("M")
-        if pos>0:
-            months = sign*int(date[:pos])
-            date = date[pos+1:]
-#            if conformance: raise Exception("VEVENT VALIDATOR","encountered a M parameter in a DURATION field which is prohibited by RFC5545")
-            if conformance: 
-                self.Validator("3.3.6_1",level=1,line_count = LineNumber,line = duration_received)
-            else:
-                self.Validator("3.3.6_1",level=0,line_count = LineNumber,line = duration_received)
-
-        pos = date.find("D")
-        if (pos)>0:
-            tdelta += timedelta(days = sign*int(date[:pos]))
-        pos = time.find("H")
-        if (pos)>0:
-            tdelta += timedelta(hours = sign*int(time[:pos]))
-            time = time[pos+1:]
-        pos = time.find("M")
-        if (pos)>0:
-            tdelta += timedelta(minutes = sign*int(time[:pos]))
-            time = time[pos+1:]
-        pos = time.find("S")
-        if (pos)>0:
-            tdelta += timedelta(seconds = sign*int(time[:pos]))
-        return [years,months,tdelta]  
+                self.Validator(RFC_SCM,level=0,line_count = LineNumber,line = duration)
+        return [years,months,tdelta]
     def datelist_write(self,dtlist2w):
         """ takes a list of date or datetime and returns a string compatible with icalendar """
         #FIXME: does not check that all elements in the list are the same type, assumes all are the same as first one
         dt = datetime(year=2013,month=1,day=26)
-        dtlist =""
         if type(dt)==type(dtlist2w[0]):
-            for date2w in dtlist2w:
-                dtlist += self.string_write(date2w.strftime("%Y%m%dT%H%M%S").upper())+COMMA
+            dtformat = "%Y%m%dT%H%M%S"
         else :
-            for date2w in dtlist2w:
-                dtlist += self.string_write(date2w.strftime("%Y%m%d").upper())+COMMA
-        return  dtlist[:-1] #remove the last character as it is a trailing COMMA 
+            dtformat = "%Y%m%d"
+        return COMMA.join([self.string_write(date2w.strftime(dtformat).upper()) for date2w in dtlist2w])
     def datelist_load(self,sDatelist,passedparam="",LineNumber = 0):
 #        if sDatelist.find(",")>=0:
         sDatelist=sDatelist.split(",")
@@ -644,6 +818,11 @@ class iCalendar:
         mycal.parse_loaded(conformance=True)\n
         #When conformance is True it displays on console non critical error from icalendar file\n
 
+    Thread safety:
+        all the mutable state (loaded lines, events, SCM reports, the vevent loader, ...) is held by the
+        instance, so separate iCalendar objects can load, validate and enumerate concurrently from different
+        threads. A single iCalendar object must not be used from several threads at once. debug() configures
+        the logging module, which is shared by the whole process.
 
     """
     version = __VERSION__
@@ -651,19 +830,26 @@ class iCalendar:
     """ Date from which occurences of iCalendar events should be returned by the enumerator"""
     OccurencesWindowEndDate = ""
     """ Date until which occurences of iCalendar events should be returned by the enumerator"""
-    sVCALENDAR = [] #the VCALENDAR as a string
-    dVCALENDAR = {} #the VCALENDAR as a typed object
-    lVEVENT = [] #the current VEVENT being loaded from iCalendar file, array of strings each string is an unfolded
     conformance = False
     ical_loaded = 0
-    events = []
-    vevent = vevent()
-    """ object holding all the vevent objects (with typed data) from the parsed iCalendar """
+    ical_parsed = 0
+    ical_streamed = False
+    """ True when the calendar was parsed while loaded by stream_load or loaded from a snapshot (self.sVCALENDAR
+    is then not kept) """
+    occurrence_index = None
+    """ OccurrenceIndex of the last enumeration made with index=True """
+    calendar_diff = None
+    """ CalendarDiff returned by the last local_reload, strings_reload or stream_reload """
+    profile = None
+    """ ProfileHook (see profiling) told about phase times, counters and non-conformances, set with set_profile """
+    expansion_cache = None
+    """ ExpansionCache (see expansion_cache) memoizing the occurrences of the events per window, set with set_expansion_cache """
+    rrule_backend = "objects"
+    """ RRULE expansion: "objects" (date objects, all rules) or "ordinals" (arrays of day ordinals, see ordinal_rrule,
+    for the DAILY, WEEKLY and MONTHLY rules it supports, the other rules being expanded with date objects) """
     debug_mode = False
     debug_level = 0
     LogFilePath = "./log.txt"
-    lSCM=[]
-    dSCM={}
     LogData = ""
     logger = None
     def inf(self):
@@ -681,13 +867,69 @@ class iCalendar:
         self.dSCM = {}
         self.vevent = vevent()
         self.events = []
+        self.event_fingerprints = []
+        self.compiled_events = []
+        self.occurrence_index = None
+        self.calendar_diff = None
+        self._reusable = {}
+        self._reused_cevents = {}
+        self._expansion_keys = {}
         self.ical_loaded = 0
+        self.ical_parsed = 0
+        self.ical_streamed = False
         self.conformance = False
         self.lVEVENT = []
+        self.vevent.profile = self.profile
         
     def __init__(self):
         self.ical_loaded = 0
         self.debug_mode= 0
+        self.sVCALENDAR = [] #the VCALENDAR as a string
+        self.dVCALENDAR = {} #the VCALENDAR as a typed object
+        self.lVEVENT = [] #the current VEVENT being loaded from iCalendar file, array of strings each string is an unfolded
+        self.events = []
+        self.event_fingerprints = []
+        """ EventFingerprint of each event in self.events """
+        self.events_instances = []
+        self.compiled_events = []
+        """ read-only CompiledEvent of each event in self.events, used by the enumerator """
+        self._reusable = {}
+        """ during a reload: EventFingerprint -> list of [event, CompiledEvent] of the previous load """
+        self._reused_cevents = {}
+        """ during a reload: index in self.events -> CompiledEvent reused for the event """
+        self._expansion_keys = {}
+        """ id of a CompiledEvent -> [CompiledEvent, key of its occurrences], see _expansion_key """
+        self.vevent = vevent()
+        """ object holding all the vevent objects (with typed data) from the parsed iCalendar """
+        self.lSCM=[]
+        self.dSCM={}
+    def set_profile(self,profile):
+        """ sets the hook measuring this object (None to stop profiling, the default)
+        Parameters:
+        -----------
+        profile: ProfileHook or None
+            e.g. a profiling.ParserStats accumulating the measures or a profiling.CallbackProfile
+        Returns:
+        --------
+        profile: the hook set
+        """
+        self.profile = profile
+        self.vevent.profile = profile
+        return profile
+    def set_expansion_cache(self,cache):
+        """ sets the memo of the occurrences of the events (None to expand them at each enumeration, the default)
+        
+        the occurrences are keyed on the recurrence of the events, not on the events themselves, so the
+        cache stays valid across loads and reloads and can be shared by several iCalendar objects
+        Parameters:
+        -----------
+        cache: ExpansionCache or None
+        Returns:
+        --------
+        cache: the cache set
+        """
+        self.expansion_cache = cache
+        return cache
     def __del__(self):
         self.ical_datelist = []
         self.events_instances = []
@@ -699,7 +941,8 @@ class iCalendar:
                 logging.basicConfig(filename=LogPath,level=debug_level)
             else:
                 logging.basicConfig(level=debug_level)
-        self._log("self debug is now",[TrueFalse])
+        if self.debug_mode:
+            self._log("self debug is now",[TrueFalse])
         self.debug_level = debug_level
         self.LogFilePath = LogPath
         if len(LogPath)>0:
@@ -777,6 +1020,8 @@ class iCalendar:
                 self.dSCM[line_count].append(RFC_SCM)
             else:
                 self.dSCM[line_count]=[RFC_SCM]
+            if self.profile is not None:
+                self.profile.scm(RFC_SCM)
 
         if show or self.conformance:
             if level ==0:
@@ -793,13 +1038,17 @@ class iCalendar:
                 raise Exception(msg_txt)
             elif level ==-1:
                 print(alttxt)
-    def local_load(self,sLocalFilePath,conformance=False):
+    def local_load(self,sLocalFilePath,conformance=False,stream=False):
         """loads iCalendar file from local path
         conformance will force / or not checking ics file for conformance (not supported yet)
+        
+        when stream is True the file is read line by line and parsed on the fly (see stream_load),
+        memory is then bounded by the largest component rather than the file
         """
         self.sVCALENDAR = []
         self.dVCALENDAR = {}
         self.events = []
+        self.event_fingerprints = []
         self.events_instances = []
         self.lSCM = []
         self.dSCM = {}
@@ -808,7 +1057,10 @@ class iCalendar:
             
         self.conformance = conformance
         self.vevent.conformance = conformance
-        self._log("\t\t entering local load:",[sLocalFilePath])
+        if self.profile is not None:
+            start_time = perf_counter()
+        if self.debug_mode:
+            self._log("\t\t entering local load:",[sLocalFilePath])
         self.Validator("3_0", \
             alttxt="***********************************************************************************************\n*** \
                 \t\t Validating file: %s\t\t ***\n***\t\t with module version %s \t\t\t\t\t\
@@ -817,10 +1069,106 @@ class iCalendar:
 
 #        self.local_path = path
         #here check local path
+        if stream:
+            with open(sLocalFilePath,'r',encoding="utf-8") as fical:
+                self.stream_load(fical,conformance)
+            if self.profile is not None:
+                self.profile.phase("local_load",perf_counter()-start_time)
+            return
         string = open(sLocalFilePath,'r',encoding="utf-8").readlines()
         #FIXME: add here the CRLF check and remove the \n from strings_load
         #RFC5545_SCM["3.1_1"]
         self.strings_load(string,conformance)
+        if self.profile is not None:
+            self.profile.phase("local_load",perf_counter()-start_time)
+    def stream_load(self,lines,conformance=False):
+        """Loads and parses iCalendar from an iterable of physical lines (e.g. an open file)
+
+        lines are unfolded and parsed as they are read: each VEVENT is added to self.events as soon as its
+        END:VEVENT is read and self.sVCALENDAR is not kept, so that memory is bounded by the largest
+        component. Once loaded the calendar is parsed (parse_loaded has nothing left to do).
+        Non-conformances (lSCM, dSCM) are the same as for strings_load + parse_loaded, the ones of the first and
+        last lines (3.4_1, 3.4_2) first, but the ones of the unfolding and of the parsing of the content lines
+        come line by line instead of all the ones of the unfolding first.
+        """
+        if self.profile is not None:
+            start_time = perf_counter()
+        self._stream_start(conformance)
+        for line in lines:
+            self._stream_feed(line)
+        self._stream_close()
+        if self.profile is not None:
+            self.profile.count("lines",self._physical_line_count)
+            self.profile.count("content_lines",self._content_line_count)
+            self.profile.phase("stream_load",perf_counter()-start_time)
+    async def load_stream(self,reader,conformance=False):
+        """ coroutine loading and parsing an iCalendar from an asyncio stream as its octets arrive (see
+        stream_load and async_calendar.load_stream), handing control back to the event loop while parsing """
+        from .async_calendar import load_stream
+        return await load_stream(self,reader,conformance)
+    def _stream_start(self,conformance=False):
+        """ resets the calendar before lines are fed by _stream_feed """
+        self.sVCALENDAR = []
+        self.dVCALENDAR = {}
+        self.events = []
+        self.event_fingerprints = []
+        self.events_instances = []
+        self.compiled_events = []
+        self.occurrence_index = None
+        self.ical_loaded = 0
+        self.ical_parsed = 0
+        self.ical_streamed = True
+        self.lSCM = []
+        self.vevent.lSCM =[]
+        self._first_line = None
+        self._last_line = None
+        self._delimiter_scm = 0
+        self._unfold_start()
+        self._parse_start()
+    def _stream_feed(self,line):
+        """ unfolds and parses one physical line """
+        if self._first_line is None:
+            self._first_line = line
+            if not (line.replace("\n","").replace("\r","") == "BEGIN:VCALENDAR"):
+                self.Validator("3.4_1", line_count =0, line = line)
+            self._delimiter_scm = len(self.lSCM)
+        self._last_line = line
+        content_line = self._unfold_feed(line)
+        if content_line is not None:
+            self._parse_line(content_line)
+    def _stream_close(self):
+        """ parses the last content line and closes the calendar """
+        content_line = self._unfold_close()
+        if content_line is not None:
+            self._parse_line(content_line)
+        line = self._last_line
+        if line is None:
+            self.Validator("3.4_1", line_count =0, line = "")
+        elif (not (line.replace("\n","").replace("\r","") == "END:VCALENDAR")) or (not (line[-1]=="\n" or line[-1]=="\r")):
+            self._last_delimiter_scm(line)
+        self.ical_loaded = 1
+        self._parse_close()
+    def _last_delimiter_scm(self,line):
+        """ reports 3.4_2 for the last physical line where _check_delimiters reports it for strings_load, before
+        the non-conformances of the content lines, so that lSCM and dSCM are in the same order """
+        line_count = self._physical_line_count
+        self.Validator("3.4_2",line_count =line_count,line = line)
+        self.lSCM.insert(self._delimiter_scm,self.lSCM.pop())
+        dSCM = {}
+        if self._delimiter_scm>0:
+            #3.4_1 of the first line
+            dSCM[0] = self.dSCM.pop(0)
+        line_scm = self.dSCM.pop(line_count)
+        dSCM[line_count] = line_scm[-1:]+line_scm[:-1]
+        dSCM.update(self.dSCM)
+        self.dSCM = dSCM
+    def _check_delimiters(self,first_line,last_line,line_count):
+        """ checks that the first and last physical lines (line_count lines) are BEGIN:VCALENDAR and END:VCALENDAR
+        with its line break """
+        if not (first_line.replace("\n","").replace("\r","") == "BEGIN:VCALENDAR"):
+            self.Validator("3.4_1", line_count =0, line = first_line)
+        if (not (last_line.replace("\n","").replace("\r","") == "END:VCALENDAR")) or (not (last_line[-1]=="\n" or last_line[-1]=="\r")):
+            self.Validator("3.4_2",line_count =line_count,line = last_line)
     def string_load(self,string,conformance=False):
         string = string.replace("\r\n","\n")
         string = string.replace("\r","\n")
@@ -832,64 +1180,265 @@ class iCalendar:
 
         conformance will force / or not checking ics file for conformance (not supported yet)
         """
+        if self.profile is not None:
+            start_time = perf_counter()
         self.sVCALENDAR = []
         self.dVCALENDAR = {}
         self.events = []
+        self.event_fingerprints = []
         self.events_instances = []
+        self.compiled_events = []
+        self.occurrence_index = None
+        self.ical_parsed = 0
+        self.ical_streamed = False
         self.lSCM = []
         self.vevent.lSCM =[]
         
         
         line_count = 0
-        if not (strings[0].replace("\n","").replace("\r","") == "BEGIN:VCALENDAR"):
-            self.Validator("3.4_1", line_count =0, line = strings[0])
-        if (not (strings[-1].replace("\n","").replace("\r","") == "END:VCALENDAR")) or (not (strings[-1][-1]=="\n" or strings[-1][-1]=="\r")):
-            self.Validator("3.4_2",line_count =len(strings),line = strings[-1])
+        self._check_delimiters(strings[0],strings[-1],len(strings))
+        self._unfold_start()
         for line in strings:
-            self._log("current sVCALENDAR, new line:", [self.sVCALENDAR,line], 0)
-            line_count +=1
+            content_line = self._unfold_feed(line)
+            if content_line is not None:
+                self.sVCALENDAR.append(content_line)
+        content_line = self._unfold_close()
+        if content_line is not None:
+            self.sVCALENDAR.append(content_line)
 
-            if len(line)>1:
-                if line[-2:-1] == "\n\r":
-                    pass
-                else:
-                    #FIXME: check why the local files are not conformant
-                    self.Validator("VCALENDAR VALIDATOR: WARNING",RFC5545_SCM['3.1_1']+ "%s : %s"%(line_count,line),0)
-                    pass
-                if line[0]==" " and len(self.sVCALENDAR)>0:
-                    self._log("line wrapper before",[line,self.sVCALENDAR])
-                    self.sVCALENDAR[-1]=self.sVCALENDAR[-1]+line[1:].replace("\n","").replace("\r","")
-                    self._log("line wrapper after",[line,self.sVCALENDAR])
-                elif line[0]==" ":
-                    self.Validator("3.1_2",line = line,line_count = line_count, level =0)
-                elif line.find(":")>0:
+        self.ical_loaded = 1
+        if self.profile is not None:
+            self.profile.count("lines",len(strings))
+            self.profile.phase("strings_load",perf_counter()-start_time)
+    def local_reload(self,sLocalFilePath,conformance=False,stream=False):
+        """ loads and parses again the iCalendar file (e.g. a feed fetched again) as local_load + parse_loaded,
+        keeping the typed events and CompiledEvent of the VEVENT blocks unchanged since the previous load
+        (same EventFingerprint) instead of parsing them again
+
+        lSCM and dSCM are reset: non-conformances of the unchanged VEVENT are not reported again, only the ones
+        of the calendar properties and of the added or modified VEVENT
+        Returns:
+        --------
+        diff: CalendarDiff
+            UIDs added, removed and modified since the previous load (also kept in self.calendar_diff)
+        """
+        return self._reload(self.local_load,sLocalFilePath,conformance,stream)
+    def strings_reload(self,strings,conformance=False):
+        """ as local_reload for an array of strings (see strings_load) """
+        return self._reload(self.strings_load,strings,conformance)
+    def stream_reload(self,lines,conformance=False):
+        """ as local_reload for an iterable of physical lines (see stream_load) """
+        return self._reload(self.stream_load,lines,conformance)
+    def _reload(self,load,*args):
+        """ loads with load(*args) and parses, reusing the events of the current load whose fingerprint is found again
+        Returns:
+        --------
+        diff: CalendarDiff
+        """
+        previous = self.event_fingerprints
+        self._reusable = {}
+        if self.ical_parsed and len(self.compiled_events)==len(self.events)==len(previous):
+            for [event, cevent, fingerprint] in zip(self.events,self.compiled_events,previous):
+                if fingerprint.digest is not None:
+                    self._reusable.setdefault(fingerprint,[]).append([event,cevent])
+        #strings_load and stream_load do not reset the non-conformances by line, as local_load does
+        self.dSCM = {}
+        self.vevent.dSCM = {}
+        try:
+            load(*args)
+            self.parse_loaded()
+        finally:
+            self._reusable = {}
+        return self._reload_close(previous)
+    def _reload_close(self,previous):
+        """ returns the CalendarDiff between the previous fingerprints and the ones of the new load """
+        old_uids = OrderedDict()
+        for fingerprint in previous:
+            old_uids.setdefault(fingerprint.uid,[]).append(fingerprint)
+        new_uids = OrderedDict()
+        for fingerprint in self.event_fingerprints:
+            new_uids.setdefault(fingerprint.uid,[]).append(fingerprint)
+        added = [uid for uid in new_uids if uid not in old_uids]
+        removed = [uid for uid in old_uids if uid not in new_uids]
+        #a UID may have several VEVENT (RECURRENCE-ID), it is modified when any of them changed
+        modified = [uid for uid in new_uids if uid in old_uids and
+                    Counter(old_uids[uid])!=Counter(new_uids[uid])]
+        self.calendar_diff = CalendarDiff(added,removed,modified)
+        return self.calendar_diff
+    def save_snapshot(self,sSnapshotPath,sLocalFilePath=None):
+        """ writes the parsed calendar (typed events, compiled events, calendar properties and SCM reports) to a
+        versioned binary snapshot (see snapshot), the calendar being parsed first if needed
+        Parameters:
+        -----------
+        sSnapshotPath: str
+            path of the snapshot file (replaced if it exists)
+        sLocalFilePath: str or None
+            path of the iCalendar file the calendar was loaded from, load_snapshot ignores the snapshot once
+            this file changed (None: the snapshot is not tied to a file)
+        Returns:
+        --------
+        size: int
+            size of the snapshot file in octets
+        """
+        if self.ical_parsed == 0:
+            self.parse_loaded()
+        compiled = [None if cevent is None else (cevent.dtstart,cevent.dtend,dict(cevent.rrule))+tuple(cevent[3:])
+                    for cevent in self.compiled_events]
+        sections = {"calendar": {"dVCALENDAR": self.dVCALENDAR, "conformance": self.conformance},
+                    #one pickle so that the events and their compiled events keep sharing the newTZinfo of each TZID
+                    "events": {"events": self.events, "fingerprints": self.event_fingerprints,
+                               "tzinfos": self.vevent._tzinfos, "compiled": compiled},
+                    "scm": {"lSCM": self.lSCM, "dSCM": self.dSCM}}
+        return write_snapshot(sSnapshotPath,sections,self.version,sLocalFilePath)
+    def load_snapshot(self,sSnapshotPath,sLocalFilePath=None):
+        """ loads the calendar from a snapshot written by save_snapshot, in place of local_load + parse_loaded
+        
+        the snapshot is ignored when it is missing, damaged, written by another version of this module or when
+        the size, modification time or content of sLocalFilePath changed since it was written
+        Returns:
+        --------
+        loaded: bool
+            True when the calendar was loaded from the snapshot, False when the snapshot was ignored (the
+            calendar is then unchanged)
+        """
+        if self.profile is not None:
+            start_time = perf_counter()
+        sections = read_snapshot(sSnapshotPath,self.version,sLocalFilePath)
+        if sections is None:
+            return False
+        self.sVCALENDAR = []
+        self.dVCALENDAR = sections["calendar"]["dVCALENDAR"]
+        self.conformance = sections["calendar"]["conformance"]
+        self.events = sections["events"]["events"]
+        self.event_fingerprints = sections["events"]["fingerprints"]
+        self.vevent._tzinfos = sections["events"]["tzinfos"]
+        #cached date-times refer to the newTZinfo replaced above
+        self.vevent._date_cache.clear()
+        self.compiled_events = [None if cevent is None else CompiledEvent(cevent[0],cevent[1],MappingProxyType(cevent[2]),*cevent[3:])
+                                for cevent in sections["events"]["compiled"]]
+        self.lSCM = sections["scm"]["lSCM"]
+        self.dSCM = sections["scm"]["dSCM"]
+        self.vevent.lSCM = []
+        self.vevent.dSCM = {}
+        self.events_instances = []
+        self.occurrence_index = None
+        self._expansion_keys = {}
+        self.ical_loaded = 1
+        self.ical_parsed = 1
+        self.ical_streamed = True
+        if self.profile is not None:
+            self.profile.count("events",len(self.events))
+            self.profile.phase("load_snapshot",perf_counter()-start_time)
+        return True
+    def local_load_cached(self,sLocalFilePath,sSnapshotPath=None,conformance=False):
+        """ loads and parses the iCalendar file as local_load + parse_loaded, from its snapshot when it is still
+        valid, otherwise the file is parsed and its snapshot written
+        Parameters:
+        -----------
+        sSnapshotPath: str or None
+            path of the snapshot, sLocalFilePath+".snapshot" by default
+        Returns:
+        --------
+        cached: bool
+            True when the calendar was loaded from the snapshot
+        """
+        if sSnapshotPath is None:
+            sSnapshotPath = sLocalFilePath+".snapshot"
+        if self.load_snapshot(sSnapshotPath,sLocalFilePath):
+            return True
+        self.local_load(sLocalFilePath,conformance)
+        self.parse_loaded()
+        self.save_snapshot(sSnapshotPath,sLocalFilePath)
+        return False
+    def local_load_parallel(self,sLocalFilePath,conformance=False,workers=None,chunk_size=None):
+        """ loads and parses a large iCalendar file as local_load + parse_loaded, its VEVENT being parsed by a
+        pool of processes (see parallel_parser)
+        Parameters:
+        -----------
+        workers: int, default None
+            number of worker processes, None for one per core, 1 to parse in the current process
+        chunk_size: int, default None
+            minimum size in octets of the chunks of the file sent to the workers
+        Returns:
+        --------
+        parallel: bool
+            False when the file could not be cut into chunks and was parsed serially
+        """
+        from .parallel_parser import parallel_load
+        return parallel_load(self,sLocalFilePath,workers,chunk_size,conformance)
+    def _unfold_start(self):
+        """ starts unfolding (RFC5545 §3.1) a new sequence of physical lines fed to _unfold_feed """
+        self._unfolded_line = None
+        self._physical_line_count = 0
+    def _unfold_feed(self,line):
+        """ unfolds one physical line of the file into the content line being built
+        Parameters:
+        -----------
+        line: str
+            physical line as read from the file (with or without line break)
+        Returns:
+        --------
+        content_line: str or None
+            the content line completed by line (line starts a new one), None if there is none
+        """
+        if self.debug_mode:
+            self._log("current content line, new line:", [self._unfolded_line,line], 0)
+        self._physical_line_count +=1
+        line_count = self._physical_line_count
+        content_line = None
+
+        if len(line)>1:
+            if line[-2:-1] == "\n\r":
+                pass
+            else:
+                #FIXME: check why the local files are not conformant
+                self.Validator("VCALENDAR VALIDATOR: WARNING",RFC5545_SCM['3.1_1']+ "%s : %s"%(line_count,line),0)
+                pass
+            if line[0]==" " and self._unfolded_line is not None:
+                if self.debug_mode:
+                    self._log("line wrapper before",[line,self._unfolded_line])
+                self._unfolded_line=self._unfolded_line+line[1:].replace("\n","").replace("\r","")
+                if self.debug_mode:
+                    self._log("line wrapper after",[line,self._unfolded_line])
+            elif line[0]==" ":
+                self.Validator("3.1_2",line = line,line_count = line_count, level =0)
+            elif line.find(":")>0:
+                if self.debug_mode:
                     self._log("line legnth",[len(line)])
-                    if  len(line)<76:
-                        self.sVCALENDAR.append(line.replace("\n","").replace("\r",""))
-    #                    self._log("sVCALENDAR added ?", [self.sVCALENDAR,line], 0)
-                    elif len(line)>75:
-                        self.Validator("3.1_3",line = line,line_count = line_count,level = 0)
-                        self.sVCALENDAR.append(line.replace("\n","").replace("\r",""))
-    #                    self._log("sVCALENDAR added ?", [self.sVCALENDAR,line], 0)
-                    elif len(line)> 75 and len(line)<1000:
-                        self.Validator("3.1_3",line = line,line_count = line_count,level = 0)
-                        self.sVCALENDAR.append(line.replace("\n","").replace("\r",""))
-                    else :
-                        self.Validator("3.1_4",line = line,line_count = line_count,level = 1)
-                else:
-                    self.Validator('3.1_2',line = line,line_count = line_count,level =0)
+                if  len(line)<76:
+                    [content_line,self._unfolded_line] = [self._unfolded_line,line.replace("\n","").replace("\r","")]
+#                    self._log("sVCALENDAR added ?", [self._unfolded_line,line], 0)
+                elif len(line)>75:
+                    self.Validator("3.1_3",line = line,line_count = line_count,level = 0)
+                    [content_line,self._unfolded_line] = [self._unfolded_line,line.replace("\n","").replace("\r","")]
+#                    self._log("sVCALENDAR added ?", [self._unfolded_line,line], 0)
+                elif len(line)> 75 and len(line)<1000:
+                    self.Validator("3.1_3",line = line,line_count = line_count,level = 0)
+                    [content_line,self._unfolded_line] = [self._unfolded_line,line.replace("\n","").replace("\r","")]
+                else :
+                    self.Validator("3.1_4",line = line,line_count = line_count,level = 1)
             else:
                 self.Validator('3.1_2',line = line,line_count = line_count,level =0)
-
-        self.ical_loaded = 1
+        else:
+            self.Validator('3.1_2',line = line,line_count = line_count,level =0)
+        return content_line
+    def _unfold_close(self):
+        """ ends the unfolding started by _unfold_start and returns the last content line (None if none) """
+        content_line = self._unfolded_line
+        self._unfolded_line = None
+        return content_line
     def _validate(self):
         """ Will secure UID only present once at least in the file"""
-        uidlist = []
+        uids = set()
         for event in self.events:
             if not "UID" in event:
                 event["UID"]=str(uuid.uuid1())+"@pyICSPARSER"
-            if event["UID"] not in uidlist:
-                uidlist.append(event["UID"])
+            uid = event["UID"]
+            if not isinstance(uid, str):
+                #same parameters and value
+                uid = (tuple(uid["param"]),uid["val"])
+            if uid not in uids:
+                uids.add(uid)
             else:
                 self.Validator("3.8.4.7_1", alttxt = "this UID was found more than once in current file:"+event["UID"]["val"])
 
@@ -904,98 +1453,151 @@ class iCalendar:
 
     def parse_loaded(self):
         """ parse loaded ical from file to array of typed data: self.events"""
-        # the current Component_Name
-        Component_Name = "" #str
-        Component_Stack =[]
-
-        self._log("\t\tentering loader",[])
-        #invevent: 0 if not in vevent component, 1 if init
-        invevent = 0 #int
-        #inothercomp: True if vcalendar componnet other than vevent
-        inothercomp = False #bool
-        LineCountBE = 0 #Line count at which the Begin:VEVENT was found
+        if self.ical_streamed:
+            #calendar was parsed while streamed by stream_load, there is no content line left to parse
+            return
+        if self.profile is not None:
+            start_time = perf_counter()
+        if self.debug_mode:
+            self._log("\t\tentering loader",[])
+        self._parse_start()
         if self.ical_loaded == 0:
-            self._log("error ",[RFC5545_SCM["3_1"]])
+            if self.debug_mode:
+                self._log("error ",[RFC5545_SCM["3_1"]])
             self.Validator("3_1", level=1) #("VCALENDAR VALIDATOR","no vCALENDAR loaded")
         elif self.ical_loaded == 1:
             #TODO: add here increments over the calendars
-            self._log("ical loaded", [self.ical_loaded,self.sVCALENDAR],0)
-            line_count = 0
+            if self.debug_mode:
+                self._log("ical loaded", [self.ical_loaded,self.sVCALENDAR],0)
             for line in self.sVCALENDAR:
-                self._log("line is ", [line], 0)
-                line_count +=1
-                #CALENDAR line either cal prop, begin component, end component or component properties
-                if (line.find("BEGIN:")==0):
-                    self._log("new component?: LN / line / name",[line_count,line])
-                    new_Component_Name= self._propval_line_split(line.replace("\n",""),line_count)[2] # ":".join(line.split(":")[1:]).replace("\n","")
-                    if new_Component_Name in VCALENDAR_Components:
-                        self._log("found new component: LN / line / name",[line_count,line,new_Component_Name])
-                        Component_Stack.append(Component_Name)
-                        Component_Name = new_Component_Name 
-                        if (invevent == 0) and (not inothercomp) and (Component_Name=="VEVENT"):
-                            invevent = 1
-                            self.lVEVENT =[]
-                            LineCountBE = line_count
-                        elif (invevent == 0) and (not inothercomp) and (Component_Name!="VEVENT"):
-                            inothercomp = True
-                            self.lCOMPONENT = []
-                        else:
-                            self.Validator("3.6.1_1", line_count = line_count, line = line, level = 1) #raise Exception("VCALENDAR VALIDATOR","encountered BEGIN:%s before END:VEVENT @line: %s"%(Component_Name,str(line_count)))
-#                            self.ical_error = 1
-                    else:
-                        #FIXME: if we have a IANA or X-COMP
-                        pass
-#                pos = line.find("END:")
-                elif (line.find("END:")==0):
-                    self._log("new end?: LN / line ",[line_count,line])
-                    #if we have a event closing tag, check it matches the opening tag
-                    closing_Component = self._propval_line_split(line.replace("\n",""),line_count)[2]#":".join(line.split(":")[1:]).replace("\n","") 
-                    self._log("found end component: LN / line / name",[line_count,line,closing_Component ])
-                    if closing_Component == Component_Name :
-                        #closing tag matches opening one
-                        if invevent ==1:
-                            #if we were already adding an event - stop adding
-                            invevent = 0
-                            self._log("event is", self.lVEVENT,2)
-                            if Component_Name == "VEVENT":
-                                self._addEvent(self.lVEVENT,LineCountBE)
-                                Component_Name = Component_Stack.pop()
-                            elif Component_Name == "VTIMEZONE":
-                                #FIXME: add the function pointer here
-                                pass
-                        elif inothercomp:
-                            #FIXME: add code here to add comp properties to structure
-                            inothercomp=False
-                            pass
-                    elif closing_Component in VCALENDAR_Components:
-#                        self.ical_error = 1
-                        self.Validator("3.6.1_1", line_count = line_count, line = line, level = 1,show=True) #raise Exception("VCALENDAR VALIDATOR","encountered END:%s instead of END:%s @line: %s"%(closing_Component,Component_Name,str(line_count)))
-                    else:
-                        #FIXME: add code here for handling IANA and X-COMP
-#                        raise Exception("IANA or X-PROPERTY","Not supported yet")
-                        pass
-                else:
-                    #neither BEGIN or END calendar component
-                    if (invevent ==1) and (not inothercomp):
-                        #then if we are in VEVENT
-                        self.lVEVENT = self.lVEVENT + [line]
-                    elif inothercomp:
-                        #or if we are in cal COMPONENT
-                        self.lCOMPONENT += [line]
+                self._parse_line(line)
+        self._parse_close()
+        if self.profile is not None:
+            self.profile.count("content_lines",self._content_line_count)
+            self.profile.phase("parse_loaded",perf_counter()-start_time)
+    def _parse_start(self):
+        """ resets the component state machine used by _parse_line
+        
+        states are "VCALENDAR" (calendar properties), "VEVENT" (lines accumulated in self.lVEVENT until
+        END:VEVENT) and "COMPONENT" (other VCALENDAR component, lines accumulated in self.lCOMPONENT)
+        """
+        # the current Component_Name
+        self._component_name = "" #str
+        self._component_stack =[]
+        self._parse_state = "VCALENDAR"
+        self._line_count_BE = 0 #Line count at which the Begin:VEVENT was found
+        self._line_count_BC = 0 #Line count at which the Begin of the other component was found
+        self._content_line_count = 0
+        self._timezones = set() #TZID of the VTIMEZONE parsed
+        self.lVEVENT = []
+        self.lCOMPONENT = []
+    def _parse_line(self,line):
+        """ parses one unfolded content line: VEVENT are added to self.events when their END:VEVENT is parsed """
+        if self.debug_mode:
+            self._log("line is ", [line], 0)
+        self._content_line_count +=1
+        #CALENDAR line either cal prop, begin component, end component or component properties
+        if line.startswith("BEGIN:"):
+            self._parse_begin(line[6:],line)
+        elif line.startswith("END:"):
+            self._parse_end(line[4:],line)
+        elif self._parse_state == "VEVENT":
+            self.lVEVENT.append(line)
+        elif self._parse_state == "COMPONENT":
+            self.lCOMPONENT.append(line)
+        else:
+            #otherwise assume we are adding the calendar  properties
+            line_count = self._content_line_count
+            [prop,param, val] = self._propval_line_split(line,line_count)
+            self.dVCALENDAR[prop]={"param":param,"val":val}
+            if self._component_name == "" and (not prop in VCALENDAR_Properties):
+                #if we are not in a component and the line is not a VCALENDAR Properties
+                self.Validator("3.6_3", line_count = line_count)
+    def _parse_begin(self,new_Component_Name,line):
+        """ state transition on BEGIN:new_Component_Name """
+        line_count = self._content_line_count
+        if self.debug_mode:
+            self._log("new component?: LN / line / name",[line_count,line])
+        if new_Component_Name in VCALENDAR_Components:
+            if self.debug_mode:
+                self._log("found new component: LN / line / name",[line_count,line,new_Component_Name])
+            self._component_stack.append(self._component_name)
+            self._component_name = new_Component_Name 
+            if self._parse_state == "VCALENDAR" and new_Component_Name=="VEVENT":
+                self._parse_state = "VEVENT"
+                self.lVEVENT =[]
+                self._line_count_BE = line_count
+            elif self._parse_state == "VCALENDAR":
+                self._parse_state = "COMPONENT"
+                self.lCOMPONENT = []
+                self._line_count_BC = line_count
+            else:
+                self.Validator("3.6.1_1", line_count = line_count, line = line, level = 1) #raise Exception("VCALENDAR VALIDATOR","encountered BEGIN:%s before END:VEVENT @line: %s"%(self._component_name,str(line_count)))
+#                self.ical_error = 1
+        elif self._parse_state == "COMPONENT":
+            #sub-component (STANDARD, DAYLIGHT, VALARM, ...) kept with the lines of its component
+            self.lCOMPONENT.append(line)
+        else:
+            #FIXME: if we have a IANA or X-COMP
+            pass
+    def _parse_end(self,closing_Component,line):
+        """ state transition on END:closing_Component """
+        line_count = self._content_line_count
+        if self.debug_mode:
+            self._log("new end?: LN / line ",[line_count,line])
+            self._log("found end component: LN / line / name",[line_count,line,closing_Component ])
+        #if we have a event closing tag, check it matches the opening tag
+        if closing_Component == self._component_name :
+            #closing tag matches opening one
+            if self._parse_state == "VEVENT":
+                #if we were already adding an event - stop adding
+                self._parse_state = "VCALENDAR"
+                if self.debug_mode:
+                    self._log("event is", self.lVEVENT,2)
+                if self._component_name == "VEVENT":
+                    fingerprint = self._fingerprint(self.lVEVENT)
+                    if len(self._reusable.get(fingerprint,[]))>0:
+                        #unchanged since the previous load: the typed event and its CompiledEvent are kept
+                        [event,cevent] = self._reusable[fingerprint].pop(0)
+                        self._reused_cevents[len(self.events)] = cevent
+                        self.events.append(event)
+                        if self.profile is not None:
+                            self.profile.count("events_reused")
                     else:
-                        #otherwise assume we are adding the calendar  properties
-                        [prop,param, val] = self._propval_line_split(line,line_count)
-                        self.dVCALENDAR[prop]={"param":param,"val":val}
-                        if Component_Name == "" and (not prop in VCALENDAR_Properties):
-                            #if we are not in a component and the line is not a VCALENDAR Properties
-                            self.Validator("3.6_3", line_count = line_count)
-
+                        self._addEvent(self.lVEVENT,self._line_count_BE)
+                    self.event_fingerprints.append(fingerprint)
+                    self._component_name = self._component_stack.pop()
+                elif self._component_name == "VTIMEZONE":
+                    #FIXME: add the function pointer here
+                    pass
+            elif self._parse_state == "COMPONENT":
+                #FIXME: add code here to add comp properties to structure
+                self._parse_state = "VCALENDAR"
+                if self._component_name == "VTIMEZONE":
+                    self._addTimezone(self.lCOMPONENT,self._line_count_BC)
+        elif self._parse_state == "COMPONENT" and closing_Component not in VCALENDAR_Components:
+            self.lCOMPONENT.append(line)
+        elif closing_Component in VCALENDAR_Components:
+#            self.ical_error = 1
+            self.Validator("3.6.1_1", line_count = line_count, line = line, level = 1,show=True) #raise Exception("VCALENDAR VALIDATOR","encountered END:%s instead of END:%s @line: %s"%(closing_Component,self._component_name,str(line_count)))
+        else:
+            #FIXME: add code here for handling IANA and X-COMP
+#            raise Exception("IANA or X-PROPERTY","Not supported yet")
+            pass
+    def _parse_close(self):
+        """ checks the calendar properties once all content lines were parsed and compiles the events """
         if "PRODID" not in self.dVCALENDAR:
             self.Validator("3.6_1",alttxt = "Parsed all calendar and was not found")
         if "VERSION" not in self.dVCALENDAR:
             self.Validator("3.6_2",alttxt = "Parsed all file and was not found")
-        self._log("END Loader",[],0)
+        if self.debug_mode:
+            self._log("END Loader",[],0)
             
+        for [TZID, nTZinfo] in self.vevent._tzinfos.items():
+            if nTZinfo.table is not None and TZID not in self._timezones:
+                #VTIMEZONE of a previous load no longer in the calendar
+                nTZinfo.table = None
+                self._reused_cevents = {}
 #        if self.conformance:
         self._validate()
         self.lSCM= self.lSCM + self.vevent.lSCM
@@ -1006,13 +1608,30 @@ class iCalendar:
             if line not in self.dSCM:
                 self.dSCM[line]=self.vevent.dSCM[line]
                 #        return 1
+        self._compile_events()
+        self.ical_parsed = 1
+    def _fingerprint(self,lVEVENT):
+        """ returns the EventFingerprint of the unfolded content lines of a VEVENT (folding does not change it) """
+        uid = None
+        sequence = None
+        for line in lVEVENT:
+            name = line[:8].upper()
+            if name[:3]=="UID" and line[3:4] in ":;":
+                uid = line[line.find(":")+1:]
+            elif name=="SEQUENCE" and line[8:9] in ":;":
+                sequence = line[line.find(":")+1:]
+        digest = hashlib.blake2b("\n".join(lVEVENT).encode("utf-8"),digest_size=16).hexdigest()
+        return EventFingerprint(uid,sequence,digest)
     def _addEvent(self,lVEVENT,EventFirstLine = 0):
         """
         loads self.event which is a string into 
         self.events which is an array of python types
         """
-        self._log("\t\tentering event_load",[])
-        self._log("list of vevents when entering",[self.events])
+        if self.profile is not None:
+            start_time = perf_counter()
+        if self.debug_mode:
+            self._log("\t\tentering event_load",[])
+            self._log("list of vevents when entering",[self.events])
         dVevent = {}
         vevent_load = { "TEXT": self.vevent.string_load,
                    "DATE-TIME-LIST": self.vevent.datelist_load,
@@ -1025,12 +1644,14 @@ class iCalendar:
             line_count +=1
             if line.find(":")>0:
                 [prop,param,values]=self._propval_line_split(line,line_count)    #[line.split(":")[0],":".join(line.split(":")[1:])]
-                prop = prop.upper()
+                prop = intern(prop.upper())
                 try:
                     #here parse the value as per its type into python type
                     res = vevent_load[RFC5545_Properties[prop]](values,param,LineNumber = line_count)
                 except KeyError:
                     res = values
+                if prop in INTERNED_PROPERTIES and isinstance(res, str):
+                    res = intern(res)
             else:
                 self.Validator("3.1_2", line_count = line_count, line = line)#raise Exception("VEVENT VALIDATOR","mandatory property not set on line"+line)
             if prop in dVevent:
@@ -1040,12 +1661,15 @@ class iCalendar:
                 else:
                     #FIXME: need to add code for handling when properties set multiple times
                     if not res == None and not (prop == "RRULE"):
-                        dVevent[prop]= [dVevent[prop],{"param":param,"val":res}]
+                        if isinstance(dVevent[prop], list):
+                            dVevent[prop].append(Property(tuple(param),res))
+                        else:
+                            dVevent[prop]= [dVevent[prop],Property(tuple(param),res)]
                     else:
                         self.Validator("3.8.5.3_1", line_count, line)
             else:
                 if not res == None:
-                    dVevent[prop] = {"param":param,"val":res}
+                    dVevent[prop] = Property(tuple(param),res)
 #                dVevent[prop] = res
 
         self.vevent.validate_event(dVevent)
@@ -1067,10 +1691,92 @@ class iCalendar:
 
             
         self.events.append(dVevent)
-        self._log("*** VEVENT ADDED",[dVevent])
-        self._log("list VEVENT so far: ",[self.events])
+        if self.debug_mode:
+            self._log("*** VEVENT ADDED",[dVevent])
+            self._log("list VEVENT so far: ",[self.events])
 #        self.event = []
+        if self.profile is not None:
+            self.profile.count("events")
+            self.profile.phase("_addEvent",perf_counter()-start_time)
         return dVevent
+    def _addTimezone(self,lVTIMEZONE,ComponentFirstLine = 0):
+        """ compiles a VTIMEZONE into the TransitionTable (see vtimezone) of the newTZinfo of its TZID, shared
+        by all the date-times loaded with this TZID, which then have the UTC offsets of the VTIMEZONE
+        Parameters:
+        -----------
+        lVTIMEZONE: list
+            unfolded content lines between BEGIN:VTIMEZONE and END:VTIMEZONE (sub-components included)
+        Returns:
+        --------
+        table: TransitionTable or None
+            None when the VTIMEZONE has no TZID or no valid observance
+        """
+        TZID = None
+        observances = []
+        observance = None
+        line_count = ComponentFirstLine
+        for line in lVTIMEZONE:
+            line_count +=1
+            if line.startswith("BEGIN:"):
+                if line[6:] in ("STANDARD","DAYLIGHT"):
+                    observance = {"kind":line[6:],"RRULE":(),"RDATE":[],"TZNAME":None,"line":line_count}
+                continue
+            if line.startswith("END:"):
+                if observance is not None and line[4:]==observance["kind"]:
+                    observances.append(observance)
+                observance = None
+                continue
+            if line.find(":")<=0:
+                self.Validator("3.1_2", line_count = line_count, line = line)
+                continue
+            [prop,param,value] = self._propval_line_split(line,line_count)
+            prop = prop.upper()
+            if observance is None:
+                if prop == "TZID":
+                    TZID = value
+            elif prop in observance and prop in ("DTSTART","TZOFFSETFROM","TZOFFSETTO"):
+                self.Validator("3.6.5_2", line_count = line_count, line = line)
+            elif prop == "DTSTART":
+                dtstart = self.vevent.date_load(value,param,LineNumber = line_count)
+                if isinstance(dtstart, datetime):
+                    observance[prop] = dtstart.replace(tzinfo=None)
+                elif dtstart is not None:
+                    observance[prop] = datetime.combine(dtstart, datetime.min.time())
+            elif prop in ("TZOFFSETFROM","TZOFFSETTO"):
+                observance[prop] = parse_utc_offset(value)
+                if observance[prop] is None:
+                    self.Validator("3.3.14_1", line_count = line_count, line = line)
+            elif prop == "RRULE":
+                rules = self.vevent.rrule_load(value,param,LineNumber = line_count)
+                if "UNTIL" in rules:
+                    rules["UNTIL"] = self._to_FloatingTime(rules["UNTIL"])
+                observance[prop] = frozen_rule(rules)
+            elif prop == "RDATE":
+                observance[prop] += [rdate.replace(tzinfo=None) for rdate in self.vevent.datelist_load(value,param,LineNumber = line_count)
+                                     if isinstance(rdate, datetime)]
+            elif prop == "TZNAME":
+                observance[prop] = value
+        compiled = []
+        for observance in observances:
+            if observance.get("DTSTART") is None or observance.get("TZOFFSETFROM") is None or observance.get("TZOFFSETTO") is None:
+                self.Validator("3.6.5_2", line_count = observance["line"], alttxt = "%s of VTIMEZONE %s ignored"%(observance["kind"],TZID))
+                continue
+            compiled.append(Observance(observance["kind"],observance["DTSTART"],observance["TZOFFSETFROM"],
+                                       observance["TZOFFSETTO"],observance["RRULE"],tuple(observance["RDATE"]),observance["TZNAME"]))
+        if TZID is None or len(compiled)==0:
+            self.Validator("3.6.5_1", line_count = ComponentFirstLine, alttxt = "VTIMEZONE %s ignored"%(TZID))
+            return None
+        table = transition_table(tuple(compiled))
+        nTZinfo = self.vevent._tzinfo(TZID)
+        if nTZinfo.table != table:
+            #the CompiledEvent kept from a previous load were converted to UTC with the previous offsets
+            self._reusable = {}
+            self._reused_cevents = {}
+            nTZinfo.table = table
+        self._timezones.add(TZID)
+        if self.profile is not None:
+            self.profile.count("timezones")
+        return table
     def _pythonindex_to_icalindex(self,indexes,isDOW=False):
         """ used by generator to make iCalendar lists """
         ret_val = ""
@@ -1079,247 +1785,309 @@ class iCalendar:
         if ret_val[-1]==",":
             ret_val=ret_val[:-1]
         return ret_val
-    def _flatten(self,slot_dur=timedelta(days=1)):
-        """ goes over self.events and compute list of their instances"""
-        self._log("******************\t\t\t entering _flatten",[])
+    def _flatten(self,slot_dur=timedelta(days=1),index=False):
+        """ goes over self.compiled_events and compute list of their instances
+        
+        when index is True also builds self.occurrence_index from the occurrences (before they are split in slots)"""
+        if self.debug_mode:
+            self._log("******************\t\t\t entering _flatten",[])
         self.events_instances = []
+        occurrences = []
         
-        UTC = newTZinfo()
+        for cevent in self.compiled_events:
+            event_occurrences = self._event_occurrences(cevent)
+            self.events_instances += self._slot_instances(cevent,event_occurrences,slot_dur)
+            if index:
+                occurrences += [Occurrence(start,end,cevent.summary,cevent.uid) for [start,end] in event_occurrences]
+        if index:
+            self.occurrence_index = OccurrenceIndex(occurrences)
+        if self.debug_mode:
+            self._log("*****************self.events_instances returned from _flatten",[self.events_instances])
+    def _compile_events(self):
+        """ compiles self.events into self.compiled_events, the read-only representation used for enumeration,
+        so that any number of enumerations can run without parsing again or changing self.events"""
+        self.compiled_events = [self._reused_cevents[index] if index in self._reused_cevents else self._compile_event(event)
+                                for [index, event] in enumerate(self.events)]
+        self._reused_cevents = {}
+        self._expansion_keys = {}
+    def _compile_event(self,event):
+        """ returns the CompiledEvent of a typed event loaded by _addEvent 
+        DTSTART, DTEND (computed when missing) and UNTIL are converted to floatting time (UTC for the date-times
+        with a TZID, using the offsets of its VTIMEZONE if any)
         
-        for event in self.events:
-            tmp_event = event
-            if not "DTSTART" in tmp_event:
-                if not "DTEND" in tmp_event:
-                    #we should never be here as this was checked at loading
-                    raise Exception("VEVENT ERROR","Missing both DTSTART and DTEND, correct per RFC5545 but not enumerable")
-                elif not "DURATION" in tmp_event:
-                    tmp_event["DTSTART"]=tmp_event["DTEND"]["val"]
-                else:
-                    tmp_event["DTSTART"] = tmp_event["DTEND"]["val"]+tmp_event["DURATION"]["val"][2]
-            else:
-                tmp_event["DTSTART"]=tmp_event["DTSTART"]["val"]
-                
-            #convert DTSTART time to a floatting
-            if type(tmp_event["DTSTART"]) == type(datetime(year = 2003, month=3,day =5, tzinfo=UTC)):
-                utcoffset = tmp_event["DTSTART"].utcoffset()
-                tmp_event["DTSTART"]=datetime(year= tmp_event["DTSTART"].year,
-                                              month = tmp_event["DTSTART"].month,
-                                              day = tmp_event["DTSTART"].day,
-                                              hour = tmp_event["DTSTART"].hour,
-                                              minute = tmp_event["DTSTART"].minute,
-                                              second = tmp_event["DTSTART"].second)
-                tmp_event["DTSTART"] = tmp_event["DTSTART"] +utcoffset
-
-            """
-            For cases where a "VEVENT" calendar component
-            specifies a "DTSTART" property with a DATE value type but no
-            "DTEND" nor "DURATION" property, the event's duration is taken to
-            be one day.  For cases where a "VEVENT" calendar component
-            specifies a "DTSTART" property with a DATE-TIME value type but no
-            "DTEND" property, the event ends on the same calendar date and
-            time of day specified by the "DTSTART" property.
-            """
-            if "DTEND" not in tmp_event:
-                if "DURATION" not in tmp_event:
-                    tmp_event["DTEND"] = tmp_event["DTSTART"]
-                else:
-                    tmp_event["DTEND"] = tmp_event["DTSTART"]+tmp_event["DURATION"]["val"][2]
-                    #FIXME: add here the code for handling the DTEND+DURATION (years and months) - need to make
-                    #the code either "instances accurate" or "date accurate"
-                    #call: event["DTEND"] = add_year_months(event["DTEND"], event["DURATION"][1], event["DURATION"][0])
-            else:
-                tmp_event["DTEND"] = tmp_event["DTEND"]["val"]
-
-
-            #convert DTEND time to a floatting
-            if type(tmp_event["DTEND"]) == type(datetime(year = 2003, month=3,day =5, tzinfo=UTC)):
-                utcoffset = tmp_event["DTEND"].utcoffset()
-                tmp_event["DTEND"]=datetime(year= tmp_event["DTEND"].year,
-                                              month = tmp_event["DTEND"].month,
-                                              day = tmp_event["DTEND"].day,
-                                              hour = tmp_event["DTEND"].hour,
-                                              minute = tmp_event["DTEND"].minute,
-                                              second = tmp_event["DTEND"].second)
-                if not type(utcoffset)== type(None):
-                    tmp_event["DTEND"] = tmp_event["DTEND"] +utcoffset
-                    
-            #convert UNTIL time to floatting
-            if "RRULE" in tmp_event:
-                if "UNTIL" in tmp_event["RRULE"]["val"]:
-                    if type(tmp_event["RRULE"]["val"]["UNTIL"]) == type(datetime(year = 2003, month=3,day =5, tzinfo=UTC)):
-                        utcoffset = tmp_event["RRULE"]["val"]["UNTIL"].utcoffset()
-                        tmp_event["RRULE"]["val"]["UNTIL"]=datetime(year= tmp_event["RRULE"]["val"]["UNTIL"].year,
-                                                      month = tmp_event["RRULE"]["val"]["UNTIL"].month,
-                                                      day = tmp_event["RRULE"]["val"]["UNTIL"].day,
-                                                      hour = tmp_event["RRULE"]["val"]["UNTIL"].hour,
-                                                      minute = tmp_event["RRULE"]["val"]["UNTIL"].minute,
-                                                      second = tmp_event["RRULE"]["val"]["UNTIL"].second)
-                        if not type(utcoffset)== type(None):
-                            tmp_event["RRULE"]["val"]["UNTIL"] = tmp_event["RRULE"]["val"]["UNTIL"] +utcoffset
-            
-            if "SUMMARY" in tmp_event:
-                tmp_event["SUMMARY"]=tmp_event["SUMMARY"]["val"]
-            else:
-                tmp_event["SUMMARY"] = ""
-            
-            summary = tmp_event["SUMMARY"]
-            
-            self._log("event being _flatten is:",tmp_event)
-
-            #FIXME: add here the multiple RRULE / EXRULE unfolding
-            #event = #        [dtstart,dtend,rules, summary,uid,rdates,exdates] = event
+        Returns:
+        --------
+        cevent: CompiledEvent or None
+            None when the event has neither DTSTART nor DTEND and cannot be enumerated
+        """
+        if "DTSTART" in event:
+            dtstart = event["DTSTART"]["val"]
+        elif not "DTEND" in event:
+            return None
+        elif not "DURATION" in event:
+            dtstart = event["DTEND"]["val"]
+        else:
+            dtstart = event["DTEND"]["val"]+event["DURATION"]["val"][2]
+        tz_table = None
+        if isinstance(dtstart, datetime):
+            tz_table = getattr(dtstart.tzinfo,"table",None)
+        dtstart = self._to_FloatingTime(dtstart)
 
-            if "RRULE" in tmp_event:
-                tmp_event["RRULE"]=tmp_event["RRULE"]["val"]
+        """
+        For cases where a "VEVENT" calendar component
+        specifies a "DTSTART" property with a DATE value type but no
+        "DTEND" nor "DURATION" property, the event's duration is taken to
+        be one day.  For cases where a "VEVENT" calendar component
+        specifies a "DTSTART" property with a DATE-TIME value type but no
+        "DTEND" property, the event ends on the same calendar date and
+        time of day specified by the "DTSTART" property.
+        """
+        if "DTEND" not in event:
+            if "DURATION" not in event:
+                dtend = dtstart
             else:
-                tmp_event["RRULE"]=[]
+                dtend = dtstart+event["DURATION"]["val"][2]
+                #FIXME: add here the code for handling the DTEND+DURATION (years and months) - need to make
+                #the code either "instances accurate" or "date accurate"
+                #call: event["DTEND"] = add_year_months(event["DTEND"], event["DURATION"][1], event["DURATION"][0])
+        else:
+            dtend = self._to_FloatingTime(event["DTEND"]["val"])
 
-            if type(tmp_event["DTSTART"])==type(date(2003,5,3)):
-                WindowStart =self.OccurencesWindowStartDate.date()
-                WindowEnd = self.OccurencesWindowEndDate.date()
-            else:
-                WindowStart =self.OccurencesWindowStartDate
-                WindowEnd = self.OccurencesWindowEndDate
-                
-            """ **********************************************************
-                THIS IS WHERE WE MAKE THE CALL TO ENUMERATE ALL INSTANCES
-                **********************************************************
-            """
-            self._log("temp 1092",[self.events_instances])
-            t_res = self._flatten_rrule(tmp_event,WindowStart,WindowEnd)
+        #FIXME: add here the multiple RRULE / EXRULE unfolding
+        rules = {}
+        if "RRULE" in event:
+            rules = dict(event["RRULE"]["val"])
+            if "UNTIL" in rules:
+                rules["UNTIL"] = self._to_FloatingTime(rules["UNTIL"])
+
+        rdates = []
+        exdates = []
+        # issue 12 fix: for RFC5545 EXDATE (and RDATE) can only occur once, but multiple EXDATES are
+        # allowed by https://datatracker.ietf.org/doc/html/rfc2445#section-4.6.1
+        for [prop, values] in [["RDATE",rdates],["EXDATE",exdates]]:
+            if prop in event:
+                props = [event[prop]]
+                while len(props)>0:
+                    prop_value = props.pop(0)
+                    if isinstance(prop_value, list):
+                        props = prop_value + props
+                    else:
+                        values += prop_value["val"]
 
-            self._log("*****************dates returned from _flatten_rrule",[t_res])
-                
-            """
-                ***********************************************************
-            """
+        if "SUMMARY" in event:
+            summary = event["SUMMARY"]["val"]
+        else:
+            summary = ""
+        if isinstance(event["UID"], str):
+            #UID added by _validate
+            uid = event["UID"]
+        else:
+            uid = event["UID"]["val"]
+        
+        return CompiledEvent(dtstart,dtend,MappingProxyType(rules),tuple(rdates),tuple(exdates),summary,uid,tz_table)
+    def _flatten_event(self,cevent,slot_dur=timedelta(days=1)):
+        """ computes the instances of a compiled event within the occurrences window
+        Returns:
+        --------
+        instances: list
+            list of (date, summary, uid) tuples sorted by date, one per slot of each occurrence
+        """
+        return self._slot_instances(cevent,self._event_occurrences(cevent),slot_dur)
+    def _slot_instances(self,cevent,occurrences,slot_dur=timedelta(days=1)):
+        """ splits the occurrences [start, end] of a compiled event in instances of slot_dur """
+        t_res = []
+        for [start,end] in occurrences:
+            t_res.append(start)
+            nslot = self._get_number_slots(start,end,slot_dur)
+            for slotincrement in range(1,nslot):
+                t_res.append(start+slot_dur*slotincrement)
+        t_res = sorted(t_res)
+
+        instances = []
+        for t_date in t_res:
+            if self.debug_mode:
+                self._log("adding events description for",[[t_date,cevent.summary,cevent.uid]])
+            instances.append((t_date,cevent.summary,cevent.uid))
+        return instances
+    def _event_occurrences(self,cevent):
+        """ returns the occurrences of a compiled event within the occurrences window, before they are
+        split in slots, from self.expansion_cache when set
+        Returns:
+        --------
+        occurrences: list
+            list of [start, end] of each occurrence, sorted by start
+        """
+        if cevent is None:
+            #we should never be here as this was checked at loading
+            raise Exception("VEVENT ERROR","Missing both DTSTART and DTEND, correct per RFC5545 but not enumerable")
+        cache = self.expansion_cache
+        if cache is None:
+            return self._expand_occurrences(cevent)
+        [WindowStart, WindowEnd] = self._event_window(cevent)
+        key = self._expansion_key(cevent)
+        occurrences = cache.get(key,WindowStart,WindowEnd)
+        if occurrences is None:
+            occurrences = self._expand_occurrences(cevent)
+            cache.put(key,WindowStart,WindowEnd,occurrences,self._serves_subwindows(cevent,WindowStart,WindowEnd))
+        return occurrences
+    def _expansion_key(self,cevent):
+        """ returns the hashable key of the occurrences of a compiled event: RRULE backend, DTSTART, DTEND, RRULE,
+        RDATE, EXDATE and time zone table, computed once per CompiledEvent """
+        entry = self._expansion_keys.get(id(cevent))
+        if entry is None:
+            def frozen(value):
+                if isinstance(value,(list,tuple)):
+                    return tuple(frozen(item) for item in value)
+                if isinstance(value,(dict,MappingProxyType)):
+                    return tuple(sorted((name,frozen(item)) for [name, item] in value.items()))
+                return value
+            #the CompiledEvent is kept with its key so that its id cannot be reused by another object
+            entry = [cevent,(cevent.dtstart,cevent.dtend,frozen(cevent.rrule),frozen(cevent.rdates),frozen(cevent.exdates),
+                             cevent.tz_table)]
+            self._expansion_keys[id(cevent)] = entry
+        return (self.rrule_backend,entry[1])
+    def _serves_subwindows(self,cevent,WindowStart,WindowEnd):
+        """ returns True when the occurrences of cevent within a window are the ones starting within it in a
+        larger window: the RRULE (if any) is expanded by the ordinals backend, which does not depend on the
+        window, and there is no RDATE of PERIOD type (always returned) """
+        for rdate in cevent.rdates:
+            if isinstance(rdate, list):
+                return False
+        if len(cevent.rrule)==0:
+            return True
+        return self.rrule_backend == "ordinals" and ordinal_supported(cevent.dtstart,cevent.rrule,WindowStart,WindowEnd)
+    def _expand_occurrences(self,cevent):
+        """ computes the occurrences of a compiled event within the occurrences window (see _event_occurrences) """
+        UTC = newTZinfo()
+        if self.debug_mode:
+            self._log("event being _flatten is:",[cevent])
+        [WindowStart, WindowEnd] = self._event_window(cevent)
+            
+        """ **********************************************************
+            THIS IS WHERE WE MAKE THE CALL TO ENUMERATE ALL INSTANCES
+            **********************************************************
+        """
+        t_res = self._rrule_dates(cevent,WindowStart,WindowEnd)
 
-            if "RDATE" in tmp_event:
-                rdates = tmp_event ["RDATE"]["val"]
-            else:
-                rdates = []
-
-            # issue 12 fix
-            if "EXDATE" in tmp_event:
-                exdates = []
-
-                # if we have multiple EXDATES properties
-                # https://datatracker.ietf.org/doc/html/rfc2445#section-4.6.1
-                # ; the following are optional,
-                # .../ exdate / exrule / rstatus / related /
-                # for RFC5545 exdate can only occur once
-                if isinstance(tmp_event["EXDATE"], list):
-                    for exdate in tmp_event["EXDATE"]: # added loop for multiple EXDATE on a single event
-                        exdates += exdate["val"] # added loop for multiple EXDATE on a single event
-                        # #convert EXDATES time to floatting
-                        if type(exdates[0])==type(datetime(2013,2,6,10,28,0,tzinfo=UTC)):
-                            pass
-                        if len(rdates)>0:
-                            rdates = [val for val in rdates if val not in exdates]
-                            t_res = [val for val in t_res if val not in exdates]
-                else:
-                    exdates = tmp_event["EXDATE"]["val"]
-            else:
-                exdates = []
-
-            # replaced by issue 12 fix
-            # if "EXDATE" in tmp_event:
-            #     exdates = tmp_event["EXDATE"]["val"]
-            #     #convert EXDATES time to floatting
-            #     if type(exdates[0])==type(datetime(2013,2,6,10,28,0,tzinfo=UTC)):
-            #         pass
-            #     if len(rdates)>0:
-            #         rdates = [val for val in rdates if val not in exdates]
-            #         t_res = [val for val in t_res if val not in exdates]
-            # else:
-            #     exdates = []
+        if self.debug_mode:
+            self._log("*****************dates returned from _flatten_rrule",[t_res])
             
-            """ FIXME:
-            If the duration of the recurring component is specified with the
-            "DTEND" or "DUE" property, then the same exact duration will apply
-            to all the members of the generated recurrence set.  Else, if the
-            duration of the recurring component is specified with the
-            "DURATION" property, then the same nominal duration will apply to
-            all the members of the generated recurrence set and the exact
-            duration of each recurrence instance will depend on its specific
-            start time.  For example, recurrence instances of a nominal
-            duration of one day will have an exact duration of more or less
-            than 24 hours on a day where a time zone shift occurs.  The
-            duration of a specific recurrence may be modified in an exception
-            component or simply by using an "RDATE" property of PERIOD value
-            type.
-            """
-            """
-            delta = timedelta(days = 1)
+        """
+            ***********************************************************
+        """
+
+        rdates = list(cevent.rdates)
+        exdates = list(cevent.exdates)
+        
+        """ FIXME:
+        If the duration of the recurring component is specified with the
+        "DTEND" or "DUE" property, then the same exact duration will apply
+        to all the members of the generated recurrence set.  Else, if the
+        duration of the recurring component is specified with the
+        "DURATION" property, then the same nominal duration will apply to
+        all the members of the generated recurrence set and the exact
+        duration of each recurrence instance will depend on its specific
+        start time.  For example, recurrence instances of a nominal
+        duration of one day will have an exact duration of more or less
+        than 24 hours on a day where a time zone shift occurs.  The
+        duration of a specific recurrence may be modified in an exception
+        component or simply by using an "RDATE" property of PERIOD value
+        type.
+        """
+        """
+        delta = timedelta(days = 1)
+        t_date +=delta
+                
+        while t_date < dtend:
+            list_dates.append(t_date)
             t_date +=delta
-                    
-            while t_date < dtend:
-                list_dates.append(t_date)
-                t_date +=delta
+            if self.debug_mode:
                 self._log("from dtstart to dtend",[dtstart,dtend,t_date,list_dates],0)
 
-            """                
-            res_slots_rdate = []
-            if len(rdates)>0:
-                #here make sure that duplication of rrule and rdate do not result in 2 instances !
-                #also apply RFC5545 §5.2 recommendation: when occurence in rrule and rdate, the length/duration is
-                #taken from rdate if rdate specifies a duration
-                if type(rdates[0])==type([]):
-                    start_rdates = [start for [start,end] in rdates ]
-                    t_res = [start for start in t_res if start.replace(tzinfo=UTC) not in start_rdates]
-                    for occur in rdates:
-                        [start,end] =occur
-                        nslot = self._get_number_slots(start,end,slot_dur)
-                        for slotincrement in range(1,nslot):
-                            res_slots_rdate.append(start+slot_dur*slotincrement)
-                    res_slots_rdate+=start_rdates
-                    res_slots_rdate = sorted(res_slots_rdate)
+        """                
+        period_occurrences = []
+        if len(rdates)>0:
+            #here make sure that duplication of rrule and rdate do not result in 2 instances !
+            #also apply RFC5545 §5.2 recommendation: when occurence in rrule and rdate, the length/duration is
+            #taken from rdate if rdate specifies a duration
+            if type(rdates[0])==type([]):
+                start_rdates = self._hashed([start for [start,end] in rdates ])
+                t_res = [start for start in t_res if start.replace(tzinfo=UTC) not in start_rdates]
+                for [start,end] in rdates:
+                    if isinstance(end, list):
+                        #period of the form start/duration as returned by duration_load
+                        end = start+end[2]
+                    period_occurrences.append([start,end])
 
-                else:
-                    #FIXME: bug
-                    #BUG: bug
-                    #below will crash if RDATE has a bad value as the list will have a 'None'
-                    t_res = t_res + [val for val in rdates if val not in t_res and val>=tmp_event["DTSTART"] and  val>=WindowStart and val<WindowEnd]
+            else:
+                #FIXME: bug
+                #BUG: bug
+                #below will crash if RDATE has a bad value as the list will have a 'None'
+                rrule_dates = self._hashed(t_res)
+                t_res = t_res + [val for val in rdates if val not in rrule_dates and val>=cevent.dtstart and  val>=WindowStart and val<WindowEnd]
+            if self.debug_mode:
                 self._log("319 days rdate", [rdates])
-            if len(exdates)>0:
-                #remove from lisst_dates any date in exdates
-                #
-                #FIXME: below needs to be made robust on combination of date / date-time naive / date-time aware on both t_res and exdates
-                if len(t_res)>0: #added for 0.6.2a7
-                    if not self._type_date(exdates[0])==self._type_date(t_res[0]):
-                        t_res = [self._from_FloatingTime2TZ(val, UTC) for val in t_res if self._from_FloatingTime2TZ(val, UTC) not in exdates]
-                    else:
-                        t_res = [val for val in t_res if val not in exdates]
-
-            
-            res_slots = []
-            dtstart = tmp_event["DTSTART"]
-            dtend = tmp_event["DTEND"]
-            nslot = self._get_number_slots(dtstart,dtend,slot_dur)
-            for occurence_start in t_res:
-                for slotincrement in range(1,nslot):
-                    res_slots.append(occurence_start+slot_dur*slotincrement)
-            #FIXME: here add code for get_instances or get_slots
-            t_res += res_slots
-            t_res += res_slots_rdate
-            t_res = sorted(t_res)
-
-            
-            self._log("temp 1186: self.events_instances:",[self.events_instances])
-            for t_date in t_res:
-                self._log("adding events description for",[[t_date,summary,tmp_event["UID"]["val"]]])
-                if len(self.events_instances)==0:
-                    #if events_instances is empty
-                    self.events_instances=[[t_date,summary,tmp_event["UID"]["val"]]]
-                else:
-                    #if already instances in the list
-                    self.events_instances.append([t_date,summary,tmp_event["UID"]["val"]])
-        self._log("*****************self.events_instances returned from _flatten",[self.events_instances])
+        if len(exdates)>0:
+            #remove from lisst_dates any date in exdates
+            #
+            #FIXME: below needs to be made robust on combination of date / date-time naive / date-time aware on both t_res and exdates
+            if len(t_res)>0: #added for 0.6.2a7
+                excluded = self._hashed(exdates)
+                if not self._type_date(exdates[0])==self._type_date(t_res[0]):
+                    #floatting dates are converted once to UTC, and kept converted
+                    t_res = [self._from_FloatingTime2TZ(val, UTC) for val in t_res]
+                t_res = [val for val in t_res if val not in excluded]
+
+
+        duration = cevent.dtend-cevent.dtstart
+        occurrences = [[start,start+duration] for start in t_res]+period_occurrences
+        return sorted(occurrences, key=lambda occurrence: occurrence[0])
+    def _event_window(self,cevent):
+        """ returns [WindowStart, WindowEnd] the occurrences window as dates for DATE events """
+        if type(cevent.dtstart)==type(date(2003,5,3)):
+            return [self.OccurencesWindowStartDate.date(), self.OccurencesWindowEndDate.date()]
+        return [self.OccurencesWindowStartDate, self.OccurencesWindowEndDate]
+    def _rrule_dates(self,cevent,WindowStart,WindowEnd):
+        """ returns the dates of the RRULE (and DTSTART) of a compiled event within the window, expanded
+        by the backend set in self.rrule_backend """
+        if cevent.tz_table is not None and len(cevent.rrule)>0:
+            return self._zoned_rrule_dates(cevent,WindowStart,WindowEnd)
+        profile = self.profile
+        if profile is not None:
+            start_time = perf_counter()
+        dates = None
+        if self.rrule_backend == "ordinals":
+            ordinals = expand_ordinals(cevent.dtstart,cevent.rrule,WindowStart,WindowEnd)
+            if ordinals is not None:
+                dates = ordinal_dates(ordinals,cevent.dtstart)
+                if profile is not None:
+                    profile.phase("ordinal_rrule",perf_counter()-start_time)
+        if dates is None:
+            dates = self._flatten_rrule(cevent,WindowStart,WindowEnd)
+            if profile is not None:
+                profile.phase("_flatten_rrule",perf_counter()-start_time)
+        if profile is not None:
+            profile.count("rrule_emitted",len(dates))
+        return dates
+    def _zoned_rrule_dates(self,cevent,WindowStart,WindowEnd):
+        """ returns the dates (floatting UTC) of the RRULE of a compiled event whose DTSTART has a VTIMEZONE:
+        the RRULE is expanded in local time (same wall-clock time across DST changes) and each date is
+        converted back to UTC with one lookup in the transition table """
+        table = cevent.tz_table
+        rules = cevent.rrule
+        if isinstance(rules.get("UNTIL"), datetime):
+            rules = dict(rules)
+            rules["UNTIL"] = table.utc_to_local(rules["UNTIL"])
+        local = cevent._replace(dtstart=table.utc_to_local(cevent.dtstart),dtend=table.utc_to_local(cevent.dtend),
+                                rrule=MappingProxyType(rules),tz_table=None)
+        [LocalStart, LocalEnd] = table.local_window(WindowStart,WindowEnd)
+        dates = [table.local_to_utc(local_date) for local_date in self._rrule_dates(local,LocalStart,LocalEnd)]
+        return [utc_date for utc_date in dates if WindowStart<=utc_date<WindowEnd]
     def _flatten_rrule(self,event,WindowStart,WindowEnd):
         """ where the actual algorithm for unrolling the rrule lies  
         
         also compute day instances when dtend>dtstart"""
-        #@param event:the event with python data type to be processed
+        #@param event:the CompiledEvent to be processed
         #@param start:the first date from which this event should be displayed (note the greater of calendar start and event start will be used
         #@param end: optionnal parameter to decide until when the event should be displayed (note the earlier from this and calendar end will be used   
         #@param dates: list of days i.e. [datetime, datetime,...] of days where this event will occur 
@@ -1327,18 +2095,13 @@ class iCalendar:
         #TODO: add handling of bycal=GREG, LUN-CHIN, ORTH
         #TODO: add handling of byeasterday = +/- integer
 #        [dtstart,dtend,rules, summary,uid,rdates,exdates] = event
-        dtstart = event["DTSTART"]
-        dtend = event["DTEND"]
-        if "RRULE" in event:
-            rules = event["RRULE"]
-        else:
-            rules = []
-        if "SUMMARY" in event:
-            summary = event["SUMMARY"]
-        else:
-            summary = ""
+        dtstart = event.dtstart
+        dtend = event.dtend
+        rules = event.rrule
+        summary = event.summary
         
-        self._log("flatten rule, dtstart is:",[dtstart],0)
+        if self.debug_mode:
+            self._log("flatten rule, dtstart is:",[dtstart],0)
         increment = "NONE"
         check_dow = False
         check_week = False
@@ -1359,14 +2122,16 @@ class iCalendar:
         weeks_step_size = 1 
         month_step_size = 1
         year_step_size = 1
-        event_start = dtstart
+        #event_start is the first period enumerated, skipped is the number of occurrences before it
+        [event_start,skipped] = self._fast_forward(dtstart,rules,WindowStart)
         event_end = WindowEnd #FIXME: check why not DTEND?!?!? also do we need to keep test at the end ?!?!? line 1283
         #here we generate the list of dates for all loaded cals
-        self._log("227 rules are:",[rules])
+        if self.debug_mode:
+            self._log("227 rules are:",[rules])
         
         years = [event_start.year]
         months = [event_start.month]
-        weeks = [self._isoCW(event_start.year, event_start.month, event_start.day)]
+        weeks = [week_number(event_start.year, event_start.month, event_start.day)]
         days = [event_start.day]
         wkst = "MO"
         step_size = 1
@@ -1414,7 +2179,8 @@ class iCalendar:
                     first_dom = event_start.day
                     month_start = event_start.month
                     make_dom = True
-                    self._log("277 make dom",[make_dom])
+                    if self.debug_mode:
+                        self._log("277 make dom",[make_dom])
                     days_step_size = step_size
                 if "COUNT" in rules:
                     MaxCount = rules["COUNT"]
@@ -1481,33 +2247,47 @@ class iCalendar:
             #******** END OF CONFIGURATION, NOW RUNNING
             
             lday = {}
-            self._log("years months weeks days",[years,months,weeks,days,event_start,event_end])
-            self._log("checks are: dow, week,doy,setpos",[check_dow,check_week,check_doy,check_setpos])
+            if self.debug_mode:
+                self._log("years months weeks days",[years,months,weeks,days,event_start,event_end])
+                self._log("checks are: dow, week,doy,setpos",[check_dow,check_week,check_doy,check_setpos])
+            if MaxCount>0 and skipped>=MaxCount:
+                #all COUNT occurrences are before the occurrences window
+                return []
+            #no need to enumerate periods after the occurrences window
+            last_year = min(event_end.year,WindowEnd.year)
             if month_step_size > 12:
                 #PY3 update below
-                years = self._mklist(event_start.year, event_end.year,int(month_step_size/12)+1)
+                years = self._mklist(event_start.year, last_year,int(month_step_size/12)+1)
             else:
-                years = self._mklist(event_start.year, event_end.year,year_step_size)
-            self._log("years months weeks days",[years,months,weeks,days,event_start,event_end])
+                years = self._mklist(event_start.year, last_year,year_step_size)
+            if self.debug_mode:
+                self._log("years months weeks days",[years,months,weeks,days,event_start,event_end])
+            if self._period_rule(rules):
+                #DAILY and WEEKLY rules are enumerated period by period from the anchor of _fast_forward
+                list_dates = self._period_dates(dtstart,rules,event_start,min(event_end.toordinal(),WindowEnd.toordinal()))
+                years = []
 
             for year in years:
                 if (increment == "MONTH" or increment == "DAY" or increment == "WEEK") and not ("BYMONTH" in rules):
                     months = self._mklist(month_start, month_end, month_step_size)
-                    self._log("months updated:",[months])
+                    if self.debug_mode:
+                        self._log("months updated:",[months])
                 if make_week == True:
                     #make here list of week numbers which are to be used
-                    week0_num = self._isoCW(year,month_start,first_dom,wkst)
+                    week0_num = week_number(year,month_start,first_dom,wkst)
                     weeks = self._mklist(week0_num, 53, weeks_step_size)
-                    self._log("weeks updated:",[weeks])
+                    if self.debug_mode:
+                        self._log("weeks updated:",[weeks])
                     if not ("BYDAY" in rules):
                         #if BYDAY not specified add the DOW from DTSTART
                         dow = {}
-                        t_dow = self._icalDOW(date(year, month_start, first_dom))
+                        t_dow = ical_weekday(date(year, month_start, first_dom))
                         dow[t_dow] = [0]
-                        self._log("379 make week list:\tyear,month_start,first_dom,wkst,weeks\n",[year,month_start,first_dom,wkst,weeks,dow],1)
+                        if self.debug_mode:
+                            self._log("379 make week list:\tyear,month_start,first_dom,wkst,weeks\n",[year,month_start,first_dom,wkst,weeks,dow],1)
                 for month in months:
                     if make_dom == True:
-                        last_dom = self._last_dom(year, month)
+                        last_dom = month_length(year, month)
                         tmp_days = self._mklist(first_dom, last_dom,days_step_size)
                         days = []
                         if len(dom_index)>0:
@@ -1515,17 +2295,21 @@ class iCalendar:
                             for index in dom_index:
                                 if index>0:
                                     index = index -1
-                                self._log("line 823 days, tmp_days, index",[days,tmp_days,index])
+                                if self.debug_mode:
+                                    self._log("line 823 days, tmp_days, index",[days,tmp_days,index])
                                 if index<len(tmp_days):
                                     #case where DOM is > length of month
                                     days.append(tmp_days[index])
                         else:
                             #else by default all day of month are considered
                             days = tmp_days
+                    if self.profile is not None:
+                        self.profile.count("rrule_candidates",len(days))
                     days0 = days[0]
-                    cw = self._isoCW(year, month, days0, wkst)
+                    cw = week_number(year, month, days0, wkst)
                     lcw = cw
-                    self._log("305 days month year",[days,month,year])
+                    if self.debug_mode:
+                        self._log("305 days month year",[days,month,year])
                     for day in days:
                         #HERE we start ploding through the days of the month and checking for all of them
                         #if they exist (feb 29th), then if they are in the good week number, then if they have the right DOW (monday, ...)
@@ -1545,32 +2329,34 @@ class iCalendar:
                             self.Validator("3.3.10_18")                       
                         if (dateExist == True) and (t_date.month==month):
                             if check_week == True:
-                                cw = self._isoCW(year,month,day,wkst)
-                                self._log("cw , y m d,wkst",[cw,year,month,day,wkst])
+                                cw = week_number(year,month,day,wkst)
+                                if self.debug_mode:
+                                    self._log("cw , y m d,wkst",[cw,year,month,day,wkst])
                                 if (cw not in weeks) and (cw>=lcw):
                                     #check if cw is a good week number
                                     #if cw is not in the list need to make sure we havn't gone round the week number back to 1 while still same year
                                     good_date = False
-                                    self._log("381 good date is false because cw not in weeks (last cw)",[cw,weeks,lcw])
+                                    if self.debug_mode:
+                                        self._log("381 good date is false because cw not in weeks (last cw)",[cw,weeks,lcw])
                                 elif lcw>cw:
                                 #    #here is the case where the week numbering is back to 1 but we are still at the end of year
                                     if 53 in weeks:
                                         good_date = True
                                     else:
                                         good_date = False
-                                    self._log("460 corner case week number:good_date, cw, lcw,weeks",[good_date,cw, lcw, weeks])
+                                    if self.debug_mode:
+                                        self._log("460 corner case week number:good_date, cw, lcw,weeks",[good_date,cw, lcw, weeks])
                             #if check_dow==True:
-                            tdate_dow = self._icalDOW(t_date)
+                            tdate_dow = ical_weekday(t_date)
                             if tdate_dow not in dow:
                                 good_date = False
-                                self._log("387 good date false because of dow",[t_date,tdate_dow,dow])
+                                if self.debug_mode:
+                                    self._log("387 good date false because of dow",[t_date,tdate_dow,dow])
                             if check_doy==True:
-                                if t_date.timetuple().tm_yday in doy:
-                                    good_date = True
-                                    self._log ("424 good date false because of doy",[t_date,check_doy,t_date.timetuple().tm_yday,doy])
-                                else:
-                                    good_date = False
-                                    self._log ("424 good date false because of doy",[t_date,check_doy,t_date.timetuple().tm_yday,doy])
+                                t_yday = day_of_year(t_date.year,t_date.month,t_date.day)
+                                good_date = t_yday in doy
+                                if self.debug_mode:
+                                    self._log("424 good date false because of doy",[t_date,check_doy,t_yday,doy])
                             if good_date == True:
                                 lcw = cw
                                 #last good date is used for computing next starting date when rolling over
@@ -1579,36 +2365,43 @@ class iCalendar:
                                     lday[tdate_dow].append(t_date)
                                 else:
                                     lday[tdate_dow] = [t_date]
-                                self._log("396 append date:",[t_date,lday])
+                                if self.debug_mode:
+                                    self._log("396 append date:",[t_date,lday])
                         if increment == "DAY":
-                            self._log("552 - about to enter _sublist filtering on DAY increment: last_good_date, days_step_size",[last_good_date, days_step_size])
+                            if self.debug_mode:
+                                self._log("552 - about to enter _sublist filtering on DAY increment: last_good_date, days_step_size",[last_good_date, days_step_size])
                             list_dates = self._sublist(lday,dates,summary,dow,check_setpos,setposlist,list_dates)
                             dates = []
                             lday = {}
                             t_date = last_good_date +timedelta(days = days_step_size)
                             if t_date.month>month:
                                 first_dom = t_date.day
-                                self._log("380 - next first dom",[first_dom,month,year])
+                                if self.debug_mode:
+                                    self._log("380 - next first dom",[first_dom,month,year])
                             elif t_date.year>year:
                                 first_dom = t_date.day
                                 month_start = t_date.month    
-                                self._log("441: roll-out year on daily freq first_dom, month_start",[first_dom, month_start, t_date.year])                            
+                                if self.debug_mode:
+                                    self._log("441: roll-out year on daily freq first_dom, month_start",[first_dom, month_start, t_date.year])                            
                     if increment == "WEEK":
                         first_dom = 1
                     if increment == "MONTH":
                         #enter here to empty the lday list and fill the list_dates
-                        self._log("about to enter _sublist filtering on MONTH increment:\t lday,dates,dow,check_setpos_setposlit,list_dates\n",[lday,dates,summary,dow,check_setpos,setposlist,list_dates])
+                        if self.debug_mode:
+                            self._log("about to enter _sublist filtering on MONTH increment:\t lday,dates,dow,check_setpos_setposlit,list_dates\n",[lday,dates,summary,dow,check_setpos,setposlist,list_dates])
                         list_dates = self._sublist(lday,dates,summary,dow,check_setpos,setposlist,list_dates)
                         month_start = (months[-1]+month_step_size) % 12
                         dates = []
                         lday = {}
                 if increment == "YEAR" or increment == "WEEK":
-                    self._log("about to enter _sublist filtering on YEAR increment:\t lday,dates,dow,check_setpos_setposlit,list_dates\n",[lday,dates,summary,dow,check_setpos,setposlist,list_dates])
+                    if self.debug_mode:
+                        self._log("about to enter _sublist filtering on YEAR increment:\t lday,dates,dow,check_setpos_setposlit,list_dates\n",[lday,dates,summary,dow,check_setpos,setposlist,list_dates])
                     list_dates = self._sublist(lday,dates,summary,dow,check_setpos,setposlist,list_dates)
                     dates = []
                     lday = {}
                     if increment == "WEEK":
-                        self._log("584: next first dom last_good_date, weeks_step_size",[last_good_date ,weeks_step_size])
+                        if self.debug_mode:
+                            self._log("584: next first dom last_good_date, weeks_step_size",[last_good_date ,weeks_step_size])
                         #0.72b fixed
                         #before:
                         t_date = last_good_date +timedelta(weeks = weeks_step_size)
@@ -1629,34 +2422,212 @@ class iCalendar:
                         if t_date.year>year:
                             first_dom = t_date.day
                             month_start = t_date.month
-                            self._log("584: next first dom",[first_dom,month_start,t_date.year])
+                            if self.debug_mode:
+                                self._log("584: next first dom",[first_dom,month_start,t_date.year])
                 #month_start = 1
-        self._log("list of dates before the validation: list_dates and tmp_dates \n",[list_dates,tmp_dates])
-        self._log("interval dates: event_start,event_end,self.OccurencesWindowStartDate,self.OccurencesWindowEndDate \n",[event_start,event_end,self.OccurencesWindowStartDate,self.OccurencesWindowEndDate])
+        if self.debug_mode:
+            self._log("list of dates before the validation: list_dates and tmp_dates \n",[list_dates,tmp_dates])
+            self._log("interval dates: event_start,event_end,self.OccurencesWindowStartDate,self.OccurencesWindowEndDate \n",[event_start,event_end,self.OccurencesWindowStartDate,self.OccurencesWindowEndDate])
         
-        if dtstart not in list_dates:
+        if event_start == dtstart and dtstart not in list_dates:
+            #DTSTART is always the first instance, unless the enumeration was fast-forwarded past it
             list_dates.append(dtstart)
-            self._log("DTSTART added to list", [dtstart,list_dates])
+            if self.debug_mode:
+                self._log("DTSTART added to list", [dtstart,list_dates])
 
         list_dates = sorted(list_dates)
 
+        #occurrences before the window are counted too so that COUNT is counted from DTSTART
+        count = skipped
         for t_date in list_dates:
             #FIXME: need to account here for event with start<WindowStart but start+duration>WindowStart
             #FIXME: need to account also for dual case with WindowEnd
-            if t_date>=event_start and  t_date>=WindowStart and t_date<WindowEnd and t_date<=event_end:
-                self._log("Maxcount",[MaxCount, t_date])
+            if t_date>=dtstart and t_date<WindowEnd and t_date<=event_end:
+                if self.debug_mode:
+                    self._log("Maxcount",[MaxCount, t_date])
                 if MaxCount >0:
                     #if we count the number of recurrencies then only add dates as long as below max number
                     count = count+1
-                    if count<= MaxCount:
+                    if count > MaxCount:
+                        break
+                    if self.debug_mode:
                         self._log("count, MaxCount",[count,MaxCount, t_date])
-                        tmp_dates.append(t_date)
-                else:
-                    #if we are not counting the number of reccurencies then just keep it
+                if t_date>=WindowStart:
                     tmp_dates.append(t_date)
         list_dates = tmp_dates
         
         return list_dates
+    def _fast_forward(self,dtstart,rules,WindowStart):
+        """ computes the first period of the RRULE which can have occurrences within the occurrences window
+        so that _flatten_rrule does not enumerate all periods from DTSTART
+        
+        The periods are skipped using INTERVAL arithmetic. When COUNT is set, MONTHLY and YEARLY periods are
+        only skipped for rules generating a constant number of occurrences per period, so that the skipped
+        occurrences can be accounted for, the skipped occurrences of DAILY and WEEKLY rules are counted.
+        Parameters:
+        -----------
+        dtstart: date or datetime
+            DTSTART of the event
+        rules: dict
+            RRULE as loaded by vevent.rrule_load
+        WindowStart: date or datetime (same type as dtstart)
+            start of the occurrences window
+        Returns:
+        --------
+        [anchor, skipped]:
+            anchor is the date (same type as dtstart) from which enumeration starts, 
+            skipped is the number of occurrences from dtstart (included) to anchor (excluded)
+        """
+        if len(rules)<=0 or not "FREQ" in rules or WindowStart<=dtstart:
+            return [dtstart,0]
+        interval = int(rules["INTERVAL"]) if "INTERVAL" in rules else 1
+        byparts = set([rule for rule in rules if rule.find("BY")==0])
+        counted = "COUNT" in rules
+        if interval<1 or "BYWEEKNO" in byparts or "BYYEARDAY" in byparts:
+            return [dtstart,0]
+        skipped = 0
+        if rules["FREQ"] in ["DAILY","WEEKLY"]:
+            if not self._period_rule(rules):
+                return [dtstart,0]
+            if rules["FREQ"] == "DAILY":
+                #the periods are DTSTART, DTSTART+INTERVAL days, ...
+                first_period = dtstart
+                period_days = interval
+            else:
+                #the periods are the weeks (from WKST) of DTSTART, DTSTART+INTERVAL weeks, ...
+                first_period = dtstart - timedelta(days = (dtstart.weekday()-self._wkst(rules)) % 7)
+                period_days = 7*interval
+            periods = (WindowStart-first_period).days // period_days
+            #the enumeration starts with the period of WindowStart
+            anchor = first_period + timedelta(days = periods*period_days)
+            if counted and periods>0:
+                skipped = self._skipped_count(dtstart,rules,anchor,periods)
+        elif rules["FREQ"] == "MONTHLY":
+            months = (WindowStart.year-dtstart.year)*12 + WindowStart.month-dtstart.month
+            periods = months // interval
+            [year, month] = divmod(dtstart.month-1+periods*interval, 12)
+            year += dtstart.year
+            month += 1
+            if len(byparts)==0 and dtstart.day<=28:
+                anchor = dtstart.replace(year = year, month = month)
+                skipped = periods
+            elif not counted and len(byparts)>0 and byparts <= set(["BYDAY","BYMONTHDAY","BYSETPOS"]):
+                #the whole month is enumerated, the day of DTSTART is not used
+                anchor = dtstart.replace(year = year, month = month, day = 1)
+            else:
+                return [dtstart,0]
+        elif rules["FREQ"] == "YEARLY":
+            if (counted and len(byparts)>0) or (dtstart.month==2 and dtstart.day==29):
+                return [dtstart,0]
+            if not byparts <= set(["BYMONTH","BYDAY","BYMONTHDAY","BYSETPOS"]):
+                return [dtstart,0]
+            periods = (WindowStart.year-dtstart.year) // interval
+            anchor = dtstart.replace(year = dtstart.year+periods*interval)
+            skipped = periods
+        else:
+            return [dtstart,0]
+        if periods<=0:
+            return [dtstart,0]
+        if self.debug_mode:
+            self._log("fast forward: dtstart, anchor, skipped",[dtstart,anchor,skipped])
+        return [anchor,skipped]
+    def _period_rule(self,rules):
+        """ returns True for the DAILY and WEEKLY rules enumerated period by period by _period_dates: the ones
+        without BYWEEKNO nor BYYEARDAY and whose BYDAY has no ordinal """
+        if rules.get("FREQ") not in ["DAILY","WEEKLY"] or "BYWEEKNO" in rules or "BYYEARDAY" in rules:
+            return False
+        for indexes in rules.get("BYDAY",{}).values():
+            if indexes != [0]:
+                return False
+        return int(rules.get("INTERVAL",1))>=1
+    def _wkst(self,rules):
+        """ returns the weekday (0 for monday) on which the weeks of rules start """
+        return weekday_map.get(rules.get("WKST","MO"),0)
+    def _week_offsets(self,dtstart,rules):
+        """ returns the sorted days (from WKST) of the week of the occurrences of a WEEKLY rule """
+        wkst = self._wkst(rules)
+        weekdays = [weekday_map[day] for day in rules.get("BYDAY",{}) if day in weekday_map]
+        if len(weekdays)==0:
+            weekdays = [dtstart.weekday()]
+        return sorted(set([(day-wkst) % 7 for day in weekdays]))
+    def _period_dates(self,dtstart,rules,anchor,last,count=0):
+        """ returns the dates of a DAILY or WEEKLY rule (see _period_rule) from anchor to the day ordinal last
+        (included), at most count dates when count>0
+
+        The periods (INTERVAL days from DTSTART, or INTERVAL weeks from the week of DTSTART starting on WKST)
+        are stepped from the one of anchor (DTSTART or the start of a period returned by _fast_forward).
+        Each period is expanded by BYDAY (WEEKLY), limited by BYMONTH, BYMONTHDAY and BYDAY (DAILY), then
+        BYSETPOS selects within it.
+        """
+        interval = int(rules.get("INTERVAL",1))
+        months = rules.get("BYMONTH",[])
+        monthdays = rules.get("BYMONTHDAY",[])
+        setposlist = rules.get("BYSETPOS",[])
+        if rules["FREQ"] == "DAILY":
+            period_start = anchor
+            period = timedelta(days = interval)
+            offsets = [0]
+            weekdays = [weekday_map[day] for day in rules.get("BYDAY",{}) if day in weekday_map]
+        else:
+            period_start = anchor - timedelta(days = (anchor.weekday()-self._wkst(rules)) % 7)
+            period = timedelta(weeks = interval)
+            offsets = self._week_offsets(dtstart,rules)
+            weekdays = []
+        dates = []
+        while period_start.toordinal()<=last:
+            candidates = []
+            for offset in offsets:
+                t_date = period_start + timedelta(days = offset)
+                if len(months)>0 and t_date.month not in months:
+                    continue
+                if len(weekdays)>0 and t_date.weekday() not in weekdays:
+                    continue
+                if len(monthdays)>0 and t_date.day not in monthdays and \
+                        t_date.day-month_length(t_date.year,t_date.month)-1 not in monthdays:
+                    continue
+                candidates.append(t_date)
+            if self.profile is not None:
+                self.profile.count("rrule_candidates",len(offsets))
+            if len(setposlist)>0:
+                candidates = sorted(set([candidates[setpos-1 if setpos>0 else setpos] for setpos in setposlist
+                                         if 0<abs(setpos)<=len(candidates)]))
+            for t_date in candidates:
+                #the first period can start before DTSTART
+                if t_date>=anchor and t_date.toordinal()<=last:
+                    dates.append(t_date)
+                    if count>0 and len(dates)>=count:
+                        return dates
+            period_start += period
+        return dates
+    def _skipped_count(self,dtstart,rules,anchor,periods):
+        """ returns the number of occurrences of a DAILY or WEEKLY rule from DTSTART (included, an occurrence
+        even when it does not match the rule) to anchor, the start of the period periods (excluded), the
+        enumeration of the occurrences stops at COUNT """
+        byparts = set([rule for rule in rules if rule.find("BY")==0])
+        if len(byparts)==0 and rules["FREQ"] == "DAILY":
+            return periods
+        if byparts <= set(["BYDAY"]) and rules["FREQ"] == "WEEKLY":
+            #same days in all weeks, from the day of DTSTART in the first one
+            offsets = self._week_offsets(dtstart,rules)
+            dtstart_offset = (dtstart.weekday()-self._wkst(rules)) % 7
+            skipped = (periods-1)*len(offsets) + len([offset for offset in offsets if offset>=dtstart_offset])
+            if dtstart_offset not in offsets:
+                skipped += 1
+            return skipped
+        if byparts <= set(["BYDAY"]) and rules["FREQ"] == "DAILY":
+            #the days repeat every 7*INTERVAL days: count one cycle and the days after the last whole cycle
+            cycle_days = 7*int(rules.get("INTERVAL",1))
+            cycles = (anchor-dtstart).days // cycle_days
+            cycle_start = dtstart + timedelta(days = cycles*cycle_days)
+            dates = self._period_dates(dtstart,rules,dtstart,dtstart.toordinal()+cycle_days-1)
+            skipped = cycles*len(dates) + len(self._period_dates(dtstart,rules,cycle_start,anchor.toordinal()-1))
+            if len(dates)==0 or dates[0]!=dtstart:
+                skipped += 1
+            return skipped
+        dates = self._period_dates(dtstart,rules,dtstart,anchor.toordinal()-1,rules["COUNT"])
+        if len(dates)==0 or dates[0]!=dtstart:
+            return len(dates)+1
+        return len(dates)
     def add_year_months(self,date,years,months,InstanceAccurate = True):
         """"will add nMonths to the date, if not 100% accurate it will either compromise the date (like 31 jan +1 mo = 28 fev InstanceAccurate
         2012/2/29 + 1 year = "Na" for DateAccurate
@@ -1678,11 +2649,12 @@ class iCalendar:
         
         will also secure that the property is a valid property
         """
-        self._log("line loader", [LineContent], 0)
+        if self.debug_mode:
+            self._log("line loader", [LineContent], 0)
         if LineContent.find(":")>0:
-            [propnparam,value]=[LineContent.split(":")[0], ":".join(LineContent.split(":")[1:])]
+            [propnparam,_,value]=LineContent.partition(":")
             if propnparam.find(";")>0:
-                [prop,param]=[propnparam.split(";")[0],propnparam.split(";")[1:]]
+                [prop,*param]=propnparam.split(";")
             else:
                 [prop,param]=[propnparam,[]]
         else:
@@ -1691,21 +2663,18 @@ class iCalendar:
             else:
                 LineNumber = str(LineNumber)           
             self.Validator("3.1_2", line_count = LineNumber, line = LineContent, level = 0)#raise Exception("VCALENDAR WARNING","Expected a semi-column ':' %s : %s"%(LineNumber,LineContent))
-        self._log("line loaded", [prop,param,value], 0)
+        if self.debug_mode:
+            self._log("line loaded", [prop,param,value], 0)
         if prop not in RFC5545_Properties:
             if not prop.find("X-") == 0:
                 self.Validator("8.3.2_1", line_count = LineNumber, line = LineContent, level = 0)
         return [prop,param,value]
     def _last_dom(self,year,month):
-        day = datetime(year,month,1)
-        for i in range(1,32):
-            delta = timedelta(days = i)
-            new = day + delta
-            if new.month != day.month:
-                return i
+        "returns the number of days of month (see calendar_tables.month_length)"
+        return month_length(year,month)
     def _icalDOW(self,date):
         "returns DOW ical way from date (MO, TU, ..."
-        return date.strftime("%a")[-3:-1].upper()
+        return ical_weekday(date)
     def _isoCW(self,year, month,day,wkst="MO",iso=True):
         """returns the iso week number of the passed date, 0 if invalid date
         
@@ -1731,19 +2700,8 @@ class iCalendar:
        [2012,1,18,"TH",3,3]]
         
         """
-        
-        #2005-01-01 is 2004-W53-6
-        CW = 0
-        dow = ["TU","WE","TH","FR","SA","SU","MO"]
-        try:
-            CW= datetime(year,month,day).isocalendar()[1]
-            #if dow is between wkst and monday then CW-=1 else keep CW, "MO" was put end of list so if wkst = MO then no change
-            if (dow.index(self._icalDOW(date(year,month,day)))-dow.index(wkst)>=0) and (dow.index(wkst)<dow.index("MO")) and (dow.index(self._icalDOW(date(year,month,day))) < dow.index("MO")):
-                    CW -= 1
-        except ValueError:
-            #this is in case days0 is not a valid date of month for the given year/month
-            CW = 0
-        return CW
+        #2005-01-01 is 2004-W53-6, computed from the per year tables of calendar_tables
+        return week_number(year,month,day,wkst)
     def _get_number_slots(self,dtstart,dtend,slot_duration):
         """ will return the number of slots (defined by slot duration) between dtstart (inclusive) 
         and dtend (not inclusive)
@@ -1764,11 +2722,12 @@ class iCalendar:
         nb_slots = int(delta_seconds/slot_dur_seconds)
         return nb_slots
     def _to_FloatingTime(self,dt):
-        """ takes a datetime object with tzinfo and returns a naive datetime with time converted to UTC """
-        
-        #FIXME: need to uncomment below
-#        timedelta = dt.tzinfo.DST()
+        """ takes a datetime object with tzinfo and returns a naive datetime with time converted to UTC 
         
+        floatting datetime and date are returned unchanged"""
+        if not isinstance(dt, datetime):
+            return dt
+        utcoffset = dt.utcoffset()
         dtFloat = datetime(year = dt.year, 
                         month = dt.month,
                         day = dt.day,
@@ -1776,8 +2735,17 @@ class iCalendar:
                         minute = dt.minute,
                         second = dt.second
                         )
+        if not type(utcoffset)== type(None):
+            dtFloat = dtFloat - utcoffset
         
         return dtFloat
+    def _hashed(self,values):
+        """ returns values as a set for O(1) membership tests (same == semantic as the list), values 
+        is returned unchanged if some are not hashable """
+        try:
+            return set(values)
+        except TypeError:
+            return values
     def _from_FloatingTime2TZ(self,dt,TZ):
         """ takes a TZ naive-datetime (floating) and converts to TZ-aware datetime """
         #FIXME: need to uncomment below
@@ -1811,11 +2779,13 @@ class iCalendar:
         return typeDT
     def _sublist(self,lday,dates,summary,dow,check_setpos,setposlist,list_dates):
         """ used in flatten rrule to accelerate by only looking at some dates within a list"""
-        self._log("347 list_Dates",[list_dates])
+        if self.debug_mode:
+            self._log("347 list_Dates",[list_dates])
         # print("debug #1",[list_dates])
-        self._log("348 lday",[lday])
-        self._log("349 setposlist",[setposlist])
-        self._log("350 dow",[dow])
+        if self.debug_mode:
+            self._log("348 lday",[lday])
+            self._log("349 setposlist",[setposlist])
+            self._log("350 dow",[dow])
         #same as above for the year
         for dowi in lday:
             if 0 in dow[dowi]:
@@ -1829,11 +2799,13 @@ class iCalendar:
                         dates = [lday[dowi][dow_index]]
                     else:
                         dates.append(lday[dowi][dow_index])
-        self._log("356 dates before check_setpos",[dates])
+        if self.debug_mode:
+            self._log("356 dates before check_setpos",[dates])
         dates = sorted(dates)
         if check_setpos == True:
             dates_pos = []
-            self._log("363 dates sorted", [dates])
+            if self.debug_mode:
+                self._log("363 dates sorted", [dates])
             for setpos in setposlist:
                 if setpos>0:
                     setpos = setpos-1
@@ -1846,7 +2818,8 @@ class iCalendar:
                 except:
                     #issue#1 debug
                     print("issue #1 debug",dates,len(dates),setpos)
-                    self._log("dates setpos", [dates,setpos], logging.CRITICAL)
+                    if self.debug_mode:
+                        self._log("dates setpos", [dates,setpos], logging.CRITICAL)
                     raise
             dates = dates_pos
         if len(list_dates)==0:
@@ -1854,39 +2827,256 @@ class iCalendar:
         else:
             for date in dates:
                 list_dates.append(date)
-        self._log("413: list_dates at end of _sublist",[list_dates])
+        if self.debug_mode:
+            self._log("413: list_dates at end of _sublist",[list_dates])
         return list_dates
-    def get_event_instances(self,start=datetime.today().strftime("%Y%m%d"),end=datetime.today().strftime("%Y%m%d"),count=-1):
+    def get_event_instances(self,start=datetime.today().strftime("%Y%m%d"),end=datetime.today().strftime("%Y%m%d"),count=-1,index=False):
         """Returns an array of events with dates, uid, and summary
         
         The function returns the array of events within a given date window (defined by start and end),
         should only a certain number of events be needed either from a start date or to an end date the
-        missing date should be set to Null
+        missing date should be set to Null, each instance is a tuple (date, summary, uid)
+
+        When index is True, self.occurrence_index is (re)built with the occurrences of the window for
+        overlap, point-in-time and per UID queries (see OccurrenceIndex)
         """
+        if self.profile is not None:
+            start_time = perf_counter()
         self.OccurencesWindowStartDate = datetime.strptime(start,"%Y%m%d")
         self.OccurencesWindowEndDate = datetime.strptime(end,"%Y%m%d")+timedelta(days =1)
-        self.parse_loaded()
-        self._flatten()
+        if self.ical_parsed == 0:
+            self.parse_loaded()
+        self._flatten(index=index)
+        self._sort_instances()
+        if self.profile is not None:
+            self.profile.phase("get_event_instances",perf_counter()-start_time)
+        return self.events_instances
+    async def get_event_instances_async(self,start=datetime.today().strftime("%Y%m%d"),end=datetime.today().strftime("%Y%m%d"),count=-1,index=False,executor=None):
+        """ coroutine returning the instances of get_event_instances without blocking the event loop: the
+        events are enumerated one by one, handing control back to the loop between them, or in executor
+        (see async_calendar.get_event_instances) """
+        from .async_calendar import get_event_instances
+        return await get_event_instances(self,start,end,count,index,executor)
+    def _sort_instances(self):
+        """ sorts self.events_instances chronologically, instances of date and date-time events together """
+        if self.profile is not None:
+            sort_time = perf_counter()
         try:
             #PY3 update below
             # ⚠️ Python cannot directly compare date and datetime.
             # This will raise TypeError:
             self.events_instances = sorted(self.events_instances,\
-                key = lambda recur_instance: recur_instance[0] if isinstance(recur_instance[0], datetime) else datetime.combine(recur_instance[0], datetime.min.time()))
+                key = lambda recur_instance: self._instance_key(recur_instance[0]))
                 #key = lambda dateeve: operator.itemgetter(0).date() if type(operator.itemgetter(0)) == type(datetime.now()) else operator.itemgetter(0) )
         except Exception as ex:
             for ei in self.events_instances:
                 print("ei:", ei)
             print(len(self.events_instances), str(ex))
             raise
-        return self.events_instances
+        if self.profile is not None:
+            self.profile.phase("sort",perf_counter()-sort_time)
 
+    def get_event_ordinals(self,start=datetime.today().strftime("%Y%m%d"),end=datetime.today().strftime("%Y%m%d")):
+        """Returns the occurrences of each event within the window as compact arrays (bulk analytics)
+        
+        The starts of the occurrences of an event are the same as the ones enumerated by get_event_instances
+        (before they are split in slots), returned as an array('l') of day ordinals (date.toordinal) and, for
+        DATE-TIME events, an array('l') of seconds since midnight (floatting time). The events without RDATE
+        nor EXDATE whose RRULE is supported by ordinal_rrule are expanded without building date objects.
+        Parameters:
+        -----------
+        start: str
+            first day of the window (yyyymmdd)
+        end: str
+            last day of the window (yyyymmdd), included
+        Returns:
+        --------
+        occurrences: list
+            one OrdinalOccurrences (uid, summary, ordinals, seconds) per event, seconds is None for DATE events
+        """
+        self.OccurencesWindowStartDate = datetime.strptime(start,"%Y%m%d")
+        self.OccurencesWindowEndDate = datetime.strptime(end,"%Y%m%d")+timedelta(days =1)
+        if self.ical_parsed == 0:
+            self.parse_loaded()
+        return [self._event_ordinals(cevent) for cevent in self.compiled_events]
+    def _event_ordinals(self,cevent):
+        """ returns the OrdinalOccurrences of a compiled event within the occurrences window """
+        ordinals = None
+        if cevent is not None and len(cevent.rdates)==0 and len(cevent.exdates)==0 and cevent.tz_table is None:
+            [WindowStart, WindowEnd] = self._event_window(cevent)
+            ordinals = expand_ordinals(cevent.dtstart,cevent.rrule,WindowStart,WindowEnd)
+        if ordinals is not None:
+            if not isinstance(cevent.dtstart, datetime):
+                return OrdinalOccurrences(cevent.uid,cevent.summary,ordinals,None)
+            dtstart = cevent.dtstart
+            seconds = array("l",[dtstart.hour*3600+dtstart.minute*60+dtstart.second])*len(ordinals)
+            return OrdinalOccurrences(cevent.uid,cevent.summary,ordinals,seconds)
+        starts = [start for [start,end] in self._event_occurrences(cevent)]
+        ordinals = array("l",[start.toordinal() for start in starts])
+        if not isinstance(cevent.dtstart, datetime):
+            return OrdinalOccurrences(cevent.uid,cevent.summary,ordinals,None)
+        seconds = array("l",[start.hour*3600+start.minute*60+start.second if isinstance(start, datetime) else 0 
+                             for start in starts])
+        return OrdinalOccurrences(cevent.uid,cevent.summary,ordinals,seconds)
+    def get_freebusy(self,start=datetime.today().strftime("%Y%m%d"),end=datetime.today().strftime("%Y%m%d"),calendars=[]):
+        """Returns the busy time of this calendar and of calendars within the window (see freebusy)
+        
+        The occurrences of the events (one per occurrence, multi-day events are not split in slots) are
+        merged in one sweep-line over all the calendars, events with TRANSP:TRANSPARENT or STATUS:CANCELLED
+        being ignored and events with STATUS:TENTATIVE being BUSY-TENTATIVE
+        Parameters:
+        -----------
+        start: str
+            first day of the window (yyyymmdd)
+        end: str
+            last day of the window (yyyymmdd), included
+        calendars: list
+            other iCalendar objects aggregated with this one
+        Returns:
+        --------
+        periods: list
+            disjoint BusyPeriod (start, end, fbtype) sorted by start, as naive date-times: floatting date-times
+            and the date-times with a TZID or in UTC keep their wall clock, Gen_FreeBusy writes them with the UTC
+            suffix "Z" unless given their tzinfo
+        """
+        return self._freebusy(start,end,calendars).busy_periods()
+    def _freebusy(self,start,end,calendars=[]):
+        """ returns the FreeBusy of this calendar and of calendars within the window """
+        if self.profile is not None:
+            start_time = perf_counter()
+        WindowStart = datetime.strptime(start,"%Y%m%d")
+        WindowEnd = datetime.strptime(end,"%Y%m%d")+timedelta(days =1)
+        freebusy = FreeBusy(WindowStart,WindowEnd)
+        for calendar in [self]+list(calendars):
+            calendar.OccurencesWindowStartDate = WindowStart
+            calendar.OccurencesWindowEndDate = WindowEnd
+            if calendar.ical_parsed == 0:
+                calendar.parse_loaded()
+            calendar._add_busy(freebusy)
+        if self.profile is not None:
+            self.profile.count("busy_intervals",len(freebusy))
+            self.profile.phase("get_freebusy",perf_counter()-start_time)
+        return freebusy
+    def _add_busy(self,freebusy):
+        """ adds the occurrences within the occurrences window of the events blocking time to freebusy """
+        for [event, cevent] in zip(self.events,self.compiled_events):
+            if cevent is None:
+                continue
+            fbtype = busy_type(self._text_value(event,"TRANSP"),self._text_value(event,"STATUS"))
+            if fbtype is None:
+                continue
+            for [start, end] in self._event_occurrences(cevent):
+                if not isinstance(start, datetime) and end<=start:
+                    #DATE event without DTEND nor DURATION lasts one day (RFC5545 §3.6.1)
+                    end = start+timedelta(days=1)
+                freebusy.add(start,end,fbtype)
+    def _text_value(self,event,prop):
+        """ returns the upper-cased TEXT value of the property of a typed event (first one if repeated), None if not set """
+        value = event.get(prop)
+        if isinstance(value, list):
+            value = value[0]
+        if value is None or not isinstance(value["val"], str):
+            return None
+        return value["val"].upper()
+    def iter_event_instances(self,start=datetime.today().strftime("%Y%m%d"),end=datetime.today().strftime("%Y%m%d"),slot_dur=timedelta(days=1)):
+        """Yields the events instances (date, summary, uid) within the window in chronological order
+        
+        Yields the same instances as get_event_instances but lazily: a recurring event is expanded in
+        consecutive sub-windows (ITER_SUBWINDOW, then twice longer each time) and a sub-window is only
+        expanded once all instances before its start have been yielded, the other events once all instances
+        before their DTSTART have been yielded. The first instances come without enumerating the whole
+        window, and the caller can stop at any time (e.g. for the next 10 instances)::
+        
+            for [t_date, summary, uid] in mycal.iter_event_instances("20240101","20241231"):
+                ...
+        """
+        WindowStart = datetime.strptime(start,"%Y%m%d")
+        WindowEnd = datetime.strptime(end,"%Y%m%d")+timedelta(days =1)
+        self.OccurencesWindowStartDate = WindowStart
+        self.OccurencesWindowEndDate = WindowEnd
+        if self.ical_parsed == 0:
+            self.parse_loaded()
+        #heap entries are (sort key, event index, sub-window index, instance index, payload), sub-windows not yet
+        #expanded have instance index -1 and [event, sub-window start, sub-window length] as payload, keyed on
+        #their first possible instance
+        heap = []
+        for index, cevent in enumerate(self.compiled_events):
+            heap.append((self._first_instance_key(cevent),index,0,-1,[cevent,WindowStart,ITER_SUBWINDOW]))
+        heapq.heapify(heap)
+        while len(heap)>0:
+            [key, index, sub, pos, payload] = heapq.heappop(heap)
+            if pos<0:
+                [cevent, sub_start, length] = payload
+                sub_end = WindowEnd
+                if self._expands_by_subwindows(cevent):
+                    #the sub-window starts from the first possible instance, at midnight for DATE events
+                    sub_end = min(datetime.combine(max(key,sub_start).date(), datetime.min.time())+length,WindowEnd)
+                #sub-windows are disjoint: an occurrence is in the sub-window in which it starts
+                self.OccurencesWindowStartDate = sub_start
+                self.OccurencesWindowEndDate = sub_end
+                try:
+                    instances = self._flatten_event(cevent,slot_dur)
+                finally:
+                    self.OccurencesWindowStartDate = WindowStart
+                    self.OccurencesWindowEndDate = WindowEnd
+                if sub_end<WindowEnd:
+                    heapq.heappush(heap,(sub_end,index,sub+1,-1,[cevent,sub_end,length*2]))
+                if len(instances)>0:
+                    heapq.heappush(heap,(self._instance_key(instances[0][0]).replace(tzinfo=None),index,sub,0,instances))
+            else:
+                yield payload[pos]
+                if pos+1<len(payload):
+                    heapq.heappush(heap,(self._instance_key(payload[pos+1][0]).replace(tzinfo=None),index,sub,pos+1,payload))
+    def _expands_by_subwindows(self,cevent):
+        """ returns True when iter_event_instances expands the compiled event in sub-windows: it has an RRULE
+        and no RDATE of PERIOD type (returned whatever the window) """
+        if cevent is None or len(cevent.rrule)==0:
+            return False
+        for rdate in cevent.rdates:
+            if isinstance(rdate, list):
+                return False
+        return True
+    def _instance_key(self,instance_date):
+        """ returns the datetime used to sort instances of date and date-time events together"""
+        if isinstance(instance_date, datetime):
+            return instance_date
+        return datetime.combine(instance_date, datetime.min.time())
+    def _first_instance_key(self,cevent):
+        """ returns a sort key lower or equal to the keys of all instances of a compiled event """
+        if cevent is None or len(cevent.rdates)>0:
+            #RDATE periods are not bound by DTSTART
+            return datetime.min
+        return max(self._instance_key(cevent.dtstart).replace(tzinfo=None),self.OccurencesWindowStartDate)
     def Gen_iCalendar(self,append = False,method=""):
         """ takes the self.dVCALENDAR and generates an icalendar string """
         
 #        if not append:
 #            self._reset()
-
+        writer = ContentLineWriter()
+        self._write_iCalendar(writer,method)
+        return writer.getvalue()
+    def write_iCalendar(self,stream,method="",chunk_size=CHUNK_SIZE):
+        """ generates the icalendar of self.dVCALENDAR and self.events like Gen_iCalendar but writes it to stream
+        in chunks instead of returning it as a string
+        Parameters:
+        -----------
+        stream: file-like object
+            text stream (opened with newline="") or binary stream (file, socket.makefile("wb"), ...)
+        method: str
+            METHOD of the calendar (RFC5546) when dVCALENDAR has none
+        chunk_size: int
+            number of characters buffered before each write to stream
+        Returns:
+        --------
+        written: int
+            number of characters written
+        """
+        writer = ContentLineWriter(stream,chunk_size)
+        self._write_iCalendar(writer,method)
+        writer.flush()
+        return writer.written
+    def _write_iCalendar(self,writer,method=""):
+        """ writes the content lines of the calendar to writer (ContentLineWriter) """
         vevent_write = {
                         "TEXT": self.vevent.string_write,
                         "DATE-TIME": self.vevent.date_write,
@@ -1897,7 +3087,7 @@ class iCalendar:
                         "RECUR":self.vevent.rrule_write
                         }
         
-        sCalendar = "BEGIN:VCALENDAR"+CRLF
+        writer.write_line("BEGIN:VCALENDAR")
         if not "VERSION" in self.dVCALENDAR:
             self.dVCALENDAR["VERSION"]="2.0"
         if not "PRODID" in self.dVCALENDAR:
@@ -1909,57 +3099,85 @@ class iCalendar:
             #here add calendar properties
             param = ""
             if "param" in self.dVCALENDAR[Prop]:
-                for p in self.dVCALENDAR[Prop]["param"]:
-                    param +=p+";"
-            else:
-                param = ""
+                param = "".join([p+";" for p in self.dVCALENDAR[Prop]["param"]])
             if not "val" in self.dVCALENDAR[Prop]:
                 propvalue = self.dVCALENDAR[Prop]
             else:
                 propvalue = self.dVCALENDAR[Prop]["val"]
-            sCalendar+=Prop+param+":"+propvalue+CRLF
+            writer.write_line(Prop+param+":"+propvalue)
         
         for event in self.events:
             if "UID" not in event:
                 event["UID"]=str(uuid.uuid1())+"@1-annum.com"
             if "DTSTAMP" not in event:
                 event["DTSTAMP"]={"param":"","val":datetime.now()}
-            sCalendar += "BEGIN:VEVENT"+CRLF
+            writer.write_line("BEGIN:VEVENT")
             if "DTSTART" not in event:
                 if "RDATE" in event:
                     event["DTSTART"]={"param":"","val":event["RDATE"][0]}
             for Prop in event:
-                if not "val" in event[Prop]:
-                    propvalue = event[Prop]
+                #a property occurring several times (e.g. ATTENDEE) is a list of {"param":..,"val":..}
+                if isinstance(event[Prop],list):
+                    propvalues = [value["val"] for value in event[Prop]]
+                elif not "val" in event[Prop]:
+                    propvalues = [event[Prop]]
                 else:   
-                    propvalue = event[Prop]["val"]
-#                newline = Prop+":"+vevent_write[Prop](propvalue)+CRLF
-                #RFC5545_Properties[Prop] will give the relevant type
-                #vevent_write["TEXT"] will call self.vevent.string_write(_
-                if Prop in RFC5545_Properties:
-                    newline = Prop+":"+vevent_write[RFC5545_Properties[Prop]](propvalue)+CRLF
-                elif Prop.find("X-")==0:
-                    #write code here for adding X-properties
-                    pass
-                else:
-                    msg_txt = "trying to add invalid property: %s"%(Prop)
-                    print(msg_txt)
-                    logging.warning(msg_txt)
-                sCalendar+= self.vevent.line_wrap(newline)
-                newline =""
-            sCalendar += "END:VEVENT"+CRLF
+                    propvalues = [event[Prop]["val"]]
+                for propvalue in propvalues:
+                    #RFC5545_Properties[Prop] will give the relevant type
+                    #vevent_write["TEXT"] will call self.vevent.string_write(_
+                    if Prop in RFC5545_Properties:
+                        writer.write_line(Prop+":"+vevent_write[RFC5545_Properties[Prop]](propvalue))
+                    elif Prop.find("X-")==0:
+                        #write code here for adding X-properties
+                        pass
+                    else:
+                        msg_txt = "trying to add invalid property: %s"%(Prop)
+                        print(msg_txt)
+                        logging.warning(msg_txt)
+            writer.write_line("END:VEVENT")
             
-        sCalendar += "END:VCALENDAR"+CRLF
-        return sCalendar
+        writer.write_line("END:VCALENDAR")
+    def Gen_FreeBusy(self,start=datetime.today().strftime("%Y%m%d"),end=datetime.today().strftime("%Y%m%d"),calendars=[],
+                     method="PUBLISH",organizer="",tzinfo=None):
+        """ generates an icalendar string with a VFREEBUSY of the busy time of this calendar and of calendars
+        within the window (see get_freebusy)
+        Parameters:
+        -----------
+        method: str
+            METHOD of the calendar (RFC5546, PUBLISH or REPLY for a VFREEBUSY), none if not a RFC5546 method
+        organizer: str
+            CAL-ADDRESS of the ORGANIZER (e.g. "mailto:me@example.com"), none if empty
+        tzinfo: tzinfo
+            time zone of the wall clock of the busy periods and of the window (e.g. zoneinfo.ZoneInfo("Europe/Paris")
+            for a calendar of floatting date-times) converted to UTC, when None they are written as they are with
+            the UTC suffix "Z"
+        """
+        freebusy = self._freebusy(start,end,calendars)
+        writer = ContentLineWriter()
+        writer.write_line("BEGIN:VCALENDAR")
+        writer.write_line("VERSION:2.0")
+        writer.write_line("PRODID:pyICSParser@1-annum.com")
+        if method in RFC5546_METHODS:
+            writer.write_line("METHOD:"+method)
+        write_vfreebusy(writer,freebusy.busy_periods(),freebusy.WindowStart,freebusy.WindowEnd,
+                        str(uuid.uuid1())+"@1-annum.com",datetime.now(timezone.utc).replace(tzinfo=None),organizer,tzinfo)
+        writer.write_line("END:VCALENDAR")
+        return writer.getvalue()
     def updateEvent(self,uid,updatelist):
         """ will update self.events[uid] with the new value for the properties in updatelist"""
         
-        for event in self.events:
+        for [index, event] in enumerate(self.events):
             if event["UID"]["val"]==uid:
+                if index<len(self.event_fingerprints):
+                    #no longer the VEVENT block it was parsed from: not reused by a reload
+                    self.event_fingerprints[index] = self.event_fingerprints[index]._replace(digest=None)
                 for newval in updatelist:
                     event[newval]=updatelist[newval]
                 if "SEQUENCE" in event:
                     event["SEQUENCE"]["val"]=event["SEQUENCE"]["val"]+1
+        if self.ical_parsed == 1:
+            self._compile_events()
     def isCalendarFileCompliant(self,iCalendarFile,_ReportNonConformance = True):
         """ will load and parse the iCalendar File and display errors """
         self.conformance = _ReportNonConformance
@@ -2005,8 +3223,31 @@ if __name__=="__main__":
                 help='start date for calendar')
     parser.add_argument('--dtend',"-n", dest='dtend', type=str,default="20191231",
                 help='end date for calendar')
+    parser.add_argument('--batch',"-b", dest='batch', type=str, nargs="+", default=[],
+                help='validates all the iCalendar files (and .ics files of the folders) given, over a pool of processes')
+    parser.add_argument('--workers',"-w", dest='workers', type=int, default=None,
+                help='number of processes used by --batch, default one per core')
+    parser.add_argument('--chunksize',"-c", dest='chunksize', type=int, default=16,
+                help='number of files sent at once to a process by --batch')
+    parser.add_argument('--profile',"-p", dest='profile', action='store_true',
+                help='prints the time spent per phase, counters and non-conformances per SCM code')
 
     args = vars(parser.parse_args())
+    if len(args["batch"])>0:
+        from .batch_validator import validate_files
+        count = 0
+        compliant = 0
+        for record in validate_files(args["batch"],args["workers"],args["chunksize"]):
+            count +=1
+            if record.compliant:
+                compliant +=1
+                print("%s: compliant"%(record.path))
+            elif record.error is not None:
+                print("%s: error %s"%(record.path,record.error))
+            else:
+                print("%s: %d non-conformances %s"%(record.path,len(record.lSCM),sorted(set(record.lSCM))))
+        print("%d files validated, %d compliant"%(count,compliant))
+        raise SystemExit(0)
     print(args["enum_non_validate"][:1])
     args["enum_non_validate"]= True if args["enum_non_validate"][:1].lower() in ["t","y","1"] else False
 
@@ -2022,6 +3263,8 @@ if __name__=="__main__":
 
     #create the Parser
     mycal = iCalendar()
+    if args["profile"]:
+        mycal.set_profile(ParserStats())
 
 
     #if we try to enumerate:
@@ -2037,5 +3280,7 @@ if __name__=="__main__":
         #if we selected the validator
         print("parsing iCalendar file for compliance")
         mycal.isCalendarFileCompliant(ics_fp)
+    if args["profile"]:
+        print(mycal.profile.report())
 
     print("done")
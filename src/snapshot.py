@@ -0,0 +1,170 @@
+# -*- coding:utf-8 -*-
+'''
+Versioned binary snapshots of a parsed calendar, so that a process can start from the typed events of a feed
+instead of reading, unfolding and parsing it again.
+
+Layout of a snapshot file::
+
+    header      MAGIC (8 octets), FORMAT_VERSION and length of the metadata (2 x uint32, little endian)
+    metadata    utf-8 JSON: library version, SourceSignature of the iCalendar file, offset/length/compression
+                of each section (offsets from the end of the metadata)
+    sections    one pickle per section, zlib compressed for the sections listed in COMPRESSED
+
+The file is memory-mapped when read: only the header and metadata are read before the snapshot is known to be
+usable, then each section is unpickled from its slice of the mapping. A snapshot is ignored (read_snapshot
+returns None) when it is missing, truncated, of another format or library version, or when the size,
+modification time or digest of its iCalendar file changed.
+
+Snapshots are pickles: only load snapshots written by this library (e.g. in a cache folder of the application).
+
+Usage::
+
+    loaded = mycal.local_load_cached("feed.ics")    #parses feed.ics and writes feed.ics.snapshot the first time
+    mycal.save_snapshot("feed.snapshot","feed.ics")
+    if not mycal.load_snapshot("feed.snapshot","feed.ics"):
+        mycal.local_load("feed.ics")
+'''
+import gc
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import zlib
+from collections import namedtuple
+
+MAGIC = b"pyICSsnp"
+""" first octets of a snapshot file """
+FORMAT_VERSION = 1
+""" version of the layout, snapshots of another version are ignored """
+HEADER = struct.Struct("<8sII")
+""" MAGIC, FORMAT_VERSION, length of the metadata """
+COMPRESSED = ("scm",)
+""" sections compressed with zlib (the SCM reports repeat the same texts on each line) """
+DIGEST_CHUNK = 1024*1024
+""" size of the reads when computing the digest of an iCalendar file """
+
+SourceSignature = namedtuple("SourceSignature",["size","mtime_ns","digest"])
+""" identity of the iCalendar file a snapshot was made from: size (octets), modification time (ns) and blake2b
+digest of its content """
+
+def source_signature(path):
+    """ returns the SourceSignature of the file at path """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path,"rb") as fsource:
+        for chunk in iter(lambda: fsource.read(DIGEST_CHUNK), b""):
+            digest.update(chunk)
+    return SourceSignature(stat.st_size,stat.st_mtime_ns,digest.hexdigest())
+
+def write_snapshot(path,sections,library_version,source=None):
+    """ writes the sections to the snapshot file at path (replaced atomically)
+    Parameters:
+    -----------
+    path: str
+    sections: dict
+        section name -> picklable object
+    library_version: str
+        version of the library writing the snapshot, read_snapshot ignores snapshots of other versions
+    source: str or None
+        path of the iCalendar file the sections were parsed from, None when they do not depend on a file
+    Returns:
+    --------
+    size: int
+        size of the snapshot file in octets
+    """
+    signature = source_signature(source) if source is not None else None
+    blobs = []
+    index = {}
+    offset = 0
+    for [name, value] in sections.items():
+        blob = pickle.dumps(value,protocol=pickle.HIGHEST_PROTOCOL)
+        compressed = name in COMPRESSED
+        if compressed:
+            blob = zlib.compress(blob,1)
+        index[name] = [offset,len(blob),compressed]
+        blobs.append(blob)
+        offset += len(blob)
+    metadata = json.dumps({"library": library_version,
+                           "source": signature._asdict() if signature is not None else None,
+                           "sections": index}).encode("utf-8")
+    temporary = path+".tmp"
+    with open(temporary,"wb") as fsnapshot:
+        fsnapshot.write(HEADER.pack(MAGIC,FORMAT_VERSION,len(metadata)))
+        fsnapshot.write(metadata)
+        for blob in blobs:
+            fsnapshot.write(blob)
+    os.replace(temporary,path)
+    return HEADER.size+len(metadata)+offset
+
+def read_snapshot(path,library_version,source=None):
+    """ returns the sections of the snapshot file at path, None when the snapshot cannot be used
+    Parameters:
+    -----------
+    path: str
+    library_version: str
+        version of the library reading the snapshot, it must be the one which wrote it
+    source: str or None
+        path of the iCalendar file, the snapshot is ignored when its signature changed (None: not checked)
+    Returns:
+    --------
+    sections: dict or None
+        section name -> object, None when the snapshot is missing, not valid, of another version or stale
+    """
+    try:
+        fsnapshot = open(path,"rb")
+    except OSError:
+        return None
+    with fsnapshot:
+        try:
+            mapping = mmap.mmap(fsnapshot.fileno(),0,access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            #empty file
+            return None
+    with mapping:
+        if len(mapping)<HEADER.size:
+            return None
+        [magic, format_version, metadata_length] = HEADER.unpack_from(mapping,0)
+        if magic!=MAGIC or format_version!=FORMAT_VERSION or len(mapping)<HEADER.size+metadata_length:
+            return None
+        try:
+            metadata = json.loads(mapping[HEADER.size:HEADER.size+metadata_length].decode("utf-8"))
+        except ValueError:
+            return None
+        if metadata.get("library")!=library_version or not _is_fresh(metadata.get("source"),source):
+            return None
+        start = HEADER.size+metadata_length
+        sections = {}
+        #the unpickled objects are all kept: collecting while they are created only costs time
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for [name, [offset, length, compressed]] in metadata["sections"].items():
+                if start+offset+length>len(mapping):
+                    return None
+                blob = mapping[start+offset:start+offset+length]
+                if compressed:
+                    blob = zlib.decompress(blob)
+                sections[name] = pickle.loads(blob)
+        except (pickle.UnpicklingError, zlib.error, EOFError, ValueError):
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return sections
+
+def _is_fresh(signature,source):
+    """ returns True when the signature recorded in a snapshot is the one of the file source (always True when
+    source is None), the digest being only computed when size and modification time match """
+    if source is None:
+        return True
+    if signature is None:
+        return False
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return False
+    if stat.st_size!=signature["size"] or stat.st_mtime_ns!=signature["mtime_ns"]:
+        return False
+    return source_signature(source).digest==signature["digest"]
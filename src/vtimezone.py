@@ -0,0 +1,209 @@
+# -*- coding:utf-8 -*-
+'''
+UTC offsets of the VTIMEZONE components (RFC5545 §3.6.5) compiled into a sorted table of transitions, so that
+the UTC offset of a date-time is found by bisection instead of expanding the RRULE of the STANDARD and DAYLIGHT
+observances again for each date-time.
+
+The onsets of the observances are expanded once per VTIMEZONE up to HORIZON_YEAR (the table is extended when a
+later date-time is looked up). Before the first onset the TZOFFSETFROM of the first onset is used. Local times
+skipped by a transition (e.g. 02:30 when clocks go forward at 02:00) are read with the offset before the
+transition, and local times repeated by a transition resolve to their first occurrence (RFC5545 §3.3.5).
+
+Usage::
+
+    from pyICSParser.vtimezone import Observance, transition_table, parse_utc_offset, frozen_rule
+    standard = Observance("STANDARD", datetime(2007,11,4,2), parse_utc_offset("-0400"), parse_utc_offset("-0500"),
+                          frozen_rule({"FREQ":"YEARLY","BYMONTH":[11],"BYDAY":{"SU":[1]}}), (), "EST")
+    daylight = Observance("DAYLIGHT", datetime(2007,3,11,2), parse_utc_offset("-0500"), parse_utc_offset("-0400"),
+                          frozen_rule({"FREQ":"YEARLY","BYMONTH":[3],"BYDAY":{"SU":[2]}}), (), "EDT")
+    table = transition_table((standard, daylight))
+    table.utcoffset(datetime(2024,7,1,9))       #timedelta(hours=-4)
+    table.local_to_utc(datetime(2024,12,1,9))   #datetime(2024,12,1,14)
+'''
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from .calendar_tables import WEEKDAYS, month_length, weekday
+
+HORIZON_YEAR = 2100
+""" last year of the onsets expanded when a table is built """
+EXTENSION_YEARS = 50
+""" years added to the horizon of a table when a later date-time is looked up """
+TABLE_CACHE_SIZE = 64
+""" number of tables kept by transition_table (VTIMEZONE repeated in several calendars or loads share their table) """
+
+Observance = namedtuple("Observance",["kind","dtstart","offset_from","offset_to","rrule","rdates","name"])
+""" STANDARD or DAYLIGHT sub-component: kind ("STANDARD" or "DAYLIGHT"), DTSTART (local time in offset_from),
+TZOFFSETFROM and TZOFFSETTO as timedelta, RRULE as returned by frozen_rule (empty tuple if none), RDATE (local
+times), TZNAME (None if none) """
+
+Transition = namedtuple("Transition",["utc","offset_from","offset_to","dst","name"])
+""" onset of an observance: UTC date-time, offsets before and after, DST delta and TZNAME after the onset """
+
+def parse_utc_offset(value):
+    """ returns the timedelta of a UTC-OFFSET value ("+HHMM" or "-HHMMSS", RFC5545 §3.3.14), None if not valid """
+    value = value.strip()
+    if len(value) not in (5,7) or value[0] not in "+-" or not value[1:].isdigit():
+        return None
+    offset = timedelta(hours=int(value[1:3]),minutes=int(value[3:5]),seconds=int(value[5:7] or 0))
+    if value[0]=="-":
+        return -offset
+    return offset
+
+def frozen_rule(rules):
+    """ returns a RRULE loaded by vevent.rrule_load as a hashable tuple of (rule part, value) sorted by rule part,
+    lists becoming tuples (UNTIL is expected as floatting UTC time) """
+    def frozen(value):
+        if isinstance(value,(list,tuple)):
+            return tuple(frozen(item) for item in value)
+        if isinstance(value,dict):
+            return tuple(sorted((name,frozen(item)) for [name, item] in value.items()))
+        return value
+    return frozen(rules)
+
+def _month_days(year,month,byday,bymonthday,default_day):
+    """ returns the sorted days of the month selected by BYDAY ((weekday, indexes), ...) and BYMONTHDAY """
+    length = month_length(year,month)
+    days = None
+    if byday:
+        days = set()
+        first_weekday = weekday(year,month,1)
+        for [dow, indexes] in byday:
+            if dow not in WEEKDAYS:
+                continue
+            candidates = list(range((WEEKDAYS.index(dow)-first_weekday) % 7+1,length+1,7))
+            for index in indexes:
+                if index==0:
+                    days.update(candidates)
+                elif 0<index<=len(candidates) or 0<-index<=len(candidates):
+                    days.add(candidates[index-1 if index>0 else index])
+    if bymonthday:
+        monthdays = set(day if day>0 else length+1+day for day in bymonthday)
+        days = monthdays if days is None else days & monthdays
+    if days is None:
+        days = [default_day] if default_day<=length else []
+    return sorted(day for day in days if 1<=day<=length)
+
+def _onsets(observance,until_year):
+    """ returns the onsets (local time in offset_from) of an observance up to until_year: DTSTART, the ones of
+    its RRULE and its RDATE. Only FREQ=YEARLY rules (with BYMONTH, BYDAY, BYMONTHDAY, INTERVAL, COUNT and
+    UNTIL) are expanded, which is what VTIMEZONE rules use, DTSTART alone is kept for the others """
+    dtstart = observance.dtstart
+    onsets = set([dtstart])
+    onsets.update(rdate for rdate in observance.rdates if isinstance(rdate, datetime) and rdate.year<=until_year)
+    rules = dict(observance.rrule)
+    if rules.get("FREQ")!="YEARLY":
+        return sorted(onsets)
+    interval = max(rules.get("INTERVAL",1),1)
+    count = rules.get("COUNT")
+    until = rules.get("UNTIL")
+    if until is not None and not isinstance(until, datetime):
+        until = datetime(until.year,until.month,until.day,23,59,59)
+    months = sorted(rules.get("BYMONTH") or (dtstart.month,))
+    emitted = 0
+    for year in range(dtstart.year,until_year+1,interval):
+        for month in months:
+            if not 1<=month<=12:
+                continue
+            for day in _month_days(year,month,rules.get("BYDAY"),rules.get("BYMONTHDAY"),dtstart.day):
+                onset = datetime(year,month,day,dtstart.hour,dtstart.minute,dtstart.second)
+                if onset<dtstart:
+                    continue
+                #UNTIL is in UTC for the observances of a VTIMEZONE
+                if (until is not None and onset-observance.offset_from>until) or (count is not None and emitted>=count):
+                    return sorted(onsets)
+                onsets.add(onset)
+                emitted += 1
+    return sorted(onsets)
+
+def _open_ended(observance):
+    """ returns True when the RRULE of the observance has neither COUNT nor UNTIL """
+    rules = dict(observance.rrule)
+    return len(rules)>0 and "COUNT" not in rules and "UNTIL" not in rules
+
+class TransitionTable:
+    """ sorted transitions of the observances of a VTIMEZONE with bisect lookups of UTC offset, DST and TZNAME
+
+    tables are read-only once built (extending the horizon replaces all the lists at once), so a table can be
+    shared by the iCalendar objects and threads using the same VTIMEZONE
+    Parameters:
+    -----------
+    observances: tuple
+        Observance of the STANDARD and DAYLIGHT sub-components
+    horizon: int
+        last year of the onsets expanded
+    """
+    def __init__(self,observances,horizon=HORIZON_YEAR):
+        self.observances = tuple(observances)
+        self.recurring = any(_open_ended(observance) for observance in self.observances)
+        """ True when some onsets are after any horizon (open-ended RRULE) """
+        self._build(horizon)
+    def _build(self,horizon):
+        transitions = []
+        for observance in self.observances:
+            if observance.offset_from is None or observance.offset_to is None:
+                continue
+            dst = observance.offset_to-observance.offset_from if observance.kind=="DAYLIGHT" else timedelta(0)
+            for onset in _onsets(observance,horizon):
+                transitions.append(Transition(onset-observance.offset_from,observance.offset_from,
+                                              observance.offset_to,dst,observance.name))
+        transitions.sort(key=lambda transition: transition.utc)
+        if len(transitions)>0:
+            initial = Transition(datetime.min,transitions[0].offset_from,transitions[0].offset_from,timedelta(0),None)
+        else:
+            initial = Transition(datetime.min,timedelta(0),timedelta(0),timedelta(0),None)
+        utc_keys = [transition.utc for transition in transitions]
+        #a local time before utc+max(offsets) is either before the onset or skipped by it (read with the offset
+        #before the onset), or repeated by it (first occurrence, also before the onset)
+        local_keys = [transition.utc+max(transition.offset_from,transition.offset_to) for transition in transitions]
+        offsets = [initial.offset_to]+[transition.offset_to for transition in transitions]
+        #all the lookup lists are replaced at once so that readers never see lists of different builds
+        self._state = (horizon,utc_keys,local_keys,[initial]+transitions,min(offsets),max(offsets))
+    @property
+    def horizon(self):
+        """ last year of the onsets expanded """
+        return self._state[0]
+    @property
+    def transitions(self):
+        """ list of Transition sorted by UTC date-time, the first one (at datetime.min) is the offset before the first onset """
+        return self._state[3]
+    def _lookup(self,dt,utc):
+        """ returns the Transition in effect at dt (naive), dt being UTC when utc is True else local time """
+        state = self._state
+        if self.recurring and state[0]<=dt.year<9998:
+            self._build(min(dt.year+EXTENSION_YEARS,9998))
+            state = self._state
+        return state[3][bisect_right(state[1] if utc else state[2],dt)]
+    def utcoffset(self,local):
+        """ returns the UTC offset (timedelta) of a naive local date-time """
+        return self._lookup(local,False).offset_to
+    def dst(self,local):
+        """ returns the DST delta (timedelta) of a naive local date-time """
+        return self._lookup(local,False).dst
+    def tzname(self,local):
+        """ returns the TZNAME of a naive local date-time, None if its observance has none """
+        return self._lookup(local,False).name
+    def local_to_utc(self,local):
+        """ returns the naive UTC date-time of a naive local date-time """
+        return local-self._lookup(local,False).offset_to
+    def utc_to_local(self,utc):
+        """ returns the naive local date-time of a naive UTC date-time """
+        return utc+self._lookup(utc,True).offset_to
+    def local_window(self,WindowStart,WindowEnd):
+        """ returns [start, end] the local times including all the local times of the UTC window """
+        state = self._state
+        return [WindowStart+state[4],WindowEnd+state[5]]
+    def __eq__(self,other):
+        return isinstance(other,TransitionTable) and self.observances==other.observances
+    def __hash__(self):
+        return hash(self.observances)
+    def __repr__(self):
+        return "TransitionTable(%d observances, %d transitions)"%(len(self.observances),len(self.transitions)-1)
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def transition_table(observances):
+    """ returns the TransitionTable of a tuple of Observance, built once for the VTIMEZONE repeated in several
+    calendars or loads """
+    return TransitionTable(observances)